@@ -0,0 +1,92 @@
+"""Compare releasing the events of many aggregates in flight, with deep copies of the
+released events (as before) and with handing over the buffer.
+
+Usage:
+    python -m benchmarks.aggregate_events [--aggregates 1000] [--events 50]
+"""
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from fractal.core.event_sourcing.event import BasicSendingEvent
+from fractal.core.event_sourcing.models import EventSourcedAggregateRoot
+
+
+@dataclass
+class OrderLineAddedEvent(BasicSendingEvent):
+    id: str
+    product: str
+    attributes: Dict[str, str] = field(default_factory=dict)
+    tags: List[str] = field(default_factory=list)
+
+    @property
+    def object_id(self):
+        return self.id
+
+    @property
+    def aggregate_root_id(self):
+        return self.id
+
+    @property
+    def aggregate_root_type(self):
+        return Order
+
+
+@dataclass
+class Order(EventSourcedAggregateRoot):
+    id: str
+    lines: int = 0
+
+    def add_line(self, product: str):
+        self.lines += 1
+        return self.record(
+            OrderLineAddedEvent(
+                self.id,
+                product,
+                {f"attribute{i}": "value" * 10 for i in range(10)},
+                [f"tag{i}" for i in range(10)],
+            )
+        )
+
+
+class CopyingOrder(Order):
+    def release(self):
+        return deepcopy(super(CopyingOrder, self).release())
+
+
+def run(aggregate_class, aggregates, events, workers):
+    def handle(index):
+        order = aggregate_class(str(index))
+        for line in range(events):
+            order.add_line(f"product{line}")
+        return len(order.release())
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        released = sum(executor.map(handle, range(aggregates)))
+    assert released == aggregates * events
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--aggregates", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'deepcopy (ms)':>14} {'hand over (ms)':>15} {'speedup':>8}")
+    for workers in (1, 8, 32):
+        copying = run(CopyingOrder, args.aggregates, args.events, workers)
+        handing_over = run(Order, args.aggregates, args.events, workers)
+        print(
+            f"{workers:>8} {copying * 1000:>14.1f} {handing_over * 1000:>15.1f} "
+            f"{copying / handing_over:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Compare encoding and decoding of broker messages per envelope codec.
+
+Usage:
+    python -m benchmarks.envelope_codecs [--messages N]
+
+The legacy codec JSON-encodes the event into the Message and then the Message
+again, the other codecs encode everything in one pass.
+"""
+
+import argparse
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import List
+
+from fractal.core.event_sourcing.envelopes import (
+    BinaryEnvelopeCodec,
+    JsonEnvelopeCodec,
+    LegacyJsonEnvelopeCodec,
+)
+from fractal.core.event_sourcing.message import Message
+
+
+@dataclass
+class OrderPlacedEvent:
+    id: str
+    customer_id: str
+    lines: List[dict]
+    total: float
+    placed_on: datetime
+
+
+def make_message(i: int) -> Message:
+    event = OrderPlacedEvent(
+        id=f"order-{i}",
+        customer_id=f"customer-{i % 100}",
+        lines=[{"product_id": f"p{j}", "quantity": j, "price": 9.95} for j in range(5)],
+        total=248.75,
+        placed_on=datetime.now(timezone.utc),
+    )
+    return Message(
+        id=f"message-{i}",
+        occurred_on=datetime.now(timezone.utc),
+        event=event.__class__.__name__,
+        data=asdict(event),
+        object_id=event.id,
+        aggregate_root_id=event.id,
+    )
+
+
+def measure(codec, messages):
+    start = time.perf_counter()
+    bodies = [codec.encode(message) for message in messages]
+    encode = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for body in bodies:
+        codec.decode(body)
+    decode = time.perf_counter() - start
+
+    return encode, decode, sum(len(body) for body in bodies) / len(bodies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=50_000)
+    args = parser.parse_args()
+
+    messages = [make_message(i) for i in range(args.messages)]
+    print(
+        f"{'codec':>8} {'encode (msg/s)':>15} {'decode (msg/s)':>15} {'bytes/msg':>10}"
+    )
+    for name, codec in (
+        ("legacy", LegacyJsonEnvelopeCodec()),
+        ("json", JsonEnvelopeCodec()),
+        ("binary", BinaryEnvelopeCodec()),
+    ):
+        encode, decode, size = measure(codec, messages)
+        print(
+            f"{name:>8} {len(messages) / encode:>15.0f} "
+            f"{len(messages) / decode:>15.0f} {size:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Compare the generated event codecs with dataclasses.asdict and Event(**data).
+
+Usage:
+    python -m benchmarks.event_codecs [--events N]
+
+Note that `Event(**data)` doesn't restore nested dataclasses, datetimes, UUIDs
+or Decimals, the codec does. "by hand" restores them with hand-written code, which
+is what the generated decode functions should come close to.
+"""
+
+import argparse
+import json
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import List
+from uuid import UUID, uuid4
+
+from fractal.core.event_sourcing.codecs import get_event_codec
+from fractal.core.utils.json_encoder import EnhancedEncoder
+
+
+@dataclass
+class OrderLine:
+    product_id: UUID
+    quantity: int
+    price: Decimal
+
+
+@dataclass
+class OrderPlacedEvent:
+    id: str
+    customer_id: str
+    placed_on: datetime
+    lines: List[OrderLine]
+    total: Decimal
+
+
+def make_events(size: int) -> List[OrderPlacedEvent]:
+    return [
+        OrderPlacedEvent(
+            id=f"order-{i}",
+            customer_id=f"customer-{i % 100}",
+            placed_on=datetime.now(timezone.utc),
+            lines=[OrderLine(uuid4(), j, Decimal("9.95")) for j in range(5)],
+            total=Decimal("248.75"),
+        )
+        for i in range(size)
+    ]
+
+
+def decode_by_hand(data: dict) -> OrderPlacedEvent:
+    return OrderPlacedEvent(
+        id=data["id"],
+        customer_id=data["customer_id"],
+        placed_on=datetime.fromisoformat(data["placed_on"]),
+        lines=[
+            OrderLine(
+                UUID(line["product_id"]), line["quantity"], Decimal(line["price"])
+            )
+            for line in data["lines"]
+        ],
+        total=Decimal(data["total"]),
+    )
+
+
+def timed(func, values) -> float:
+    start = time.perf_counter()
+    for value in values:
+        func(value)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=20_000)
+    args = parser.parse_args()
+
+    events = make_events(args.events)
+    codec = get_event_codec(OrderPlacedEvent)
+    payloads = [
+        json.loads(json.dumps(asdict(event), cls=EnhancedEncoder)) for event in events
+    ]
+
+    encode = (timed(asdict, events), timed(codec.encode, events))
+    print(f"encode: asdict {encode[0]:.4f}s, codec {encode[1]:.4f}s")
+    decode = (
+        timed(lambda data: OrderPlacedEvent(**data), payloads),
+        timed(decode_by_hand, payloads),
+        timed(codec.decode, payloads),
+    )
+    print(
+        f"decode: **data {decode[0]:.4f}s (types not restored), "
+        f"by hand {decode[1]:.4f}s, codec {decode[2]:.4f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
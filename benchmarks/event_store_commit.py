@@ -0,0 +1,85 @@
+"""Compare per-event and batched EventStore commits.
+
+Usage:
+    python -m benchmarks.event_store_commit [--latency SECONDS]
+
+``--latency`` simulates a network round-trip for every repository write call,
+which is what makes per-event commits slow on remote stores like Firestore.
+"""
+
+import argparse
+import time
+from dataclasses import dataclass
+
+from fractal.core.event_sourcing.event import BasicSendingEvent
+from fractal.core.event_sourcing.event_store import (
+    InMemoryEventStoreRepository,
+    JsonEventStore,
+)
+from fractal.core.event_sourcing.event_stream import EventStream
+
+
+@dataclass
+class ProductRenamedEvent(BasicSendingEvent):
+    id: str
+    name: str
+
+    @property
+    def object_id(self):
+        return self.id
+
+    @property
+    def aggregate_root_id(self):
+        return self.id
+
+    @property
+    def aggregate_root_type(self):
+        return "Product"
+
+
+class RoundTripEventStoreRepository(InMemoryEventStoreRepository):
+    latency = 0.0
+
+    def add(self, entity):
+        time.sleep(self.latency)
+        return super().add(entity)
+
+    def add_many(self, messages):
+        time.sleep(self.latency)
+        return super().add_many(messages)
+
+
+def per_event(event_store, events):
+    for event in events:
+        event_store.commit(EventStream(events=[event]), "Product", None)
+
+
+def batched(event_store, events):
+    event_store.commit(EventStream(events=events), "Product", None)
+
+
+def run(commit, size, latency):
+    repository = RoundTripEventStoreRepository()
+    repository.latency = latency
+    event_store = JsonEventStore(repository, [ProductRenamedEvent])
+    events = [ProductRenamedEvent(id="1", name=f"name {i}") for i in range(size)]
+
+    start = time.perf_counter()
+    commit(event_store, events)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    print(f"{'events':>8} {'per-event (s)':>14} {'batched (s)':>12} {'speedup':>8}")
+    for size in (1, 100, 10_000):
+        slow = run(per_event, size, args.latency)
+        fast = run(batched, size, args.latency)
+        print(f"{size:>8} {slow:>14.4f} {fast:>12.4f} {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
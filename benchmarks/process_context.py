@@ -0,0 +1,80 @@
+"""Compare a long Process over a large ProcessContext, with merging the whole context
+after every action (as before) and with merging only the dirty keys.
+
+Usage:
+    python -m benchmarks.process_context [--actions 200]
+"""
+
+import argparse
+import time
+from dataclasses import dataclass
+
+from fractal.core.process.actions import IncreaseValueAction, SetContextVariableAction
+from fractal.core.process.process import Process
+from fractal.core.process.process_context import ProcessContext, _deep_merge
+
+
+@dataclass
+class Entity:
+    id: str
+    name: str
+
+
+class MergingProcessContext(ProcessContext):
+    def update(self, ctx: ProcessContext) -> ProcessContext:
+        _deep_merge(self._data, ctx._data)
+        return self
+
+
+def context(context_class, entities):
+    ctx = context_class(
+        {
+            "count": 0,
+            "entities": {
+                str(i): Entity(str(i), f"entity {i}") for i in range(entities)
+            },
+            "names": [f"entity {i}" for i in range(entities)],
+        }
+    )
+    ctx["settings"] = {f"setting{i}": {"enabled": True} for i in range(entities // 10)}
+    return ctx
+
+
+def run(context_class, entities, actions, rounds=5):
+    process = Process(
+        [
+            (
+                IncreaseValueAction(ctx_var="count", value=1)
+                if i % 2
+                else SetContextVariableAction(step=i)
+            )
+            for i in range(actions)
+        ]
+    )
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = process.run(context(context_class, entities))
+    assert result["count"] == actions // 2
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--actions", type=int, default=200)
+    args = parser.parse_args()
+
+    print(
+        f"{'entities':>9} {'full merge (ms)':>16} {'dirty keys (ms)':>16} {'speedup':>8}"
+    )
+    for entities in (1_000, 5_000, 20_000):
+        # Both include building the context, the same for both
+        full = run(MergingProcessContext, entities, args.actions)
+        dirty = run(ProcessContext, entities, args.actions)
+        print(
+            f"{entities:>9} {full * 1000:>16.1f} {dirty * 1000:>16.1f} "
+            f"{full / dirty:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
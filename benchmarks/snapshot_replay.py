@@ -0,0 +1,105 @@
+"""Compare loading an event sourced aggregate with and without snapshots.
+
+Usage:
+    python -m benchmarks.snapshot_replay
+"""
+
+import time
+from dataclasses import dataclass
+
+from fractal.core.event_sourcing.event import BasicSendingEvent
+from fractal.core.event_sourcing.event_store import (
+    InMemoryEventStoreRepository,
+    JsonEventStore,
+)
+from fractal.core.event_sourcing.models import EventSourcedAggregateRoot
+from fractal.core.event_sourcing.repositories import EventSourcedRepository
+from fractal.core.event_sourcing.snapshots import (
+    EveryNEventsSnapshotPolicy,
+    InMemorySnapshotRepository,
+    JsonSnapshotStore,
+)
+
+
+@dataclass
+class StockAdjustedEvent(BasicSendingEvent):
+    id: str
+    amount: int
+
+    @property
+    def object_id(self):
+        return self.id
+
+    @property
+    def aggregate_root_id(self):
+        return self.id
+
+    @property
+    def aggregate_root_type(self):
+        return Stock
+
+
+@dataclass
+class Stock(EventSourcedAggregateRoot):
+    id: str
+    amount: int = 0
+
+    def adjust(self, amount: int):
+        self.amount += amount
+        return self.record(StockAdjustedEvent(self.id, amount))
+
+    def apply(self, event: StockAdjustedEvent):
+        self.id = event.id
+        self.amount += event.amount
+
+
+class StockRepository(EventSourcedRepository[Stock]):
+    entity = Stock
+
+
+def build(size, snapshot_store=None):
+    repository = StockRepository(
+        JsonEventStore(InMemoryEventStoreRepository(), [StockAdjustedEvent]),
+        snapshot_store=snapshot_store,
+    )
+    stock = Stock("1")
+    # Commit in chunks of 100 and leave a tail of events after the last snapshot
+    for _ in range(size // 100):
+        for _ in range(100):
+            stock.adjust(1)
+        repository.add(stock)
+    for _ in range(250):
+        stock.adjust(1)
+    repository.add(stock)
+    return repository
+
+
+def load(repository, rounds=10):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        repository.get("1")
+    return (time.perf_counter() - start) / rounds
+
+
+def main():
+    print(
+        f"{'events':>8} {'full replay (ms)':>17} {'snapshot (ms)':>14} {'speedup':>8}"
+    )
+    for size in (1_000, 10_000, 50_000):
+        full = load(build(size))
+        snapshotted = load(
+            build(
+                size,
+                JsonSnapshotStore(
+                    InMemorySnapshotRepository(), EveryNEventsSnapshotPolicy(500)
+                ),
+            )
+        )
+        print(
+            f"{size:>8} {full * 1000:>17.2f} {snapshotted * 1000:>14.2f} "
+            f"{full / snapshotted:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,9 @@
-from fractal_repositories.contrib.gcp.firestore.mixins import FirestoreRepositoryMixin
+from typing import List
+
+from fractal_repositories.contrib.gcp.firestore.mixins import (
+    FirestoreClient,
+    FirestoreRepositoryMixin,
+)
 
 from fractal.core.event_sourcing.event_store import EventStoreRepository
 from fractal.core.event_sourcing.message import Message
@@ -7,4 +12,14 @@ from fractal.core.event_sourcing.message import Message
 class FirestoreEventStoreRepository(
     EventStoreRepository, FirestoreRepositoryMixin[Message]
 ):
-    pass
+    # Firestore accepts at most 500 writes per batch
+    batch_size = 500
+
+    def add_many(self, messages: List[Message]) -> List[Message]:
+        client = FirestoreClient().get_firestore_client()
+        for offset in range(0, len(messages), self.batch_size):
+            batch = client.batch()
+            for message in messages[offset : offset + self.batch_size]:
+                batch.set(self.collection.document(message.id), message.asdict())
+            batch.commit()
+        return messages
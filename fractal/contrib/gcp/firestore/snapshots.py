@@ -0,0 +1,9 @@
+from fractal_repositories.contrib.gcp.firestore.mixins import FirestoreRepositoryMixin
+
+from fractal.core.event_sourcing.snapshots import Snapshot, SnapshotRepository
+
+
+class FirestoreSnapshotRepository(
+    SnapshotRepository, FirestoreRepositoryMixin[Snapshot]
+):
+    pass
@@ -1,4 +1,3 @@
-import json
 import logging
 import threading
 from typing import List, Type
@@ -6,9 +5,9 @@ from typing import List, Type
 from google.cloud import pubsub_v1
 
 from fractal.core.command_bus.command_bus import CommandBus
+from fractal.core.event_sourcing.envelopes import get_envelope_codec
 from fractal.core.event_sourcing.event import ReceivingEvent
 from fractal.core.event_sourcing.event_bus import EventBus
-from fractal.core.event_sourcing.message import Message
 
 logger = logging.getLogger("api")
 
@@ -70,9 +69,11 @@ class PubSubEventBusListener:
         def callback(raw_message):
             logger.debug("Received message: {}".format(raw_message))
             try:
-                message_data = raw_message.data.decode()
-                message = Message(**json.loads(message_data))
-                event = self.event_class(**json.loads(message.data))
+                codec = get_envelope_codec(
+                    (raw_message.attributes or {}).get("content_type")
+                )
+                message = codec.decode(raw_message.data)
+                event = self.event_class(**message.data)
                 logger.debug("Received event: {}".format(event))
                 command = event.to_command()
                 if command:
@@ -0,0 +1,39 @@
+from collections import defaultdict
+from concurrent.futures import Future
+from typing import Dict, Iterable, List
+
+
+class Topic:
+    def __init__(self, name: str):
+        self.name = name
+
+
+class InMemoryPublisherClient:
+    """Stand-in for `pubsub_v1.PublisherClient`, to run projectors without GCP.
+
+    Published messages are kept per topic path in `messages`.
+    """
+
+    def __init__(self, topics: Iterable[str] = (), fail: bool = False):
+        self.topics = set(topics)
+        self.fail = fail
+        self.messages: Dict[str, List[bytes]] = defaultdict(list)
+        self.list_topics_calls = 0
+
+    @staticmethod
+    def topic_path(project: str, topic: str) -> str:
+        return f"projects/{project}/topics/{topic}"
+
+    def list_topics(self, request: dict) -> List[Topic]:
+        self.list_topics_calls += 1
+        prefix = f"{request['project']}/topics/"
+        return [Topic(t) for t in sorted(self.topics) if t.startswith(prefix)]
+
+    def publish(self, topic: str, data: bytes, **attrs) -> Future:
+        future = Future()
+        if self.fail:
+            future.set_exception(RuntimeError(f"Cannot publish to '{topic}'"))
+        else:
+            self.messages[topic].append(data)
+            future.set_result(str(sum(len(m) for m in self.messages.values())))
+        return future
@@ -1,15 +1,16 @@
-import json
 import logging
-from dataclasses import asdict
+import threading
+import time
+from concurrent import futures
 from datetime import datetime, timezone
 from json import JSONEncoder
-from typing import Optional, Type
-
-from google.cloud import pubsub_v1
+from typing import Any, Optional, Set, Type
 
+from fractal.core.event_sourcing.envelopes import EnvelopeCodec, LegacyJsonEnvelopeCodec
 from fractal.core.event_sourcing.event import BasicSendingEvent
 from fractal.core.event_sourcing.event_projector import EventProjector
 from fractal.core.event_sourcing.message import Message
+from fractal.core.event_sourcing.serialization import event_asdict
 from fractal.core.utils.json_encoder import EnhancedEncoder
 
 logger = logging.getLogger("api")
@@ -18,6 +19,13 @@ logger = logging.getLogger("api")
 class PubSubEventBusProjector(EventProjector):
     """
     https://cloud.google.com/pubsub/docs/quickstart-client-libraries#pubsub-client-libraries-python
+
+    Known topics are cached for `topic_cache_ttl` seconds.
+    With `wait_for_publish=False` publishing doesn't wait for the message id, the
+    futures are resolved in a callback; call `flush()` to wait for them.
+    `batch_settings` and `publisher_options` are passed to the PublisherClient,
+    or pass a `publisher` like `InMemoryPublisherClient` to run without GCP.
+    The `envelope_codec` (legacy JSON by default) is sent as content_type attribute.
     """
 
     def __init__(
@@ -25,12 +33,37 @@ class PubSubEventBusProjector(EventProjector):
         project_id: str,
         json_encoder: Optional[Type[JSONEncoder]] = EnhancedEncoder,
         topic: str = "",
+        topic_cache_ttl: float = 300,
+        wait_for_publish: bool = True,
+        batch_settings: Optional[Any] = None,
+        publisher_options: Optional[Any] = None,
+        publisher: Optional[Any] = None,
+        envelope_codec: Optional[EnvelopeCodec] = None,
     ):
         self.project_id = project_id
-        self.publisher = pubsub_v1.PublisherClient()
+        if publisher is None:
+            from google.cloud import pubsub_v1
+
+            kwargs = {}
+            if batch_settings is not None:
+                kwargs["batch_settings"] = batch_settings
+            if publisher_options is not None:
+                kwargs["publisher_options"] = publisher_options
+            publisher = pubsub_v1.PublisherClient(**kwargs)
+        self.publisher = publisher
         self.project_path = f"projects/{project_id}"
         self.json_encoder = json_encoder
+        self.envelope_codec = envelope_codec or LegacyJsonEnvelopeCodec(
+            json_encoder or EnhancedEncoder
+        )
         self.topic = topic
+        self.topic_cache_ttl = topic_cache_ttl
+        self.wait_for_publish = wait_for_publish
+        self._topics: Optional[Set[str]] = None
+        self._topics_listed_at = 0.0
+        self._futures: Set[futures.Future] = set()
+        self._lock = threading.Lock()
+        self.failed = 0
 
     def project(self, id: str, event: BasicSendingEvent):
         # The `topic_path` method creates a fully qualified identifier
@@ -38,10 +71,7 @@ class PubSubEventBusProjector(EventProjector):
         topic_path = self._topic_path(event)
 
         # Check if topic exists
-        if topic_path not in [
-            t.name
-            for t in self.publisher.list_topics(request={"project": self.project_path})
-        ]:
+        if not self._topic_exists(topic_path):
             logger.error(f"Topic doesn't exist '{topic_path}'")
 
         # Wrap event in a message
@@ -49,17 +79,58 @@ class PubSubEventBusProjector(EventProjector):
             id=id,
             occurred_on=datetime.now(timezone.utc),
             event=event.__class__.__name__,
-            data=json.dumps(asdict(event), cls=self.json_encoder),
+            data=event_asdict(event),
             object_id=event.object_id,
             aggregate_root_id=event.aggregate_root_id,
         )
 
         # Data must be a bytestring
-        data = json.dumps(asdict(message), cls=self.json_encoder).encode("utf-8")
+        data = self.envelope_codec.encode_event(message, event)
 
         # When you publish a message, the client returns a future.
-        future = self.publisher.publish(topic_path, data=data)
-        logger.debug(f"{data} sent to Google PubSub - message nr: {future.result()}")
+        future = self.publisher.publish(
+            topic_path, data=data, content_type=self.envelope_codec.content_type
+        )
+        if self.wait_for_publish:
+            logger.debug(
+                f"{data} sent to Google PubSub - message nr: {future.result()}"
+            )
+        else:
+            with self._lock:
+                self._futures.add(future)
+            future.add_done_callback(self._published)
+
+    def _published(self, future: futures.Future):
+        exception = future.exception()
+        with self._lock:
+            self._futures.discard(future)
+            if exception:
+                self.failed += 1
+        if exception:
+            logger.error(f"Publishing to Google PubSub failed: {exception}")
+        else:
+            logger.debug(f"Sent to Google PubSub - message nr: {future.result()}")
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all pending publishes are resolved, False on timeout."""
+        with self._lock:
+            pending = list(self._futures)
+        return not futures.wait(pending, timeout).not_done
+
+    def _topic_exists(self, topic_path: str) -> bool:
+        with self._lock:
+            if (
+                self._topics is None
+                or time.monotonic() - self._topics_listed_at >= self.topic_cache_ttl
+            ):
+                self._topics = {
+                    t.name
+                    for t in self.publisher.list_topics(
+                        request={"project": self.project_path}
+                    )
+                }
+                self._topics_listed_at = time.monotonic()
+            return topic_path in self._topics
 
     def _topic_path(self, event):
         if self.topic:
@@ -1,14 +1,15 @@
-import json
 import logging
 import threading
-from typing import List, Type
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Type
 
 from kafka import KafkaConsumer
+from kafka.errors import CommitFailedError
 
 from fractal.core.command_bus.command_bus import CommandBus
+from fractal.core.event_sourcing.envelopes import get_envelope_codec
 from fractal.core.event_sourcing.event import ReceivingEvent
 from fractal.core.event_sourcing.event_bus import EventBus
-from fractal.core.event_sourcing.message import Message
 
 logger = logging.getLogger("app")
 
@@ -25,6 +26,9 @@ class KafkaEventBus(EventBus):
         aggregate: str,
         event_classes: List[Type[ReceivingEvent]],
         use_thread=False,
+        group_id: Optional[str] = None,
+        topics: Optional[List[str]] = None,
+        **consumer_config,
     ):
         listener = KafkaEventBusListener(
             command_bus,
@@ -35,6 +39,9 @@ class KafkaEventBus(EventBus):
             service_name,
             aggregate,
             event_classes,
+            group_id=group_id,
+            topics=topics,
+            **consumer_config,
         )
         if use_thread:  # TODO should run in separate container
             thread = threading.Thread(target=listener.run)
@@ -45,6 +52,23 @@ class KafkaEventBus(EventBus):
 
 
 class KafkaEventBusListener:
+    """Consume the topics and handle the commands of the received events.
+
+    Records are polled in batches, the records of each partition are handled in
+    order by a worker of that partition, while partitions are handled concurrently.
+    With a `group_id` the consumer joins that consumer group and offsets are only
+    committed after the commands of the batch were handled. Run more consumers with
+    the same `group_id` to spread the partitions over them.
+
+    A failed command is retried `max_retries` times, waiting `retry_backoff_ms`
+    doubled per attempt (up to `max_retry_backoff_ms`). After that the record is
+    passed to `dead_letter_hook` with its error and skipped, so it doesn't block its
+    partition. Without `dead_letter_hook` nothing is skipped: the partition is
+    rewound to the failed record after `max_retry_backoff_ms`, so it's polled and
+    retried again until it succeeds. When the listener stops during a retry, the
+    partition is rewound to the failed record too.
+    """
+
     def __init__(
         self,
         command_bus: CommandBus,
@@ -55,23 +79,126 @@ class KafkaEventBusListener:
         service_name: str,
         aggregate: str,
         event_classes,
+        group_id: Optional[str] = None,
+        topics: Optional[List[str]] = None,
+        max_poll_records: int = 500,
+        poll_timeout_ms: int = 1000,
+        max_retries: int = 3,
+        retry_backoff_ms: int = 100,
+        max_retry_backoff_ms: int = 5000,
+        dead_letter_hook: Optional[Callable[[Any, Exception], None]] = None,
+        **consumer_config,
     ):
         self.command_bus = command_bus
         self.bootstrap_servers = f"{host}:{port}"
         self.event_classes = {i.__name__: i for i in event_classes}
         self.service_name = service_name
         self.aggregate = aggregate
+        self.group_id = group_id
+        self.topics = topics or [f"{service_name}.{aggregate}"]
+        self.max_poll_records = max_poll_records
+        self.poll_timeout_ms = poll_timeout_ms
+        self.max_retries = max_retries
+        self.retry_backoff_ms = retry_backoff_ms
+        self.max_retry_backoff_ms = max_retry_backoff_ms
+        self.dead_letter_hook = dead_letter_hook
+        self.consumer_config = consumer_config
+        self.workers: Dict[Any, ThreadPoolExecutor] = {}
+        self._stopped = threading.Event()
+
+    def handle(self, record) -> bool:
+        """Handle the command of the record, False when its event is not mapped."""
+        logger.debug(f"Received message: {record}")
+        headers = dict(record.headers or [])
+        content_type = headers.get("content-type", b"").decode() or None
+        message = get_envelope_codec(content_type).decode(record.value)
+        if message.event not in self.event_classes:
+            logger.warning(f"Skipping unmapped event '{message.event}'")
+            return False
+        event = self.event_classes[message.event](**message.data)
+        logger.debug(f"Received event: {event}")
+        command = event.to_command()
+        if command:
+            self.command_bus.handle(command)
+        return True
+
+    def _handle_with_retries(self, record) -> bool:
+        """Handle the record, False when it has to be handled again after a rewind."""
+        attempt = 0
+        while True:
+            try:
+                self.handle(record)
+                return True
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    location = (
+                        f"record {record.offset} of {record.topic}"
+                        f"[{record.partition}] after {attempt + 1} attempts"
+                    )
+                    if self.dead_letter_hook:
+                        logger.exception(f"Skipping {location}")
+                        self.dead_letter_hook(record, e)
+                        return True
+                    logger.exception(f"Rewinding to {location}")
+                    self._stopped.wait(self.max_retry_backoff_ms / 1000)
+                    return False
+                logger.warning(f"Retrying record {record.offset}: {e}")
+            backoff = min(self.retry_backoff_ms * 2**attempt, self.max_retry_backoff_ms)
+            attempt += 1
+            if self._stopped.wait(backoff / 1000):
+                return False
+
+    def _handle_partition(self, records) -> Optional[int]:
+        """Handle the records in order, returns the offset to rewind to, if any."""
+        for record in records:
+            if not self._handle_with_retries(record):
+                return record.offset
+        return None
+
+    def _worker(self, partition) -> ThreadPoolExecutor:
+        if partition not in self.workers:
+            self.workers[partition] = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=f"kafka-{partition.partition}"
+            )
+        return self.workers[partition]
+
+    def stop(self):
+        self._stopped.set()
 
     def run(self):
-        topic = f"{self.service_name}.{self.aggregate}"
-        logger.info(f"Listening to RabbitMq queue: {topic}")
-
-        consumer = KafkaConsumer(topic, bootstrap_servers=self.bootstrap_servers)
-        for message in consumer:
-            logger.info(f"Received message: {message}")
-            message = Message(**json.loads(message.value))
-            event = self.event_classes[message.event](**json.loads(message.data))
-            logger.info("Received event: {}".format(event))
-            command = event.to_command()
-            if command:
-                self.command_bus.handle(command)
+        logger.info(f"Listening to Kafka topics: {', '.join(self.topics)}")
+
+        consumer = KafkaConsumer(
+            *self.topics,
+            bootstrap_servers=self.bootstrap_servers,
+            group_id=self.group_id,
+            enable_auto_commit=False,
+            max_poll_records=self.max_poll_records,
+            **self.consumer_config,
+        )
+        try:
+            while not self._stopped.is_set():
+                batch = consumer.poll(timeout_ms=self.poll_timeout_ms)
+                if not batch:
+                    continue
+                futures = {
+                    partition: self._worker(partition).submit(
+                        self._handle_partition, records
+                    )
+                    for partition, records in batch.items()
+                }
+                for partition, future in futures.items():
+                    if (failed := future.result()) is not None:
+                        consumer.seek(partition, failed)
+                if self.group_id:
+                    # Commits the positions, so up to the rewound records if any
+                    try:
+                        consumer.commit()
+                    except CommitFailedError as e:
+                        # The partitions were reassigned, their new consumer
+                        # handles the records again from the last commit
+                        logger.warning(f"Commit failed: {e}")
+        finally:
+            for worker in self.workers.values():
+                worker.shutdown(wait=True)
+            consumer.close()
@@ -1,20 +1,33 @@
-import json
 import logging
-from dataclasses import asdict
+import threading
 from datetime import datetime, timezone
 from json import JSONEncoder
-from typing import List, Type
+from typing import List, Optional, Type
 
 from kafka import KafkaProducer
 
+from fractal.core.event_sourcing.envelopes import EnvelopeCodec, LegacyJsonEnvelopeCodec
 from fractal.core.event_sourcing.event import BasicSendingEvent
 from fractal.core.event_sourcing.event_projector import EventProjector
+from fractal.core.event_sourcing.event_stream import EventStream
 from fractal.core.event_sourcing.message import Message
+from fractal.core.event_sourcing.serialization import event_asdict
+from fractal.core.utils.json_encoder import EnhancedEncoder
 
 logger = logging.getLogger("app")
 
 
 class KafkaEventBusProjector(EventProjector):
+    """Send events to the `{service_name}.{aggregate}` topic.
+
+    One producer is kept per projector, so sends are batched by the producer
+    (see `linger_ms`, `batch_size` and `compression_type`). Events are keyed by their
+    aggregate id, so events of one aggregate land on one partition, in order.
+    The `envelope_codec` (legacy JSON by default) is announced in the content-type
+    header. Call `flush()` to wait until the buffered events are sent, `close()`
+    on shutdown.
+    """
+
     def __init__(
         self,
         host,
@@ -25,30 +38,81 @@ class KafkaEventBusProjector(EventProjector):
         aggregate: str,
         event_classes: List[Type[BasicSendingEvent]],
         json_encoder: Type[JSONEncoder] = None,
+        linger_ms: int = 5,
+        batch_size: int = 16384,
+        compression_type: Optional[str] = None,
+        envelope_codec: Optional[EnvelopeCodec] = None,
+        **producer_config,
     ):
         self.bootstrap_servers = f"{host}:{port}"
         self.event_classes = event_classes
         self.service_name = service_name
         self.aggregate = aggregate
         self.json_encoder = json_encoder
+        self.envelope_codec = envelope_codec or LegacyJsonEnvelopeCodec(
+            json_encoder or EnhancedEncoder
+        )
+        self.producer_config = dict(
+            linger_ms=linger_ms,
+            batch_size=batch_size,
+            compression_type=compression_type,
+            **producer_config,
+        )
+        self._producer: Optional[KafkaProducer] = None
+        self._lock = threading.Lock()
 
-    def project(self, id: str, event: BasicSendingEvent):
+    @property
+    def topic(self) -> str:
+        return f"{self.service_name}.{self.aggregate}"
+
+    @property
+    def producer(self) -> KafkaProducer:
+        if self._producer is None:
+            with self._lock:
+                if self._producer is None:
+                    self._producer = KafkaProducer(
+                        bootstrap_servers=self.bootstrap_servers,
+                        **self.producer_config,
+                    )
+        return self._producer
+
+    def _send(self, id: str, event: BasicSendingEvent) -> bool:
         if type(event) not in self.event_classes:
-            return
+            return False
 
         message = Message(
             id=id,
             occurred_on=datetime.now(timezone.utc),
             event=event.__class__.__name__,
-            data=json.dumps(asdict(event), cls=self.json_encoder),
+            data=event_asdict(event),
             object_id=event.object_id,
             aggregate_root_id=event.aggregate_root_id,
         )
 
-        producer = KafkaProducer(bootstrap_servers=self.bootstrap_servers)
-        producer.send(
-            f"{self.service_name}.{self.aggregate}",
-            json.dumps(asdict(message), cls=self.json_encoder).encode(),
+        self.producer.send(
+            self.topic,
+            key=str(message.aggregate_root_id).encode(),
+            value=self.envelope_codec.encode_event(message, event),
+            headers=[("content-type", self.envelope_codec.content_type.encode())],
         )
 
         logger.debug(f"Event sent to EventBus: '{message}'")
+        return True
+
+    def project(self, id: str, event: BasicSendingEvent):
+        self._send(id, event)
+
+    def project_many(self, event_stream: EventStream):
+        """Send all events of the stream and flush once."""
+        if any([self._send(event_stream.id, event) for event in event_stream.events]):
+            self.flush()
+
+    def flush(self, timeout: Optional[float] = None):
+        if self._producer is not None:
+            self._producer.flush(timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        with self._lock:
+            if self._producer is not None:
+                self._producer.close(timeout)
+                self._producer = None
@@ -0,0 +1,100 @@
+import threading
+from dataclasses import dataclass
+from typing import Callable, Optional, Set
+
+
+@dataclass
+class ListenerMetrics:
+    queue: str
+    in_flight: int = 0
+    processed: int = 0
+    failed: int = 0
+
+
+class DeliveryAcknowledger:
+    """Acknowledge deliveries of one channel that are processed on other threads.
+
+    Results are handed over to the connection thread, where succeeded deliveries
+    are acked in batches with `multiple=True`, up to the highest delivery tag below
+    which everything is processed. A batch is acked once it has `batch_size`
+    deliveries, or `max_delay` seconds after its first one. Failed deliveries are
+    nacked one by one, right away.
+
+    Only `add_callback_threadsafe` and `call_later` of the connection and
+    `basic_ack`/`basic_nack` of the channel are used, this module doesn't need pika.
+    """
+
+    def __init__(
+        self,
+        connection,
+        channel,
+        metrics: ListenerMetrics,
+        metrics_hook: Optional[Callable[[ListenerMetrics], None]] = None,
+        batch_size: int = 1,
+        max_delay: float = 0.05,
+    ):
+        self.connection = connection
+        self.channel = channel
+        self.metrics = metrics
+        self.metrics_hook = metrics_hook
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self._results = []
+        self._lock = threading.Lock()
+        self._completed: Set[int] = set()
+        self._succeeded: Set[int] = set()
+        self._acked = 0  # delivery tags up to here are acked, nacked or pending
+        self._pending_ack = 0  # highest delivery tag to ack with the next batch
+        self._pending = 0  # succeeded deliveries in the next batch
+        self._timer = False
+
+    def delivered(self):
+        with self._lock:
+            self.metrics.in_flight += 1
+
+    def done(self, delivery_tag: int, success: bool):
+        """Called from any thread when a delivery is processed."""
+        with self._lock:
+            self._results.append((delivery_tag, success))
+            schedule = len(self._results) == 1
+        if schedule:  # one callback handles all results that came in meanwhile
+            self.connection.add_callback_threadsafe(self._flush)
+
+    def _flush(self):
+        with self._lock:
+            results, self._results = self._results, []
+        for delivery_tag, success in results:
+            self._completed.add(delivery_tag)
+            if success:
+                self._succeeded.add(delivery_tag)
+            else:
+                self.channel.basic_nack(delivery_tag)
+
+        while self._acked + 1 in self._completed:
+            self._acked += 1
+            self._completed.remove(self._acked)
+            if self._acked in self._succeeded:
+                self._succeeded.remove(self._acked)
+                self._pending_ack = self._acked
+                self._pending += 1
+        if self._pending >= self.batch_size:
+            self._ack()
+        elif self._pending and not self._timer:
+            self._timer = True
+            self.connection.call_later(self.max_delay, self._ack_delayed)
+
+        with self._lock:
+            self.metrics.in_flight -= len(results)
+            self.metrics.failed += sum(1 for _, success in results if not success)
+            self.metrics.processed += sum(1 for _, success in results if success)
+        if self.metrics_hook:
+            self.metrics_hook(self.metrics)
+
+    def _ack(self):
+        if self._pending:
+            self.channel.basic_ack(self._pending_ack, multiple=True)
+            self._pending = 0
+
+    def _ack_delayed(self):
+        self._timer = False
+        self._ack()
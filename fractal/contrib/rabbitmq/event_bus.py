@@ -1,18 +1,26 @@
-import json
 import logging
 import threading
-from typing import List, Type
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Type
 
+from fractal.contrib.rabbitmq.acknowledger import DeliveryAcknowledger, ListenerMetrics
 from fractal.contrib.rabbitmq.utils import setup_rabbitmq_connection
 from fractal.core.command_bus.command_bus import CommandBus
+from fractal.core.event_sourcing.envelopes import get_envelope_codec
 from fractal.core.event_sourcing.event import ReceivingEvent
 from fractal.core.event_sourcing.event_bus import EventBus
-from fractal.core.event_sourcing.message import Message
 
 logger = logging.getLogger("app")
 
 
 class RabbitMqEventBus(EventBus):
+    """Declare and bind a queue per event class, and listen to them.
+
+    With `multiplex` all queues are consumed over one connection and thread, sharing
+    a pool of `max_workers` (by default one per queue), instead of a connection (and
+    thread) per queue with `max_workers` (by default one) each.
+    """
+
     def __init__(
         self,
         command_bus: CommandBus,
@@ -23,10 +31,15 @@ class RabbitMqEventBus(EventBus):
         service_name: str,
         event_classes: List[Type[ReceivingEvent]],
         use_thread=False,
+        prefetch_count: int = 10,
+        max_workers: Optional[int] = None,
+        metrics_hook: Optional[Callable[[ListenerMetrics], None]] = None,
+        multiplex: bool = False,
     ):
         self.connection, self.channel = setup_rabbitmq_connection(
             host, port, username, password
         )
+        queues = {}
         for event_class in event_classes:
             logger.info(
                 f"Declaring/binding RabbitMq queue: {service_name}_{event_class.__name__}"
@@ -39,6 +52,9 @@ class RabbitMqEventBus(EventBus):
                 exchange=event_class.__name__,
                 queue=queue.method.queue,
             )
+            if multiplex:
+                queues[queue.method.queue] = event_class
+                continue
             listener = RabbitMqEventBusListener(
                 command_bus,
                 host,
@@ -47,16 +63,46 @@ class RabbitMqEventBus(EventBus):
                 password,
                 event_class,
                 queue.method.queue,
+                prefetch_count=prefetch_count,
+                max_workers=max_workers or 1,
+                metrics_hook=metrics_hook,
+            )
+            self._run(listener, use_thread)
+
+        if multiplex:
+            self._run(
+                RabbitMqMultiplexedEventBusListener(
+                    command_bus,
+                    host,
+                    port,
+                    username,
+                    password,
+                    queues,
+                    prefetch_count=prefetch_count,
+                    max_workers=max_workers,
+                    metrics_hook=metrics_hook,
+                ),
+                use_thread,
             )
-            if use_thread:  # TODO should run in separate container
-                thread = threading.Thread(target=listener.run)
-                thread.setDaemon(True)
-                thread.start()
-            else:
-                listener.run()
+
+    @staticmethod
+    def _run(listener, use_thread: bool):
+        if use_thread:  # TODO should run in separate container
+            thread = threading.Thread(target=listener.run)
+            thread.setDaemon(True)
+            thread.start()
+        else:
+            listener.run()
 
 
 class RabbitMqEventBusListener:
+    """Consume a queue, handling the deliveries on a pool of `max_workers`.
+
+    Succeeded deliveries are acked in batches of `ack_batch_size` (by default half
+    the `prefetch_count`), or after `ack_max_delay` seconds, see
+    `DeliveryAcknowledger`.
+    """
+
     def __init__(
         self,
         command_bus: CommandBus,
@@ -66,6 +112,11 @@ class RabbitMqEventBusListener:
         password,
         event_class,
         queue,
+        prefetch_count: int = 10,
+        max_workers: int = 1,
+        metrics_hook: Optional[Callable[[ListenerMetrics], None]] = None,
+        ack_batch_size: Optional[int] = None,
+        ack_max_delay: float = 0.05,
     ):
         self.command_bus = command_bus
         self.host = host
@@ -74,29 +125,128 @@ class RabbitMqEventBusListener:
         self.password = password
         self.event_class = event_class
         self.queue = queue
+        self.prefetch_count = prefetch_count
+        self.max_workers = max_workers
+        self.metrics_hook = metrics_hook
+        self.metrics = ListenerMetrics(queue=queue)
+        self.ack_batch_size = ack_batch_size or max(prefetch_count // 2, 1)
+        self.ack_max_delay = ack_max_delay
+
+    def handle(self, body: bytes, content_type: Optional[str] = None) -> bool:
+        try:
+            message = get_envelope_codec(content_type).decode(body)
+            event = self.event_class(**message.data)
+            logger.debug("Received event: {}".format(event))
+            command = event.to_command()
+            if command:
+                self.command_bus.handle(command)
+            return True
+        except Exception as e:
+            logger.exception(e)
+            return False
 
     def run(self):
-        logger.info(f"Listening to RabbitMq queue: {self.queue}")
+        """Consume the queue, handling up to `max_workers` deliveries concurrently.
+
+        Acks are sent from the connection thread, pika channels are not thread-safe.
+        """
         connection, channel = setup_rabbitmq_connection(
             self.host, self.port, self.username, self.password
         )
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix=f"rabbitmq-{self.queue}"
+        )
+        self.consume(connection, channel, executor)
+
+        try:
+            channel.start_consuming()
+        finally:
+            executor.shutdown(wait=True)
+            connection.close()
+
+    def consume(self, connection, channel, executor: Executor):
+        """Start consuming the queue on the channel, handling deliveries in executor."""
+        logger.info(f"Listening to RabbitMq queue: {self.queue}")
+        channel.basic_qos(prefetch_count=self.prefetch_count)
+        acknowledger = DeliveryAcknowledger(
+            connection,
+            channel,
+            self.metrics,
+            self.metrics_hook,
+            batch_size=self.ack_batch_size,
+            max_delay=self.ack_max_delay,
+        )
+
+        def process(delivery_tag, body, content_type):
+            acknowledger.done(delivery_tag, self.handle(body, content_type))
 
         def callback(_ch, _method, _properties, body):
-            try:
-                message = Message(**json.loads(body))
-                event = self.event_class(**json.loads(message.data))
-                logger.debug("Received event: {}".format(event))
-                command = event.to_command()
-                if command:
-                    self.command_bus.handle(command)
-                _ch.basic_ack(_method.delivery_tag)
-            except Exception as e:
-                logger.exception(e)
-                _ch.basic_nack(_method.delivery_tag)
+            acknowledger.delivered()
+            executor.submit(
+                process, _method.delivery_tag, body, _properties.content_type
+            )
 
         channel.basic_consume(self.queue, callback)
 
+
+class RabbitMqMultiplexedEventBusListener:
+    """Consume several queues over one connection, with one channel per queue.
+
+    A single thread runs the I/O loop of the connection, deliveries of all queues
+    are handled by one shared pool of `max_workers`, by default one per queue.
+    """
+
+    def __init__(
+        self,
+        command_bus: CommandBus,
+        host,
+        port,
+        username,
+        password,
+        queues: Dict[str, Type[ReceivingEvent]],
+        prefetch_count: int = 10,
+        max_workers: Optional[int] = None,
+        metrics_hook: Optional[Callable[[ListenerMetrics], None]] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.max_workers = max_workers or max(len(queues), 1)
+        self.listeners = [
+            RabbitMqEventBusListener(
+                command_bus,
+                host,
+                port,
+                username,
+                password,
+                event_class,
+                queue,
+                prefetch_count=prefetch_count,
+                metrics_hook=metrics_hook,
+            )
+            for queue, event_class in queues.items()
+        ]
+        self._stopped = threading.Event()
+
+    def stop(self):
+        self._stopped.set()
+
+    def run(self):
+        connection, channel = setup_rabbitmq_connection(
+            self.host, self.port, self.username, self.password
+        )
+        executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="rabbitmq"
+        )
+        for i, listener in enumerate(self.listeners):
+            listener.consume(
+                connection, channel if i == 0 else connection.channel(), executor
+            )
+
         try:
-            channel.start_consuming()
+            while not self._stopped.is_set():
+                connection.process_data_events(time_limit=1)
         finally:
+            executor.shutdown(wait=True)
             connection.close()
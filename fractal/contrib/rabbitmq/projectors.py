@@ -1,21 +1,34 @@
-import json
 import logging
-from dataclasses import asdict
 from datetime import datetime, timezone
 from json import JSONEncoder
-from typing import List, Type
+from typing import List, Optional, Tuple, Type
 
 import pika
+from pika.exceptions import AMQPChannelError, AMQPConnectionError
 
-from fractal.contrib.rabbitmq.utils import setup_rabbitmq_connection
+from fractal.contrib.rabbitmq.utils import RabbitMqChannelPool
+from fractal.core.event_sourcing.envelopes import EnvelopeCodec, LegacyJsonEnvelopeCodec
 from fractal.core.event_sourcing.event import BasicSendingEvent
 from fractal.core.event_sourcing.event_projector import EventProjector
+from fractal.core.event_sourcing.event_stream import EventStream
 from fractal.core.event_sourcing.message import Message
+from fractal.core.event_sourcing.serialization import event_asdict
+from fractal.core.utils.json_encoder import EnhancedEncoder
 
 logger = logging.getLogger("app")
 
 
 class RabbitMqEventBusProjector(EventProjector):
+    """Publish events to a fanout exchange per event class.
+
+    Channels come from a pool of `pool_size`, so the projector can be shared between
+    threads, and broken connections are replaced. A publish that failed on a broken
+    connection is retried once on a new one.
+    With `confirm` every `project` and `project_many` call waits once until the
+    broker took all its messages, `project_many` publishes a whole stream.
+    The `envelope_codec` (legacy JSON by default) is set as content type.
+    """
+
     def __init__(
         self,
         host,
@@ -25,36 +38,72 @@ class RabbitMqEventBusProjector(EventProjector):
         service_name: str,
         event_classes: List[Type[BasicSendingEvent]],
         json_encoder: Type[JSONEncoder] = None,
+        pool_size: int = 4,
+        confirm: bool = False,
+        envelope_codec: Optional[EnvelopeCodec] = None,
     ):
-        self.connection, self.channel = setup_rabbitmq_connection(
-            host, port, username, password
+        self.pool = RabbitMqChannelPool(
+            host, port, username, password, size=pool_size, transactional=confirm
         )
         self.service_name = service_name
         self.json_encoder = json_encoder
-        for klass in event_classes:
-            logger.info(f"Declaring RabbitMq exchange: {klass.__name__}")
-            self.channel.exchange_declare(  # TODO remove, should be in infra
-                exchange=klass.__name__,
-                exchange_type="fanout",
-                durable=True,
-            )
+        self.envelope_codec = envelope_codec or LegacyJsonEnvelopeCodec(
+            json_encoder or EnhancedEncoder
+        )
+        self.confirm = confirm
+        with self.pool.channel() as channel:
+            for klass in event_classes:
+                logger.info(f"Declaring RabbitMq exchange: {klass.__name__}")
+                channel.exchange_declare(  # TODO remove, should be in infra
+                    exchange=klass.__name__,
+                    exchange_type="fanout",
+                    durable=True,
+                )
+            if confirm:
+                channel.tx_commit()
 
-    def project(self, id: str, event: BasicSendingEvent):
+    def _message(self, id: str, event: BasicSendingEvent) -> Tuple[Message, bytes]:
         message = Message(
             id=id,
             occurred_on=datetime.now(timezone.utc),
             event=event.__class__.__name__,
-            data=json.dumps(asdict(event), cls=self.json_encoder),
+            data=event_asdict(event),
             object_id=event.object_id,
             aggregate_root_id=event.aggregate_root_id,
         )
+        return message, self.envelope_codec.encode_event(message, event)
+
+    def _publish(self, messages: List[Tuple[Message, bytes]]):
+        with self.pool.channel() as channel:
+            for message, body in messages:
+                channel.basic_publish(
+                    exchange=message.event,
+                    routing_key="",
+                    body=body,
+                    properties=pika.BasicProperties(
+                        content_type=self.envelope_codec.content_type, delivery_mode=1
+                    ),
+                )
+            if self.confirm:
+                channel.tx_commit()
+        for message, _ in messages:
+            logger.debug(f"Event sent to EventBus: '{message}'")
 
-        self.channel.basic_publish(
-            exchange=message.event,
-            routing_key="",
-            body=json.dumps(asdict(message), cls=self.json_encoder).encode(),
-            properties=pika.BasicProperties(
-                content_type="application/json", delivery_mode=1
-            ),
+    def _publish_with_retry(self, messages: List[Tuple[Message, bytes]]):
+        try:
+            self._publish(messages)
+        except (AMQPConnectionError, AMQPChannelError) as e:
+            logger.warning(f"Publishing to RabbitMq failed, reconnecting: {e}")
+            self._publish(messages)
+
+    def project(self, id: str, event: BasicSendingEvent):
+        self._publish_with_retry([self._message(id, event)])
+
+    def project_many(self, event_stream: EventStream):
+        """Publish all events of the stream on one channel, with one confirm wait."""
+        self._publish_with_retry(
+            [self._message(event_stream.id, event) for event in event_stream.events]
         )
-        logger.debug(f"Event sent to EventBus: '{message}'")
+
+    def close(self):
+        self.pool.close()
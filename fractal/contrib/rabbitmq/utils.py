@@ -1,8 +1,15 @@
-from typing import Tuple
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Tuple
 
 import pika
 from pika import BlockingConnection, PlainCredentials
 from pika.adapters.blocking_connection import BlockingChannel
+from pika.exceptions import AMQPChannelError, AMQPConnectionError
+
+logger = logging.getLogger("app")
 
 
 def setup_rabbitmq_connection(
@@ -20,3 +27,89 @@ def setup_rabbitmq_connection(
     )
     channel = connection.channel()
     return connection, channel
+
+
+class RabbitMqChannelPool:
+    """Pool of channels, each with its own connection, to share between threads.
+
+    Pika connections are not thread-safe, a channel is used by one thread at a time.
+    Connections are opened lazily, up to `size`. A channel that failed is closed
+    and replaced by a new connection the next time, so the pool reconnects.
+    A connection error closes the idle connections too, as idle blocking connections
+    don't service heartbeats and are likely broken as well, so a retry reconnects.
+    With `transactional` the channels are in transaction mode, `tx_commit()` waits
+    once until the broker took everything published on the channel.
+    """
+
+    def __init__(self, host, port, username, password, size=4, transactional=False):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.transactional = transactional
+        self._idle: "queue.LifoQueue[Tuple[BlockingConnection, BlockingChannel]]" = (
+            queue.LifoQueue()
+        )
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+
+    def _connect(self) -> Tuple[BlockingConnection, BlockingChannel]:
+        connection, channel = setup_rabbitmq_connection(
+            self.host, self.port, self.username, self.password
+        )
+        if self.transactional:
+            channel.tx_select()
+        return connection, channel
+
+    @staticmethod
+    def _discard(connection: BlockingConnection):
+        try:
+            if connection.is_open:
+                connection.close()
+        except Exception as e:  # already broken
+            logger.debug(f"Closing broken RabbitMq connection failed: {e}")
+
+    @contextmanager
+    def channel(self) -> Iterator[BlockingChannel]:
+        if self._closed:
+            raise RuntimeError("Cannot use a closed RabbitMqChannelPool")
+        self._slots.acquire()
+        try:
+            try:
+                connection, channel = self._idle.get_nowait()
+            except queue.Empty:
+                connection, channel = self._connect()
+            if not channel.is_open:
+                self._discard(connection)
+                connection, channel = self._connect()
+            try:
+                yield channel
+            except AMQPConnectionError:
+                self._discard(connection)
+                self._discard_idle()
+                raise
+            except AMQPChannelError:
+                self._discard(connection)
+                raise
+            except Exception:
+                if self.transactional and channel.is_open:
+                    channel.tx_rollback()
+                self._idle.put((connection, channel))
+                raise
+            else:
+                self._idle.put((connection, channel))
+        finally:
+            self._slots.release()
+
+    def _discard_idle(self):
+        while True:
+            try:
+                connection, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._discard(connection)
+
+    def close(self):
+        self._closed = True
+        self._discard_idle()
@@ -0,0 +1,219 @@
+import dataclasses
+import enum
+import threading
+import typing
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Callable, Dict, Type
+from uuid import UUID
+
+
+class EventCodec:
+    """Encode a dataclass (usually an event) to a dict, and decode it back.
+
+    `encode` gives the same dict as `dataclasses.asdict` for typed fields, without
+    deep-copying the leaf values. `decode` restores nested dataclasses, datetimes,
+    dates, times, UUIDs, Decimals and enums, also from the strings `EnhancedEncoder`
+    turns them into. Both functions are generated from the type hints of the class,
+    get the codec of a class with `get_event_codec`. A nested dataclass field holding
+    a subclass of its type is encoded with all fields of the subclass, and decoded as
+    a dict again, like `Event(**data)` would.
+    """
+
+    def __init__(self, cls: type):
+        self.cls = cls
+        self.encode: Callable[[Any], Dict[str, Any]] = None
+        self.decode: Callable[[Dict[str, Any]], Any] = None
+
+
+_codecs: Dict[type, EventCodec] = {}
+_lock = threading.RLock()
+
+
+def get_event_codec(cls: Type) -> EventCodec:
+    """The codec of the dataclass, generated on first use."""
+    try:
+        return _codecs[cls]
+    except KeyError:
+        pass
+    with _lock:
+        if cls not in _codecs:
+            if not dataclasses.is_dataclass(cls):
+                raise TypeError(f"Cannot generate a codec for '{cls.__name__}'")
+            codec = EventCodec(cls)
+            # Registered before generating, so recursive types find it
+            _codecs[cls] = codec
+            try:
+                _Generator(codec).generate()
+            except Exception:
+                del _codecs[cls]
+                raise
+        return _codecs[cls]
+
+
+def _decimal(value):
+    return Decimal(value if isinstance(value, str) else str(value))
+
+
+def _encode_any(value):
+    """Fallback for untyped values, like `dataclasses.asdict` without deep copies."""
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return get_event_codec(value.__class__).encode(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return type(value)(_encode_any(v) for v in value)
+    if isinstance(value, dict):
+        return {k: _encode_any(v) for k, v in value.items()}
+    return value
+
+
+# Values of these types are encoded as strings by EnhancedEncoder
+_LEAF_DECODERS = {
+    datetime: datetime.fromisoformat,
+    date: date.fromisoformat,
+    time: time.fromisoformat,
+    UUID: UUID,
+    Decimal: _decimal,
+}
+_SEQUENCES = {
+    list: "[{}]",
+    typing.List: "[{}]",
+    typing.Sequence: "[{}]",
+    tuple: "tuple([{}])",
+    typing.Tuple: "tuple([{}])",
+    set: "{{{}}}",
+    typing.Set: "{{{}}}",
+    frozenset: "frozenset({{{}}})",
+    typing.FrozenSet: "frozenset({{{}}})",
+}
+_MAPPINGS = (dict, typing.Dict, typing.Mapping)
+
+
+class _Generator:
+    """Generates the source of the encode/decode functions and compiles them."""
+
+    def __init__(self, codec: EventCodec):
+        self.codec = codec
+        self.namespace: Dict[str, Any] = {"_cls": codec.cls, "_encode_any": _encode_any}
+        self.variables = 0
+
+    def _name(self, value: Any, prefix: str) -> str:
+        name = f"_{prefix}{len(self.namespace)}"
+        self.namespace[name] = value
+        return name
+
+    def _variable(self) -> str:
+        self.variables += 1
+        return f"v{self.variables}"
+
+    def _convert(self, tp: Any, expr: str, decode: bool) -> str:
+        """Expression converting `expr` of type `tp`, or None when it is None.
+
+        Fields like `tags: List[str] = None` are not annotated Optional, but may be
+        None all the same, like `dataclasses.asdict` and `cls(**data)` allow.
+        """
+        converted = self._convert_value(tp, expr, decode)
+        if converted in (expr, f"_encode_any({expr})"):
+            return converted
+        return f"(None if {expr} is None else {converted})"
+
+    def _convert_value(self, tp: Any, expr: str, decode: bool) -> str:
+        origin = typing.get_origin(tp)
+        args = typing.get_args(tp)
+
+        if origin is typing.Union:
+            options = [a for a in args if a is not type(None)]  # noqa: E721
+            if len(options) == 1 and len(args) == 2:
+                return self._convert_value(options[0], expr, decode)
+            return expr if decode else f"_encode_any({expr})"
+
+        if origin in _SEQUENCES or tp in _SEQUENCES:
+            item = args[0] if args and args[0] is not Ellipsis else Any
+            if origin in (tuple, typing.Tuple) and not (
+                len(args) == 2 and args[1] is Ellipsis
+            ):
+                item = Any  # fixed length tuples are kept as they are
+            v = self._variable()
+            template = _SEQUENCES[origin or tp]
+            if decode and origin in (tuple, typing.Tuple) and item is Any:
+                return f"tuple({expr})"
+            return template.format(
+                f"{self._convert(item, v, decode)} for {v} in {expr}"
+            )
+
+        if origin in _MAPPINGS or tp in _MAPPINGS:
+            key, value = args if args else (Any, Any)
+            k, v = self._variable(), self._variable()
+            return (
+                f"{{{self._convert(key, k, decode)}: {self._convert(value, v, decode)}"
+                f" for {k}, {v} in {expr}.items()}}"
+            )
+
+        if isinstance(tp, type):
+            if dataclasses.is_dataclass(tp):
+                codec = get_event_codec(tp)
+                function = codec.decode if decode else codec.encode
+                if function is None:  # recursive, still being generated
+                    name = f"{self._name(codec, 'codec')}.{'decode' if decode else 'encode'}"
+                else:
+                    name = self._name(function, "decode" if decode else "encode")
+                if decode:
+                    # Data of a subclass, with fields `tp` doesn't have, is kept as is
+                    fields = self._name(
+                        frozenset(f.name for f in dataclasses.fields(tp) if f.init),
+                        "fields",
+                    )
+                    return f"({name}({expr}) if {expr}.keys() <= {fields} else {expr})"
+                # Values of a subclass are encoded with the codec of their own class
+                return f"({name}({expr}) if {expr}.__class__ is {self._name(tp, 'type')} else _encode_any({expr}))"
+            if not decode:
+                return expr
+            if tp in _LEAF_DECODERS:
+                decoder = self._name(_LEAF_DECODERS[tp], "decode")
+                return f"({expr} if {expr}.__class__ is {self._name(tp, 'type')} else {decoder}({expr}))"
+            if issubclass(tp, enum.Enum):
+                return f"{self._name(tp, 'enum')}({expr})"
+            return expr
+
+        # Any, TypeVars, unresolved forward references, ...
+        return expr if decode else f"_encode_any({expr})"
+
+    def _type_hints(self) -> Dict[str, Any]:
+        try:
+            return typing.get_type_hints(self.codec.cls)
+        except (NameError, TypeError):
+            return {}
+
+    def generate(self):
+        cls = self.codec.cls
+        hints = self._type_hints()
+        fields = dataclasses.fields(cls)
+
+        items = [
+            f"{f.name!r}: {self._convert(hints.get(f.name, Any), f'obj.{f.name}', False)}"
+            for f in fields
+        ]
+        encode = ["def encode(obj):", f"    return {{{', '.join(items)}}}"]
+
+        arguments, optional = [], []
+        for f in fields:
+            if not f.init:
+                continue
+            value = self._convert(hints.get(f.name, Any), f"data[{f.name!r}]", True)
+            if (
+                f.default is dataclasses.MISSING
+                and f.default_factory is dataclasses.MISSING
+            ):
+                arguments.append(f"{f.name}={value}")
+            else:  # left to the default when missing
+                optional.append(f"    if {f.name!r} in data:")
+                optional.append(f"        kwargs[{f.name!r}] = {value}")
+        if optional:
+            decode = ["def decode(data):", "    kwargs = {}", *optional]
+            arguments.append("**kwargs")
+        else:
+            decode = ["def decode(data):"]
+        decode.append(f"    return _cls({', '.join(arguments)})")
+
+        exec("\n".join(encode + decode), self.namespace)
+        self.codec.encode = self.namespace["encode"]
+        self.codec.decode = self.namespace["decode"]
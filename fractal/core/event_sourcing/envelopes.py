@@ -0,0 +1,191 @@
+import json
+import struct
+from abc import ABC, abstractmethod
+from datetime import datetime
+from json import JSONEncoder
+from typing import Any, Dict, Hashable, Optional, Type
+
+from fractal.core.event_sourcing.message import Message
+from fractal.core.event_sourcing.serialization import event_asdict, serialize
+from fractal.core.utils.json_encoder import EnhancedEncoder
+
+
+def _datetime(value) -> datetime:
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+class EnvelopeCodec(ABC):
+    """Encode a Message, with the event as a dict in `data`, to send it to a broker.
+
+    The `content_type` is sent along (as header, property or attribute), so the
+    receiving side can pick the matching codec with `get_envelope_codec`.
+    """
+
+    content_type: str
+
+    def __init__(self, json_encoder: Optional[Type[JSONEncoder]] = EnhancedEncoder):
+        self.json_encoder = json_encoder
+
+    @property
+    def cache_key(self) -> Hashable:
+        """Codecs with the same key encode the data of a message the same way."""
+        return self.__class__, self.json_encoder
+
+    def encode_data(self, data: Any) -> Any:
+        """Encode the event part of the message, as used by `encode`."""
+        return json.dumps(data, cls=self.json_encoder, separators=(",", ":"))
+
+    @abstractmethod
+    def encode(self, message: Message, encoded_data: Any = None) -> bytes:
+        """Encode the message, with its data already encoded when `encoded_data`."""
+        raise NotImplementedError
+
+    def encode_event(self, message: Message, event: Any) -> bytes:
+        """Encode the message of the event, the event is encoded once per publish."""
+        return self.encode(
+            message,
+            serialize(
+                event, self.cache_key, lambda e: self.encode_data(event_asdict(e))
+            ),
+        )
+
+    @abstractmethod
+    def decode(self, body: bytes) -> Message:
+        raise NotImplementedError
+
+
+class LegacyJsonEnvelopeCodec(EnvelopeCodec):
+    """The event encoded as JSON string in the JSON encoded Message.
+
+    The stream version is left out, as consumers of this format don't expect it,
+    decoded messages get the default version.
+    """
+
+    content_type = "application/json"
+
+    def encode_data(self, data: Any) -> str:
+        return json.dumps(data, cls=self.json_encoder)
+
+    def encode(self, message: Message, encoded_data: Any = None) -> bytes:
+        if encoded_data is None:
+            encoded_data = self.encode_data(message.data)
+        return json.dumps(
+            {
+                "id": message.id,
+                "occurred_on": message.occurred_on,
+                "event": message.event,
+                "data": encoded_data,
+                "object_id": message.object_id,
+                "aggregate_root_id": message.aggregate_root_id,
+            },
+            cls=self.json_encoder,
+        ).encode()
+
+    def decode(self, body: bytes) -> Message:
+        envelope = json.loads(body)
+        envelope["data"] = json.loads(envelope["data"])
+        envelope["occurred_on"] = _datetime(envelope["occurred_on"])
+        return Message(**envelope)
+
+
+class JsonEnvelopeCodec(EnvelopeCodec):
+    """The Message and the event in it encoded as JSON in one pass."""
+
+    content_type = "application/vnd.fractal.envelope+json"
+
+    def encode(self, message: Message, encoded_data: Any = None) -> bytes:
+        if encoded_data is None:
+            encoded_data = self.encode_data(message.data)
+        header = json.dumps(
+            {
+                "id": message.id,
+                "occurred_on": message.occurred_on,
+                "event": message.event,
+                "object_id": message.object_id,
+                "aggregate_root_id": message.aggregate_root_id,
+                "version": message.version,
+            },
+            cls=self.json_encoder,
+            separators=(",", ":"),
+        )
+        # The data is spliced in, so it can be encoded once for several messages
+        return f'{header[:-1]},"data":{encoded_data}}}'.encode()
+
+    def decode(self, body: bytes) -> Message:
+        envelope = json.loads(body)
+        envelope["occurred_on"] = _datetime(envelope["occurred_on"])
+        return Message(**envelope)
+
+
+class BinaryEnvelopeCodec(EnvelopeCodec):
+    """Length-prefixed header fields followed by the event as JSON.
+
+    Layout: a fixed size prefix with the format version, the stream version and the
+    lengths of the header fields, then the header fields (id, occurred_on, event,
+    object_id, aggregate_root_id), then the payload. Decoding the header doesn't
+    need a JSON parser.
+    """
+
+    content_type = "application/vnd.fractal.envelope+binary"
+    format_version = 1
+
+    _prefix = struct.Struct(">BI5H")
+
+    def encode_data(self, data: Any) -> bytes:
+        return json.dumps(data, cls=self.json_encoder, separators=(",", ":")).encode()
+
+    def encode(self, message: Message, encoded_data: Any = None) -> bytes:
+        if encoded_data is None:
+            encoded_data = self.encode_data(message.data)
+        fields = (
+            message.id.encode(),
+            message.occurred_on.isoformat().encode(),
+            message.event.encode(),
+            str(message.object_id).encode(),
+            str(message.aggregate_root_id).encode(),
+        )
+        return b"".join(
+            (
+                self._prefix.pack(
+                    self.format_version, message.version, *map(len, fields)
+                ),
+                *fields,
+                encoded_data,
+            )
+        )
+
+    def decode(self, body: bytes) -> Message:
+        format_version, version, *lengths = self._prefix.unpack_from(body)
+        if format_version != self.format_version:
+            raise ValueError(f"Unknown binary envelope version {format_version}")
+        fields = []
+        offset = self._prefix.size
+        for length in lengths:
+            fields.append(body[offset : offset + length].decode())
+            offset += length
+        id, occurred_on, event, object_id, aggregate_root_id = fields
+        return Message(
+            id=id,
+            occurred_on=datetime.fromisoformat(occurred_on),
+            event=event,
+            data=json.loads(body[offset:]),
+            object_id=object_id,
+            aggregate_root_id=aggregate_root_id,
+            version=version,
+        )
+
+
+ENVELOPE_CODECS: Dict[str, EnvelopeCodec] = {
+    codec.content_type: codec
+    for codec in (LegacyJsonEnvelopeCodec(), JsonEnvelopeCodec(), BinaryEnvelopeCodec())
+}
+
+
+def get_envelope_codec(content_type: Optional[str] = None) -> EnvelopeCodec:
+    """The codec for the content type, messages without one are legacy JSON."""
+    if not content_type:
+        return ENVELOPE_CODECS[LegacyJsonEnvelopeCodec.content_type]
+    try:
+        return ENVELOPE_CODECS[content_type.split(";")[0].strip()]
+    except KeyError:
+        raise ValueError(f"Unknown envelope content type '{content_type}'")
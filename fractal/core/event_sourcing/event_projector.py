@@ -1,9 +1,23 @@
 from abc import ABC, abstractmethod
 
 from fractal.core.event_sourcing.event import BasicSendingEvent
+from fractal.core.utils.event_loop import run_coroutine
 
 
 class EventProjector(ABC):
     @abstractmethod
     def project(self, id: str, event: BasicSendingEvent):
         """Project the event, usually onto/into something defined in the constructor."""
+
+
+class AsyncEventProjector(EventProjector, ABC):
+    """Projector that can be awaited, see `EventPublisher.publish_events_async`."""
+
+    @abstractmethod
+    async def project_async(self, id: str, event: BasicSendingEvent):
+        """Project the event without blocking the event loop."""
+
+    def project(self, id: str, event: BasicSendingEvent):
+        """Sync wrapper, allows async projectors to be used by sync publishers,
+        also from within a running event loop."""
+        return run_coroutine(self.project_async(id, event))
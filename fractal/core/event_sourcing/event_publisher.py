@@ -1,13 +1,29 @@
-from typing import List
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor
+from typing import Callable, List, Optional
 
 from fractal.core.event_sourcing.event import BasicSendingEvent
-from fractal.core.event_sourcing.event_projector import EventProjector
+from fractal.core.event_sourcing.event_projector import (
+    AsyncEventProjector,
+    EventProjector,
+)
 from fractal.core.event_sourcing.event_stream import EventStream
+from fractal.core.event_sourcing.serialization import serialization_cache
+
+logger = logging.getLogger("app")
 
 
 class EventPublisher:
-    def __init__(self, projectors: List[EventProjector]):
+    def __init__(
+        self, projectors: List[EventProjector], executor: Optional[Executor] = None
+    ):
         self.projectors = projectors
+        self.executor = executor  # for sync projectors when publishing async
 
     def publish_event(self, event: BasicSendingEvent):
         self._publish(
@@ -26,6 +42,233 @@ class EventPublisher:
         )
 
     def _publish(self, event_stream: EventStream):
-        for event in event_stream.events:
-            for projector in self.projectors:
-                projector.project(event_stream.id, event)
+        with serialization_cache():
+            for event in event_stream.events:
+                for projector in self.projectors:
+                    projector.project(event_stream.id, event)
+
+    async def publish_event_async(self, event: BasicSendingEvent):
+        await self._publish_async(
+            EventStream(
+                events=[
+                    event,
+                ]
+            )
+        )
+
+    async def publish_events_async(self, events: List[BasicSendingEvent]):
+        await self._publish_async(
+            EventStream(
+                events=events,
+            )
+        )
+
+    async def _publish_async(self, event_stream: EventStream):
+        """Project each event on all projectors concurrently, event after event.
+
+        Async projectors are awaited, sync projectors run in `self.executor`
+        (the default executor of the loop when None).
+        """
+        loop = asyncio.get_running_loop()
+        with serialization_cache():
+            for event in event_stream.events:
+                await asyncio.gather(
+                    *[
+                        (
+                            projector.project_async(event_stream.id, event)
+                            if isinstance(projector, AsyncEventProjector)
+                            else loop.run_in_executor(
+                                self.executor,
+                                # Executor threads don't see the serialization cache
+                                contextvars.copy_context().run,
+                                projector.project,
+                                event_stream.id,
+                                event,
+                            )
+                        )
+                        for projector in self.projectors
+                    ]
+                )
+
+
+OverflowSink = Callable[[EventProjector, str, BasicSendingEvent], None]
+
+
+class ProjectorWorker:
+    """Bounded queue with a thread that feeds its events to one projector, in order."""
+
+    def __init__(
+        self,
+        projector: EventProjector,
+        maxsize: int,
+        backpressure: str,
+        overflow: Optional[OverflowSink] = None,
+    ):
+        self.projector = projector
+        self.maxsize = maxsize
+        self.backpressure = backpressure
+        self.overflow = overflow
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.pending = 0  # queued and in progress
+        self.dropped = 0
+        self.spilled = 0
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def put(
+        self,
+        id: str,
+        event: BasicSendingEvent,
+        context: Optional[contextvars.Context] = None,
+    ) -> bool:
+        """Queue the event, to be projected in `context` (like a serialization cache).
+
+        False when the queue was full and the event was dropped or spilled.
+        """
+        spill = False
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("Cannot publish on a closed EventPublisher")
+            if len(self.queue) >= self.maxsize:
+                if self.backpressure == QueuedEventPublisher.DROP:
+                    self.dropped += 1
+                    logger.warning(
+                        f"Queue of {self.projector.__class__.__name__} is full, "
+                        f"dropped event: {event}"
+                    )
+                    return False
+                elif self.backpressure == QueuedEventPublisher.SPILL:
+                    self.spilled += 1
+                    spill = True
+                else:
+                    self.condition.wait_for(
+                        lambda: len(self.queue) < self.maxsize or self.closed
+                    )
+                    if self.closed:
+                        raise RuntimeError("Cannot publish on a closed EventPublisher")
+            if not spill:
+                self.queue.append((id, event, context))
+                self.pending += 1
+                self.condition.notify_all()
+                return True
+        # Outside the lock, a slow sink doesn't hold up the worker
+        self.overflow(self.projector, id, event)
+        return False
+
+    def _run(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.queue or self.closed)
+                if not self.queue:
+                    return
+                id, event, context = self.queue.popleft()
+                self.condition.notify_all()
+            try:
+                if context is None:
+                    self.projector.project(id, event)
+                else:
+                    context.run(self.projector.project, id, event)
+            except Exception as e:
+                logger.exception(e)
+            finally:
+                with self.condition:
+                    self.pending -= 1
+                    self.condition.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        with self.condition:
+            return self.condition.wait_for(lambda: self.pending == 0, timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join(timeout)
+
+
+class QueuedEventPublisher(EventPublisher):
+    """Publish events through a bounded queue and worker thread(s) per projector.
+
+    A slow projector no longer blocks the publishing thread, nor the other projectors.
+    Events of the same aggregate always go to the same worker, so they stay in order.
+
+    When a queue is full, `backpressure` decides:
+    - BLOCK: wait until the worker made room (default)
+    - DROP: discard the event for that projector and log a warning
+    - SPILL: pass the event to `overflow(projector, id, event)`, like a store to
+      project it from later, it's no longer in order with the queued events
+
+    Call `flush()` to wait until all queued events are projected, and `close()`
+    on shutdown to drain the queues and stop the workers.
+    """
+
+    BLOCK = "block"
+    DROP = "drop"
+    SPILL = "spill"
+
+    def __init__(
+        self,
+        projectors: List[EventProjector],
+        maxsize: int = 1000,
+        backpressure: str = BLOCK,
+        workers_per_projector: int = 1,
+        overflow: Optional[OverflowSink] = None,
+    ):
+        if backpressure not in (self.BLOCK, self.DROP, self.SPILL):
+            raise ValueError(f"Unknown backpressure '{backpressure}'")
+        if backpressure == self.SPILL and overflow is None:
+            raise ValueError("SPILL backpressure needs an overflow sink")
+        super(QueuedEventPublisher, self).__init__(projectors)
+        self.workers = [
+            [
+                ProjectorWorker(projector, maxsize, backpressure, overflow)
+                for _ in range(workers_per_projector)
+            ]
+            for projector in projectors
+        ]
+
+    def _publish(self, event_stream: EventStream):
+        with serialization_cache():
+            for event in event_stream.events:
+                partition = hash(str(getattr(event, "aggregate_root_id", "")))
+                for workers in self.workers:
+                    # The worker threads share the serialization cache through a
+                    # copy of this context, one per event as a context runs once
+                    workers[partition % len(workers)].put(
+                        event_stream.id, event, contextvars.copy_context()
+                    )
+
+    async def _publish_async(self, event_stream: EventStream):
+        # Putting on a full queue may block, with BLOCK backpressure
+        await asyncio.get_running_loop().run_in_executor(
+            self.executor, self._publish, event_stream
+        )
+
+    def _all_workers(self) -> List[ProjectorWorker]:
+        return [worker for workers in self.workers for worker in workers]
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all queued events are projected, False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for worker in self._all_workers():
+            remaining = (
+                None if deadline is None else max(deadline - time.monotonic(), 0)
+            )
+            if not worker.flush(remaining):
+                return False
+        return True
+
+    def close(self, timeout: Optional[float] = None):
+        """Project what is still queued and stop the workers."""
+        for worker in self._all_workers():
+            worker.close(timeout)
+
+    @property
+    def dropped(self) -> int:
+        return sum(worker.dropped for worker in self._all_workers())
+
+    @property
+    def spilled(self) -> int:
+        return sum(worker.spilled for worker in self._all_workers())
@@ -1,20 +1,45 @@
+import bisect
+import threading
 import uuid
 from abc import ABC, abstractmethod
-from dataclasses import asdict
+from collections import defaultdict
 from datetime import datetime, timezone
+from itertools import count, islice
 from json import JSONEncoder
-from typing import List, Optional, Type
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Type
 
 from fractal_repositories.core.repositories import Repository
 from fractal_repositories.mixins.inmemory_repository_mixin import (
     InMemoryRepositoryMixin,
 )
+from fractal_specifications.generic.collections import AndSpecification
+from fractal_specifications.generic.operators import (
+    EqualsSpecification,
+    FieldValueSpecification,
+    GreaterThanEqualSpecification,
+    GreaterThanSpecification,
+    InSpecification,
+    LessThanEqualSpecification,
+    LessThanSpecification,
+)
 from fractal_specifications.generic.specification import Specification
 
+from fractal.core.event_sourcing.codecs import get_event_codec
 from fractal.core.event_sourcing.event import BasicSendingEvent
 from fractal.core.event_sourcing.event_stream import EventStream
 from fractal.core.event_sourcing.message import Message
+from fractal.core.event_sourcing.serialization import event_asdict, serialize
 from fractal.core.exceptions import DomainException
+from fractal.core.utils.json_codecs import JsonCodec, get_json_codec
+
+# The default pre_processor, values of specifications with another one can't be looked up
+_no_pre_processor = FieldValueSpecification.__init__.__defaults__[0]
+_RANGES = (
+    GreaterThanSpecification,
+    GreaterThanEqualSpecification,
+    LessThanSpecification,
+    LessThanEqualSpecification,
+)
 
 
 class EventNotMappedError(DomainException):
@@ -27,15 +52,39 @@ class EventNotMappedError(DomainException):
         )
 
 
+class ConcurrencyError(DomainException):
+    code = "CONCURRENCY_ERROR"
+    status_code = 409
+
+    def __init__(self, aggregate_root_id: str, version: int, current_version: int):
+        super(ConcurrencyError, self).__init__(
+            f"Cannot commit version {version} of '{aggregate_root_id}', "
+            f"the EventStore is at version {current_version}.",
+        )
+
+
 class EventStore(ABC):
     @abstractmethod
-    def commit(self, event_stream: EventStream, aggregate: str, version: int):
+    def commit(self, event_stream: EventStream, aggregate: str, version: Optional[int]):
+        """Commit the events, `version` is the version the first event of each
+        aggregate in the stream should get. Use None to skip the concurrency check."""
         raise NotImplementedError
 
     @abstractmethod
     def get_event_stream(self) -> EventStream:
         raise NotImplementedError
 
+    def get_event_stream_for(
+        self, aggregate_root_id: str, from_version: int = 1
+    ) -> EventStream:
+        raise NotImplementedError
+
+    def iter_events(
+        self, specification: Optional[Specification] = None, batch_size: int = 1000
+    ) -> Iterator[BasicSendingEvent]:
+        """Iterate over the events page by page, instead of loading them all at once."""
+        raise NotImplementedError
+
     @abstractmethod
     def is_healthy(self) -> bool:
         raise NotImplementedError
@@ -45,11 +94,305 @@ class EventStoreRepository(Repository[Message], ABC):
     entity = Message
     order_by = "occurred_on"
 
+    def add_many(self, messages: List[Message]) -> List[Message]:
+        """Write all messages in one go, override to use a native batch write."""
+        for message in messages:
+            self.add(message)
+        return messages
+
+    def append(
+        self, messages: List[Message], version: Optional[int] = None
+    ) -> List[Message]:
+        """Number the messages per aggregate, continuing its stream, and write them.
+
+        When `version` is given, the first message of every aggregate must get exactly
+        that version, otherwise ConcurrencyError is raised and nothing is written.
+        This check is not atomic, override to do it within a transaction.
+        """
+        next_versions: Dict[str, int] = {}
+        for message in messages:
+            if message.aggregate_root_id not in next_versions:
+                current_version = self.get_version(message.aggregate_root_id)
+                if version is not None and version != current_version + 1:
+                    raise ConcurrencyError(
+                        message.aggregate_root_id, version, current_version
+                    )
+                next_versions[message.aggregate_root_id] = current_version + 1
+            message.version = next_versions[message.aggregate_root_id]
+            next_versions[message.aggregate_root_id] += 1
+        return self.add_many(messages)
+
+    def get_version(self, aggregate_root_id: str) -> int:
+        for message in self.find(
+            EqualsSpecification("aggregate_root_id", aggregate_root_id),
+            limit=1,
+            order_by="-version",
+        ):
+            return message.version
+        return 0
+
+    def iter_messages(
+        self, specification: Optional[Specification] = None, batch_size: int = 1000
+    ) -> Iterator[Message]:
+        """Iterate in (occurred_on, id) order, page by page.
+
+        Pages continue after the occurred_on of the previous page (keyset paging),
+        instead of skipping an offset, so earlier pages aren't read again. Messages
+        sharing the occurred_on at the end of a page are read together, so none is
+        skipped or read twice.
+        """
+
+        def key(message: Message):
+            return message.occurred_on, message.id
+
+        def where(condition: Specification) -> Specification:
+            return specification & condition if specification else condition
+
+        last = None
+        while True:
+            page = (
+                where(GreaterThanSpecification("occurred_on", last)) if last else None
+            )
+            messages = list(
+                self.find(
+                    page if last else specification,
+                    limit=batch_size,
+                    order_by="occurred_on",
+                )
+            )
+            if len(messages) < batch_size:
+                yield from sorted(messages, key=key)
+                return
+            last = messages[-1].occurred_on
+            yield from sorted((m for m in messages if m.occurred_on != last), key=key)
+            yield from sorted(
+                self.find(where(EqualsSpecification("occurred_on", last))), key=key
+            )
+
+    def find_stream(
+        self, aggregate_root_id: str, from_version: int = 1
+    ) -> Iterator[Message]:
+        specification = EqualsSpecification("aggregate_root_id", aggregate_root_id)
+        if from_version > 1:
+            specification &= GreaterThanEqualSpecification("version", from_version)
+        return self.find(specification, order_by="version")
+
+
+def _insert_by_version(stream: List[Message], message: Message):
+    """Insert the message after the messages with a lower or equal version."""
+    if not stream or stream[-1].version <= message.version:
+        stream.append(message)
+        return
+    low, high = 0, len(stream)
+    while low < high:
+        middle = (low + high) // 2
+        if stream[middle].version <= message.version:
+            low = middle + 1
+        else:
+            high = middle
+    stream.insert(low, message)
+
 
 class InMemoryEventStoreRepository(
     EventStoreRepository, InMemoryRepositoryMixin[Message]
 ):
-    pass
+    """Keeps indexes on aggregate_root_id, object_id, event and occurred_on.
+
+    Specifications on an indexed field (equals and in, or a range on occurred_on),
+    also within an `AndSpecification`, only evaluate the messages from the index.
+    Finding in occurred_on order walks the occurred_on index, so pages are read
+    without sorting all messages.
+    """
+
+    _indexed_fields = ("aggregate_root_id", "object_id", "event")
+
+    def __init__(self, *args, **kwargs):
+        super(InMemoryEventStoreRepository, self).__init__(*args, **kwargs)
+        self.streams: Dict[str, List[Message]] = defaultdict(list)
+        self._object_ids: Dict[Any, Dict[str, Message]] = defaultdict(dict)
+        self._events: Dict[str, Dict[str, Message]] = defaultdict(dict)
+        # Sorted by occurred_on, the keys are kept apart for bisect
+        self._occurred_on: List[datetime] = []
+        self._by_occurred_on: List[Message] = []
+        # Order of indexing per message id, orders messages occurred at the same time
+        self._sequence: Dict[str, int] = {}
+        self._counter = count()
+        # Serializes appends and swaps, the mixin has no lock in all versions
+        self._append_lock = threading.RLock()
+
+    def _index(self, message: Message):
+        if current := self.entities.get(message.id):
+            self._unindex(current)
+        _insert_by_version(self.streams[message.aggregate_root_id], message)
+        self._object_ids[message.object_id][message.id] = message
+        self._events[message.event][message.id] = message
+        self._sequence[message.id] = next(self._counter)
+        position = bisect.bisect_right(self._occurred_on, message.occurred_on)
+        self._occurred_on.insert(position, message.occurred_on)
+        self._by_occurred_on.insert(position, message)
+
+    def _unindex(self, message: Message):
+        self.streams[message.aggregate_root_id].remove(message)
+        self._object_ids[message.object_id].pop(message.id, None)
+        self._events[message.event].pop(message.id, None)
+        position = bisect.bisect_left(self._occurred_on, message.occurred_on)
+        while self._by_occurred_on[position] is not message:
+            position += 1
+        del self._occurred_on[position]
+        del self._by_occurred_on[position]
+        del self._sequence[message.id]
+
+    def _lookup(self, field: str, values: Iterable[Any]) -> List[Message]:
+        if field == "aggregate_root_id":
+            index = self.streams
+        elif field == "object_id":
+            index = self._object_ids
+        else:
+            index = self._events
+        messages = []
+        for value in values:
+            if entries := index.get(value):
+                messages.extend(
+                    entries if isinstance(entries, list) else entries.values()
+                )
+        return messages
+
+    def _range(self, specification: FieldValueSpecification) -> List[Message]:
+        value = specification.value
+        if type(specification) is EqualsSpecification:
+            return self._by_occurred_on[
+                bisect.bisect_left(self._occurred_on, value) : bisect.bisect_right(
+                    self._occurred_on, value
+                )
+            ]
+        if isinstance(specification, GreaterThanSpecification):
+            return self._by_occurred_on[bisect.bisect_right(self._occurred_on, value) :]
+        if isinstance(specification, GreaterThanEqualSpecification):
+            return self._by_occurred_on[bisect.bisect_left(self._occurred_on, value) :]
+        if isinstance(specification, LessThanSpecification):
+            return self._by_occurred_on[: bisect.bisect_left(self._occurred_on, value)]
+        return self._by_occurred_on[: bisect.bisect_right(self._occurred_on, value)]
+
+    def _candidates(self, specification: Specification) -> Optional[List[Message]]:
+        """The indexed messages that can satisfy the specification, None when all can.
+
+        The candidates are a superset, the specification still has to be checked.
+        """
+        if type(specification) is AndSpecification:
+            candidates = None
+            for child in specification.specifications:
+                messages = self._candidates(child)
+                if messages is not None and (
+                    candidates is None or len(messages) < len(candidates)
+                ):
+                    candidates = messages
+            return candidates
+        if (
+            not isinstance(specification, FieldValueSpecification)
+            or specification.pre_processor is not _no_pre_processor
+        ):
+            return None
+        field = specification.field
+        try:
+            if field in self._indexed_fields:
+                if type(specification) is EqualsSpecification:
+                    return self._lookup(field, [specification.value])
+                if type(specification) is InSpecification:
+                    return self._lookup(field, set(specification.value))
+            elif field == "occurred_on" and type(specification) in (
+                EqualsSpecification,
+                *_RANGES,
+            ):
+                return self._range(specification)
+        except TypeError:  # unhashable or incomparable values, scan them all
+            pass
+        return None
+
+    def add(self, entity: Message) -> Message:
+        self._index(entity)
+        return super(InMemoryEventStoreRepository, self).add(entity)
+
+    def add_many(self, messages: List[Message]) -> List[Message]:
+        for message in messages:
+            self._index(message)
+            self.entities[message.id] = message
+        return messages
+
+    def compare_and_swap(self, entity: Message, *, expected: Specification) -> bool:
+        with self._append_lock:
+            current = self.entities.get(entity.id)
+            if current is None or not expected.is_satisfied_by(current):
+                return False
+            self._index(entity)
+            self.entities[entity.id] = entity
+            return True
+
+    def remove_one(self, specification: Specification):
+        if message := self.find_one(specification):
+            self._unindex(message)
+            del self.entities[message.id]
+
+    def _filter_entities(
+        self, specification: Specification, entities: Iterator[Message]
+    ) -> List[Message]:
+        candidates = self._candidates(specification)
+        return super(InMemoryEventStoreRepository, self)._filter_entities(
+            specification, entities if candidates is None else candidates
+        )
+
+    def find_one(self, specification: Specification) -> Message:
+        candidates = self._candidates(specification)
+        for message in self._get_entities if candidates is None else candidates:
+            if specification.is_satisfied_by(message):
+                return message
+        raise self._object_not_found()
+
+    def find(
+        self,
+        specification: Optional[Specification] = None,
+        *,
+        offset: int = 0,
+        limit: int = 0,
+        order_by: str = "",
+    ) -> Iterator[Message]:
+        if (order_by or self.order_by) != "occurred_on":
+            yield from super(InMemoryEventStoreRepository, self).find(
+                specification, offset=offset, limit=limit, order_by=order_by
+            )
+            return
+        candidates = self._candidates(specification) if specification else None
+        if candidates is None:
+            messages = self._by_occurred_on
+        else:
+            sequence = self._sequence
+            messages = sorted(candidates, key=lambda m: (m.occurred_on, sequence[m.id]))
+        if specification:
+            messages = filter(specification.is_satisfied_by, messages)
+        if limit:
+            messages = islice(messages, offset, offset + limit)
+        yield from list(messages)
+
+    def append(
+        self, messages: List[Message], version: Optional[int] = None
+    ) -> List[Message]:
+        with self._append_lock:
+            return super(InMemoryEventStoreRepository, self).append(messages, version)
+
+    def get_version(self, aggregate_root_id: str) -> int:
+        if stream := self.streams.get(aggregate_root_id):
+            return stream[-1].version
+        return 0
+
+    def find_stream(
+        self, aggregate_root_id: str, from_version: int = 1
+    ) -> Iterator[Message]:
+        stream = self.streams.get(aggregate_root_id, [])
+        # Streams written through append() hold version n at position n - 1
+        if stream and stream[-1].version == len(stream):
+            stream = stream[max(from_version - 1, 0) :]
+        for message in stream:
+            if message.version >= from_version:
+                yield message
 
 
 class BasicEventStore(EventStore, ABC):
@@ -59,30 +402,61 @@ class BasicEventStore(EventStore, ABC):
     def is_healthy(self) -> bool:
         return self.event_store_repository.is_healthy()
 
+    @staticmethod
+    def _message(event: BasicSendingEvent, data: Any) -> Message:
+        return Message(
+            id=str(uuid.uuid4()),
+            occurred_on=datetime.now(timezone.utc),
+            event=event.__class__.__name__,
+            data=data,
+            object_id=event.object_id,
+            aggregate_root_id=event.aggregate_root_id,
+        )
 
-class ObjectEventStore(BasicEventStore):
-    def commit(self, event_stream: EventStream, aggregate: str, version: int):
-        for event in event_stream.events:
-            self.event_store_repository.add(
-                Message(
-                    id=str(uuid.uuid4()),
-                    occurred_on=datetime.now(timezone.utc),
-                    event=event.__class__.__name__,
-                    data=event,
-                    object_id=event.object_id,
-                    aggregate_root_id=event.aggregate_root_id,
-                )
-            )
+    def load_event(self, message: Message) -> BasicSendingEvent:
+        raise NotImplementedError
 
     def get_event_stream(
         self, specification: Optional[Specification] = None
     ) -> EventStream:
         return EventStream(
-            events=list(
-                map(lambda m: m.data, self.event_store_repository.find(specification))
-            )
+            events=[
+                self.load_event(m)
+                for m in self.event_store_repository.find(specification)
+            ]
+        )
+
+    def iter_events(
+        self, specification: Optional[Specification] = None, batch_size: int = 1000
+    ) -> Iterator[BasicSendingEvent]:
+        for message in self.event_store_repository.iter_messages(
+            specification, batch_size
+        ):
+            yield self.load_event(message)
+
+    def get_event_stream_for(
+        self, aggregate_root_id: str, from_version: int = 1
+    ) -> EventStream:
+        return EventStream(
+            events=[
+                self.load_event(m)
+                for m in self.event_store_repository.find_stream(
+                    aggregate_root_id, from_version
+                )
+            ]
+        )
+
+
+class ObjectEventStore(BasicEventStore):
+    def commit(self, event_stream: EventStream, aggregate: str, version: Optional[int]):
+        return self.event_store_repository.append(
+            [self._message(event, event) for event in event_stream.events],
+            version,
         )
 
+    def load_event(self, message: Message) -> BasicSendingEvent:
+        return message.data
+
 
 class DictEventStore(BasicEventStore):
     def __init__(
@@ -93,69 +467,59 @@ class DictEventStore(BasicEventStore):
         super(DictEventStore, self).__init__(event_store_repository)
         self.events = {e.__name__: e for e in events}
 
-    def commit(self, event_stream: EventStream, aggregate: str, version: int):
-        for event in event_stream.events:
-            self.event_store_repository.add(
-                Message(
-                    id=str(uuid.uuid4()),
-                    occurred_on=datetime.now(timezone.utc),
-                    event=event.__class__.__name__,
-                    data=asdict(event),
-                    object_id=event.object_id,
-                    aggregate_root_id=event.aggregate_root_id,
-                )
-            )
+    def commit(self, event_stream: EventStream, aggregate: str, version: Optional[int]):
+        return self.event_store_repository.append(
+            [
+                self._message(event, event_asdict(event))
+                for event in event_stream.events
+            ],
+            version,
+        )
 
-    def get_event_stream(
-        self, specification: Optional[Specification] = None
-    ) -> EventStream:
-        events = []
-        for m in self.event_store_repository.find(specification):
-            if event := self.events.get(m.event, None):
-                events.append(event(**m.data))
-            else:
-                raise EventNotMappedError(m.event)
-        return EventStream(events=events)
+    def load_event(self, message: Message) -> BasicSendingEvent:
+        if event := self.events.get(message.event, None):
+            return get_event_codec(event).decode(message.data)
+        raise EventNotMappedError(message.event)
 
 
 class JsonEventStore(BasicEventStore):
+    """Store events as JSON, with the fastest JSON codec available by default.
+
+    With `as_bytes` the JSON is stored as bytes, for repositories storing binary
+    data, so it's not converted between str and bytes.
+    """
+
     def __init__(
         self,
         event_store_repository: EventStoreRepository,
         events: List[Type[BasicSendingEvent]],
         json_encoder: Optional[Type[JSONEncoder]] = None,
+        json_codec: Optional[JsonCodec] = None,
+        as_bytes: bool = False,
     ):
         super(JsonEventStore, self).__init__(event_store_repository)
         self.events = {e.__name__: e for e in events}
         self.json_encoder = json_encoder
+        self.json_codec = json_codec or get_json_codec(json_encoder, as_bytes)
 
-    def commit(self, event_stream: EventStream, aggregate: str, version: int):
-        import json
-
-        for event in event_stream.events:
-            self.event_store_repository.add(
-                Message(
-                    id=str(uuid.uuid4()),
-                    occurred_on=datetime.now(timezone.utc),
-                    event=event.__class__.__name__,
-                    data=json.dumps(asdict(event), cls=self.json_encoder),
-                    object_id=event.object_id,
-                    aggregate_root_id=event.aggregate_root_id,
-                )
-            )
+    def _dumps(self, event: BasicSendingEvent):
+        return self.json_codec.dumps(event_asdict(event))
 
-    def get_event_stream(
-        self, specification: Optional[Specification] = None
-    ) -> EventStream:
-        import json
+    def commit(self, event_stream: EventStream, aggregate: str, version: Optional[int]):
+        return self.event_store_repository.append(
+            [
+                self._message(
+                    event, serialize(event, self.json_codec.cache_key, self._dumps)
+                )
+                for event in event_stream.events
+            ],
+            version,
+        )
 
-        events = []
-        for m in self.event_store_repository.find(specification):
-            if event := self.events.get(m.event, None):
-                events.append(event(**json.loads(m.data)))
-            else:
-                raise EventNotMappedError(m.event)
-        return EventStream(events=events)
+    def load_event(self, message: Message) -> BasicSendingEvent:
+        if event := self.events.get(message.event, None):
+            return get_event_codec(event).decode(self.json_codec.loads(message.data))
+        raise EventNotMappedError(message.event)
 
 
 class PickleEventStore(BasicEventStore):
@@ -167,27 +531,18 @@ class PickleEventStore(BasicEventStore):
         super(PickleEventStore, self).__init__(event_store_repository)
         self.events = {e.__name__: e for e in events}
 
-    def commit(self, event_stream: EventStream, aggregate: str, version: int):
+    def commit(self, event_stream: EventStream, aggregate: str, version: Optional[int]):
         import pickle
 
-        for event in event_stream.events:
-            self.event_store_repository.add(
-                Message(
-                    id=str(uuid.uuid4()),
-                    occurred_on=datetime.now(timezone.utc),
-                    event=event.__class__.__name__,
-                    data=pickle.dumps(event),
-                    object_id=event.object_id,
-                    aggregate_root_id=event.aggregate_root_id,
-                )
-            )
+        return self.event_store_repository.append(
+            [
+                self._message(event, pickle.dumps(event))
+                for event in event_stream.events
+            ],
+            version,
+        )
 
-    def get_event_stream(
-        self, specification: Optional[Specification] = None
-    ) -> EventStream:
+    def load_event(self, message: Message) -> BasicSendingEvent:
         import pickle
 
-        events = []
-        for m in self.event_store_repository.find(specification):
-            events.append(pickle.loads(m.data))
-        return EventStream(events=events)
+        return pickle.loads(message.data)
@@ -13,3 +13,4 @@ class Message(Entity):
     data: Any
     object_id: str
     aggregate_root_id: str
+    version: int = 0
@@ -1,17 +1,88 @@
-from copy import deepcopy
-from typing import List
+from typing import Callable, Dict, Iterable, List, Type
 
 from fractal.core.event_sourcing.event import Event
 
 
+def applies(*event_classes: Type[Event]):
+    """Mark a method of an EventSourcedAggregateRoot as the apply method of events.
+
+    The method is called with each replayed event of the given classes.
+    """
+
+    def decorator(function):
+        function.applies_to = event_classes
+        return function
+
+    return decorator
+
+
 class EventSourcedAggregateRoot:
-    __events: List[Event] = []
+    """Aggregate that records the events of its changes, to commit them later.
+
+    Every instance buffers its own events, also instances that are not constructed
+    through `__init__`, like dataclasses or aggregates loaded from the EventStore.
+    Methods decorated with `applies` rebuild the state from the events, the event
+    class to method table is built once per class. Overrides of these methods apply
+    the same events unless they are decorated again, an override that is not a
+    method (like `None`) stops applying them.
+    """
+
+    __stream_version: int = 0
+    _apply_dispatch: Dict[Type[Event], Callable] = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # An override without `applies` keeps the events of the method it overrides
+        applied = {}
+        for klass in reversed(cls.__mro__):
+            for name, method in vars(klass).items():
+                if event_classes := getattr(method, "applies_to", None):
+                    applied[name] = (method, event_classes)
+                elif name in applied:
+                    if callable(method):
+                        applied[name] = (method, applied[name][1])
+                    else:
+                        del applied[name]
+        cls._apply_dispatch = {
+            event_class: method
+            for method, event_classes in applied.values()
+            for event_class in event_classes
+        }
+
+    @property
+    def stream_version(self) -> int:
+        """Version of the last event of this aggregate in the EventStore."""
+        return self.__stream_version
+
+    @stream_version.setter
+    def stream_version(self, version: int):
+        self.__stream_version = version
+
+    def apply(self, event: Event):
+        """Apply a stored event to the state, needed to load the aggregate."""
+        if method := self._apply_dispatch.get(event.__class__):
+            return method(self, event)
+        raise NotImplementedError(
+            f"'{self.__class__.__name__}' cannot apply '{event.__class__.__name__}'"
+        )
+
+    def replay(self, events: Iterable[Event]):
+        """Apply the events in order, through the apply methods of their class."""
+        dispatch = self._apply_dispatch
+        for event in events:
+            if method := dispatch.get(event.__class__):
+                method(self, event)
+            else:
+                self.apply(event)
+        return self
 
     def record(self, event: Event):
-        self.__events.append(event)
+        try:
+            self.__events.append(event)
+        except AttributeError:
+            self.__events = [event]
         return self
 
-    def release(self):
-        released_events = deepcopy(self.__events)
-        self.__events.clear()
-        return released_events
+    def release(self) -> List[Event]:
+        """Hand over the recorded events, without copying, and start a new buffer."""
+        return vars(self).pop("_EventSourcedAggregateRoot__events", [])
@@ -1,5 +1,6 @@
 from typing import Callable, List, Optional, Union
 
+from fractal.core.command_bus.command import Command
 from fractal.core.command_bus.command_bus import CommandBus
 from fractal.core.event_sourcing.event import (
     EventCommandMapper,
@@ -7,7 +8,10 @@ from fractal.core.event_sourcing.event import (
     ReceivingEvent,
     SendingEvent,
 )
-from fractal.core.event_sourcing.event_projector import EventProjector
+from fractal.core.event_sourcing.event_projector import (
+    AsyncEventProjector,
+    EventProjector,
+)
 
 
 class CommandBusProjector(EventProjector):
@@ -29,38 +33,76 @@ class CommandBusProjector(EventProjector):
             for event, mapper in m().mappers().items()
         }
 
-    def project(self, id: str, event: Union[SendingEvent, ReceivingEvent]):
+    def _commands(self, event: Union[SendingEvent, ReceivingEvent]) -> List[Command]:
         if isinstance(event, ReceivingEvent):
-            self.command_bus_func().handle(event.to_command())
+            return [event.to_command()]
 
         # Execute command mappers
-        elif event.__class__ in self.command_mappers:
-            for mapper in self.command_mappers[event.__class__]:
-                commands = mapper(event)
-                for command in (
-                    commands if type(commands) is list else [commands]
-                ):  # backwards compatibility
-                    if command is not None:  # Skip None returns
-                        self.command_bus_func().handle(command)
+        commands = []
+        for mapper in self.command_mappers.get(event.__class__, []):
+            mapped = mapper(event)
+            for command in (
+                mapped if type(mapped) is list else [mapped]
+            ):  # backwards compatibility
+                if command is not None:  # Skip None returns
+                    commands.append(command)
+        return commands
+
+    def _processes(self, event: Union[SendingEvent, ReceivingEvent]) -> list:
+        if isinstance(event, ReceivingEvent) or event.__class__ in self.command_mappers:
+            return []
 
         # Execute process mappers
-        elif event.__class__ in self.process_mappers:
-            from fractal.core.process.process import Process
-            from fractal.core.process.process_context import ProcessContext
-
-            for mapper in self.process_mappers[event.__class__]:
-                process = mapper(event)
-                if isinstance(process, Process):
-                    # Get ApplicationContext from command bus
-                    # Access through closure or command_bus_func
-                    from fractal.core.utils.application_context import (
-                        ApplicationContext,
-                    )
-
-                    # Initialize context with fractal context
-                    ctx = ProcessContext(
-                        {
-                            "fractal": {"context": ApplicationContext()},
-                        }
-                    )
-                    process.run(ctx)
+        from fractal.core.process.process import AsyncProcess, Process
+
+        processes = []
+        for mapper in self.process_mappers.get(event.__class__, []):
+            process = mapper(event)
+            if isinstance(process, (Process, AsyncProcess)):
+                processes.append(process)
+        return processes
+
+    @staticmethod
+    def _process_context():
+        # Get ApplicationContext from command bus
+        # Access through closure or command_bus_func
+        from fractal.core.process.process_context import ProcessContext
+        from fractal.core.utils.application_context import ApplicationContext
+
+        # Initialize context with fractal context
+        return ProcessContext(
+            {
+                "fractal": {"context": ApplicationContext()},
+            }
+        )
+
+    def project(self, id: str, event: Union[SendingEvent, ReceivingEvent]):
+        for command in self._commands(event):
+            self.command_bus_func().handle(command)
+        for process in self._processes(event):
+            process.run(self._process_context())
+
+
+class AsyncCommandBusProjector(CommandBusProjector, AsyncEventProjector):
+    """Handles the commands with `CommandBus.handle_async`, so with async handlers.
+
+    Async processes are awaited, sync processes run in the default executor.
+    """
+
+    def project(self, id: str, event: Union[SendingEvent, ReceivingEvent]):
+        return AsyncEventProjector.project(self, id, event)
+
+    async def project_async(self, id: str, event: Union[SendingEvent, ReceivingEvent]):
+        import asyncio
+
+        from fractal.core.process.process import AsyncProcess
+
+        for command in self._commands(event):
+            await self.command_bus_func().handle_async(command)
+        for process in self._processes(event):
+            if isinstance(process, AsyncProcess):
+                await process.run_async(self._process_context())
+            else:
+                await asyncio.get_running_loop().run_in_executor(
+                    None, process.run, self._process_context()
+                )
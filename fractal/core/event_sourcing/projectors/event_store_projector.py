@@ -1,7 +1,14 @@
+import asyncio
+import contextvars
 import uuid
+from concurrent.futures import Executor
+from typing import Optional
 
 from fractal.core.event_sourcing.event import SendingEvent
-from fractal.core.event_sourcing.event_projector import EventProjector
+from fractal.core.event_sourcing.event_projector import (
+    AsyncEventProjector,
+    EventProjector,
+)
 from fractal.core.event_sourcing.event_store import EventStore
 from fractal.core.event_sourcing.event_stream import EventStream
 
@@ -12,5 +19,26 @@ class EventStoreProjector(EventProjector):
 
     def project(self, id: str, event: SendingEvent):
         self.event_store.commit(
-            EventStream(id=str(uuid.uuid4()), events=[event]), aggregate="", version=1
+            EventStream(id=str(uuid.uuid4()), events=[event]),
+            aggregate="",
+            version=None,
+        )
+
+
+class AsyncEventStoreProjector(EventStoreProjector, AsyncEventProjector):
+    """Commits in `executor` (the default executor of the loop when None), the event
+    store repositories are sync."""
+
+    def __init__(self, event_store: EventStore, executor: Optional[Executor] = None):
+        super(AsyncEventStoreProjector, self).__init__(event_store)
+        self.executor = executor
+
+    async def project_async(self, id: str, event: SendingEvent):
+        await asyncio.get_running_loop().run_in_executor(
+            self.executor,
+            # Executor threads don't see the serialization cache
+            contextvars.copy_context().run,
+            self.project,
+            id,
+            event,
         )
@@ -1,21 +1,36 @@
 import datetime
 import json
-from dataclasses import asdict
 
 from fractal.core.event_sourcing.event import SendingEvent
-from fractal.core.event_sourcing.event_projector import EventProjector
+from fractal.core.event_sourcing.event_projector import (
+    AsyncEventProjector,
+    EventProjector,
+)
 from fractal.core.event_sourcing.message import Message
+from fractal.core.event_sourcing.serialization import event_asdict
 from fractal.core.utils.json_encoder import EnhancedEncoder
 
 
 class PrintEventProjector(EventProjector):
-    def project(self, id: str, event: SendingEvent):
+    @staticmethod
+    def _dumps(id: str, event: SendingEvent) -> str:
         message = Message(
             id=id,
             occurred_on=datetime.datetime.now(tz=datetime.timezone.utc),
             event=event.__class__.__name__,
-            data=event,
+            data=None,
             object_id=str(event.object_id),
             aggregate_root_id=str(event.aggregate_root_id),
         )
-        print(json.dumps(asdict(message), cls=EnhancedEncoder))
+        # Not asdict(message), the event dict is shared with other projectors
+        return json.dumps(
+            {**message.__dict__, "data": event_asdict(event)}, cls=EnhancedEncoder
+        )
+
+    def project(self, id: str, event: SendingEvent):
+        print(self._dumps(id, event))
+
+
+class AsyncPrintEventProjector(PrintEventProjector, AsyncEventProjector):
+    async def project_async(self, id: str, event: SendingEvent):
+        print(self._dumps(id, event))
@@ -0,0 +1,180 @@
+import logging
+import time
+from abc import ABC
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Mapping, Optional, Union
+
+from fractal_repositories.core.entity import Entity
+from fractal_repositories.core.repositories import Repository
+from fractal_repositories.exceptions import ObjectNotFoundException
+from fractal_repositories.mixins.inmemory_repository_mixin import (
+    InMemoryRepositoryMixin,
+)
+from fractal_specifications.generic.operators import (
+    EqualsSpecification,
+    GreaterThanEqualSpecification,
+)
+from fractal_specifications.generic.specification import Specification
+
+from fractal.core.event_sourcing.event_projector import EventProjector
+from fractal.core.event_sourcing.event_store import BasicEventStore
+from fractal.core.event_sourcing.message import Message
+
+logger = logging.getLogger("app")
+
+
+@dataclass
+class Checkpoint(Entity):
+    id: str  # projector name
+    message_id: str
+    occurred_on: datetime
+    events: int = 0
+
+
+class CheckpointRepository(Repository[Checkpoint], ABC):
+    entity = Checkpoint
+
+
+class InMemoryCheckpointRepository(
+    CheckpointRepository, InMemoryRepositoryMixin[Checkpoint]
+):
+    pass
+
+
+@dataclass
+class ReplayResult:
+    events: int
+    seconds: float
+
+    @property
+    def events_per_second(self) -> float:
+        return self.events / self.seconds if self.seconds else 0.0
+
+
+class EventReplayer:
+    """Replay stored events into projectors, to (re)build read models.
+
+    Per projector a checkpoint of the last projected message is kept, so a replay
+    that crashed resumes where it stopped. Checkpoints are named after the keys when
+    the projectors are passed as a mapping, otherwise after the `name` attribute or
+    the class of the projectors, which must be unique. Up to `checkpoint_every` events can be
+    projected again after a crash, projectors should be idempotent.
+
+    Example:
+        EventReplayer(
+            context.event_store,
+            [ProductsViewProjector(view_repository)],
+            InMemoryCheckpointRepository(),
+        ).replay()
+    """
+
+    def __init__(
+        self,
+        event_store: BasicEventStore,
+        projectors: Union[List[EventProjector], Mapping[str, EventProjector]],
+        checkpoint_repository: CheckpointRepository,
+        batch_size: int = 1000,
+        checkpoint_every: int = 1000,
+    ):
+        self.event_store = event_store
+        self.projectors = self._named(projectors)
+        self.checkpoint_repository = checkpoint_repository
+        self.batch_size = batch_size
+        self.checkpoint_every = checkpoint_every
+
+    @staticmethod
+    def _named(
+        projectors: Union[List[EventProjector], Mapping[str, EventProjector]],
+    ) -> Dict[str, EventProjector]:
+        """Projectors by checkpoint name: the keys of a mapping, else their `name`
+        attribute or their class name."""
+        if isinstance(projectors, Mapping):
+            return dict(projectors)
+        named = {}
+        for projector in projectors:
+            name = getattr(projector, "name", None) or projector.__class__.__name__
+            if name in named:
+                raise ValueError(
+                    f"Duplicate projector name '{name}', give the projectors a "
+                    f"unique `name` or pass them as a mapping of names"
+                )
+            named[name] = projector
+        return named
+
+    def _checkpoints(self) -> Dict[str, Optional[Checkpoint]]:
+        checkpoints = {}
+        for name in self.projectors:
+            try:
+                checkpoints[name] = self.checkpoint_repository.find_one(
+                    EqualsSpecification("id", name)
+                )
+            except ObjectNotFoundException:
+                checkpoints[name] = None
+        return checkpoints
+
+    def reset(self):
+        """Forget all checkpoints, the next replay starts from the first event."""
+        for name in self.projectors:
+            try:
+                self.checkpoint_repository.remove_one(EqualsSpecification("id", name))
+            except ObjectNotFoundException:
+                pass
+
+    def _save(self, name: str, message: Message, events: int):
+        self.checkpoint_repository.update(
+            Checkpoint(
+                id=name,
+                message_id=message.id,
+                occurred_on=message.occurred_on,
+                events=events,
+            ),
+            upsert=True,
+        )
+
+    def replay(self, specification: Optional[Specification] = None) -> ReplayResult:
+        checkpoints = self._checkpoints()
+        # Projectors with a checkpoint skip messages up to and including it
+        pending = {name: cp for name, cp in checkpoints.items() if cp is not None}
+        if pending and len(pending) == len(self.projectors):
+            start = GreaterThanEqualSpecification(
+                "occurred_on", min(cp.occurred_on for cp in pending.values())
+            )
+            specification = specification & start if specification else start
+
+        counts = {name: cp.events if cp else 0 for name, cp in checkpoints.items()}
+        last: Dict[str, Message] = {}
+        events = 0
+        started = time.perf_counter()
+        for message in self.event_store.event_store_repository.iter_messages(
+            specification, self.batch_size
+        ):
+            event = None
+            for name, projector in self.projectors.items():
+                if cp := pending.get(name):
+                    if message.occurred_on < cp.occurred_on:
+                        continue
+                    if message.occurred_on == cp.occurred_on:
+                        if message.id == cp.message_id:
+                            del pending[name]
+                        continue
+                    del pending[name]
+                if event is None:
+                    event = self.event_store.load_event(message)
+                projector.project(message.id, event)
+                counts[name] += 1
+                last[name] = message
+                if counts[name] % self.checkpoint_every == 0:
+                    self._save(name, message, counts[name])
+            if event is not None:
+                events += 1
+
+        for name, message in last.items():
+            self._save(name, message, counts[name])
+
+        result = ReplayResult(events=events, seconds=time.perf_counter() - started)
+        logger.info(
+            f"Replayed {result.events} events in {result.seconds:.2f}s "
+            f"({result.events_per_second:.0f} events/sec)"
+        )
+        return result
@@ -1,50 +1,125 @@
-from typing import Generator, Generic, Optional
+from itertools import islice
+from typing import Generator, Generic, List, Optional
 
 from fractal_repositories.core.entity import Entity
 from fractal_repositories.core.repositories import EntityType, Repository
+from fractal_specifications.generic.operators import (
+    EqualsSpecification,
+    InSpecification,
+)
 from fractal_specifications.generic.specification import Specification
 
 from fractal.core.event_sourcing.event_store import EventStore
 from fractal.core.event_sourcing.event_stream import EventStream
 from fractal.core.event_sourcing.models import EventSourcedAggregateRoot
+from fractal.core.event_sourcing.snapshots import SnapshotStore
 from fractal.core.exceptions import AggregateRootError
 
 
 class EventSourcedRepository(Generic[EntityType], Repository[Entity]):
+    """Store aggregates as their events, optimistically locked by stream version.
+
+    Aggregates that were loaded or saved through the repository know their stream
+    version, a save fails with a ConcurrencyError when other events were stored
+    meanwhile. Aggregates that are built another way (stream_version 0) are
+    appended without a check, unless `check_new_aggregates` is set, then they
+    expect their stream to be empty, so concurrent creates of an id fail.
+    """
+
     entity: EntityType = Entity
 
-    def __init__(self, event_store: EventStore, *args, **kwargs):
+    def __init__(
+        self,
+        event_store: EventStore,
+        *args,
+        snapshot_store: Optional[SnapshotStore] = None,
+        check_new_aggregates: bool = False,
+        **kwargs,
+    ):
         self.event_store = event_store
+        self.snapshot_store = snapshot_store
+        self.check_new_aggregates = check_new_aggregates
         super().__init__(*args, **kwargs)
 
-    def commit(self, event_stream: EventStream):
-        self.event_store.commit(
+    def commit(self, event_stream: EventStream, version: Optional[int] = None):
+        return self.event_store.commit(
             event_stream=event_stream,
             aggregate=self.entity.__name__,
-            version=1,
+            version=version,
         )
 
     def add(self, entity: Entity) -> Entity:
         if not issubclass(type(entity), EventSourcedAggregateRoot):
             raise AggregateRootError
-        self.commit(
+        version = None
+        if entity.stream_version or self.check_new_aggregates:
+            version = entity.stream_version + 1
+        messages = self.commit(
             EventStream(
                 events=entity.release(),
-            )
+            ),
+            version=version,
         )
+        if messages:
+            entity.stream_version = messages[-1].version
+            if self.snapshot_store:
+                self.snapshot_store.save_if_needed(
+                    messages[-1].aggregate_root_id, entity
+                )
         return entity
 
+    def load(self, aggregate_root_id: str) -> Optional[EntityType]:
+        """Load the aggregate from its latest snapshot and the events after it."""
+        aggregate = None
+        if self.snapshot_store:
+            aggregate = self.snapshot_store.load(self.entity, aggregate_root_id)
+        version = aggregate.stream_version if aggregate else 0
+        events = self.event_store.get_event_stream_for(
+            aggregate_root_id, from_version=version + 1
+        ).events
+        if not events:
+            return aggregate
+        if aggregate is None:
+            # State is built up from the events, not through the constructor
+            aggregate = self.entity.__new__(self.entity)
+        aggregate.replay(events)
+        aggregate.stream_version = version + len(events)
+        if self.snapshot_store:
+            self.snapshot_store.save_if_needed(aggregate_root_id, aggregate)
+        return aggregate
+
     def update(self, entity: Entity, upsert=False) -> Entity:
         return self.add(entity)
 
     def remove_one(self, specification: Specification):
         raise NotImplementedError
 
-    def find_one(self, specification: Specification) -> Optional[Entity]:
+    @staticmethod
+    def _ids(specification: Optional[Specification]) -> List[str]:
+        """The aggregate ids of the specification, only lookups by id are supported."""
+        if type(specification) is EqualsSpecification and specification.field == "id":
+            return [specification.value]
+        if type(specification) is InSpecification and specification.field == "id":
+            return list(specification.value)
         raise NotImplementedError
 
-    def find(*args, **kwargs) -> Generator[Entity, None, None]:
-        raise NotImplementedError
+    def find_one(self, specification: Specification) -> Optional[Entity]:
+        for aggregate in self.find(specification, limit=1):
+            return aggregate
+        raise self._object_not_found()
+
+    def find(
+        self,
+        specification: Optional[Specification] = None,
+        *,
+        offset: int = 0,
+        limit: int = 0,
+        order_by: str = "",
+    ) -> Generator[Entity, None, None]:
+        aggregates = filter(None, map(self.load, self._ids(specification)))
+        if limit:
+            aggregates = islice(aggregates, offset, offset + limit)
+        yield from aggregates
 
     def count(self, specification: Optional[Specification] = None) -> int:
         raise NotImplementedError
@@ -0,0 +1,52 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+_cache: ContextVar[Optional[Dict[Tuple[int, Hashable], Tuple[Any, Any]]]] = ContextVar(
+    "fractal_serialization_cache", default=None
+)
+
+
+@contextmanager
+def serialization_cache():
+    """Within this context every event is serialized once per serializer.
+
+    EventPublisher opens it around a publish, so projectors that encode the same
+    event the same way share the result. Nested contexts use the outer cache.
+    """
+    if _cache.get() is not None:
+        yield
+        return
+    token = _cache.set({})
+    try:
+        yield
+    finally:
+        _cache.reset(token)
+
+
+def serialize(event: Any, key: Hashable, serializer: Callable[[Any], Any]) -> Any:
+    """`serializer(event)`, cached under `key` when in a `serialization_cache`.
+
+    Cached results are shared, so they must not be mutated.
+    """
+    cache = _cache.get()
+    if cache is None:
+        return serializer(event)
+    cache_key = (id(event), key)
+    if (cached := cache.get(cache_key)) is not None:
+        return cached[1]
+    value = serializer(event)
+    # Keep the event alive, so its id cannot be reused within the cache
+    cache[cache_key] = (event, value)
+    return value
+
+
+def _asdict(event: Any) -> Dict[str, Any]:
+    from fractal.core.event_sourcing.codecs import get_event_codec
+
+    return get_event_codec(event.__class__).encode(event)
+
+
+def event_asdict(event: Any) -> Dict[str, Any]:
+    """The event as dict, like `dataclasses.asdict`, see `EventCodec`."""
+    return serialize(event, "asdict", _asdict)
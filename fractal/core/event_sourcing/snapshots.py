@@ -0,0 +1,240 @@
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from copy import deepcopy
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
+from json import JSONEncoder
+from typing import Any, Optional, Type
+
+from fractal_repositories.core.entity import Entity
+from fractal_repositories.core.repositories import Repository
+from fractal_repositories.exceptions import ObjectNotFoundException
+from fractal_repositories.mixins.inmemory_repository_mixin import (
+    InMemoryRepositoryMixin,
+)
+from fractal_specifications.generic.operators import EqualsSpecification
+
+from fractal.core.event_sourcing.codecs import get_event_codec
+from fractal.core.event_sourcing.models import EventSourcedAggregateRoot
+from fractal.core.utils.json_codecs import JsonCodec, get_json_codec
+from fractal.core.utils.json_encoder import EnhancedEncoder
+
+
+@dataclass
+class Snapshot(Entity):
+    id: str  # aggregate_root_id, only the latest snapshot per aggregate is kept
+    aggregate: str
+    version: int
+    occurred_on: datetime
+    data: Any
+
+
+class SnapshotRepository(Repository[Snapshot], ABC):
+    entity = Snapshot
+
+
+class InMemorySnapshotRepository(SnapshotRepository, InMemoryRepositoryMixin[Snapshot]):
+    pass
+
+
+class SnapshotPolicy(ABC):
+    @abstractmethod
+    def should_snapshot(self, version: int, snapshot: Optional[Snapshot]) -> bool:
+        """Decide whether an aggregate at `version` needs a new snapshot."""
+        raise NotImplementedError
+
+
+class EveryNEventsSnapshotPolicy(SnapshotPolicy):
+    def __init__(self, events: int = 100):
+        self.events = events
+
+    def should_snapshot(self, version: int, snapshot: Optional[Snapshot]) -> bool:
+        return version - (snapshot.version if snapshot else 0) >= self.events
+
+
+class TimeIntervalSnapshotPolicy(SnapshotPolicy):
+    def __init__(self, interval: timedelta):
+        self.interval = interval
+
+    def should_snapshot(self, version: int, snapshot: Optional[Snapshot]) -> bool:
+        if not snapshot:
+            return True
+        if version <= snapshot.version:
+            return False
+        return datetime.now(timezone.utc) - snapshot.occurred_on >= self.interval
+
+
+class SnapshotStore(ABC):
+    @abstractmethod
+    def save(
+        self, aggregate_root_id: str, aggregate: EventSourcedAggregateRoot
+    ) -> Snapshot:
+        raise NotImplementedError
+
+    @abstractmethod
+    def save_if_needed(
+        self, aggregate_root_id: str, aggregate: EventSourcedAggregateRoot
+    ) -> Optional[Snapshot]:
+        """Save a snapshot when the policy of the store asks for one."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def load(
+        self, aggregate_class: Type[EventSourcedAggregateRoot], aggregate_root_id: str
+    ) -> Optional[EventSourcedAggregateRoot]:
+        """Load the aggregate from its latest snapshot, with its stream_version set."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def is_healthy(self) -> bool:
+        raise NotImplementedError
+
+
+class BasicSnapshotStore(SnapshotStore, ABC):
+    """Save and load snapshots, the latest snapshot (without its data) of the
+    `cache_size` most recently used aggregates is cached to check the policy."""
+
+    def __init__(
+        self,
+        snapshot_repository: SnapshotRepository,
+        policy: Optional[SnapshotPolicy] = None,
+        cache_size: int = 1000,
+    ):
+        self.snapshot_repository = snapshot_repository
+        self.policy = policy or EveryNEventsSnapshotPolicy()
+        self.cache_size = cache_size
+        # Latest snapshot per aggregate without its data (None when there is none),
+        # least recently used first
+        self._latest: "OrderedDict[str, Optional[Snapshot]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def is_healthy(self) -> bool:
+        return self.snapshot_repository.is_healthy()
+
+    def _dump(self, aggregate: EventSourcedAggregateRoot) -> Any:
+        raise NotImplementedError
+
+    def _load(
+        self, aggregate_class: Type[EventSourcedAggregateRoot], data: Any
+    ) -> EventSourcedAggregateRoot:
+        raise NotImplementedError
+
+    def _evict(self):
+        while len(self._latest) > self.cache_size:
+            self._latest.popitem(last=False)
+
+    def _cache(self, aggregate_root_id: str, snapshot: Snapshot):
+        with self._lock:
+            self._latest[aggregate_root_id] = replace(snapshot, data=None)
+            self._latest.move_to_end(aggregate_root_id)
+            self._evict()
+
+    def save(
+        self, aggregate_root_id: str, aggregate: EventSourcedAggregateRoot
+    ) -> Snapshot:
+        snapshot = Snapshot(
+            id=aggregate_root_id,
+            aggregate=aggregate.__class__.__name__,
+            version=aggregate.stream_version,
+            occurred_on=datetime.now(timezone.utc),
+            data=self._dump(aggregate),
+        )
+        self.snapshot_repository.update(snapshot, upsert=True)
+        self._cache(aggregate_root_id, snapshot)
+        return snapshot
+
+    def _latest_snapshot(self, aggregate_root_id: str) -> Optional[Snapshot]:
+        """The latest snapshot without its data, from the stored one when not cached."""
+        with self._lock:
+            if aggregate_root_id in self._latest:
+                self._latest.move_to_end(aggregate_root_id)
+                return self._latest[aggregate_root_id]
+        try:
+            snapshot = replace(
+                self.snapshot_repository.find_one(
+                    EqualsSpecification("id", aggregate_root_id)
+                ),
+                data=None,
+            )
+        except ObjectNotFoundException:
+            snapshot = None
+        with self._lock:
+            # Keeps a snapshot that was saved meanwhile
+            snapshot = self._latest.setdefault(aggregate_root_id, snapshot)
+            self._evict()
+        return snapshot
+
+    def save_if_needed(
+        self, aggregate_root_id: str, aggregate: EventSourcedAggregateRoot
+    ) -> Optional[Snapshot]:
+        if self.policy.should_snapshot(
+            aggregate.stream_version, self._latest_snapshot(aggregate_root_id)
+        ):
+            return self.save(aggregate_root_id, aggregate)
+        return None
+
+    def load(
+        self, aggregate_class: Type[EventSourcedAggregateRoot], aggregate_root_id: str
+    ) -> Optional[EventSourcedAggregateRoot]:
+        try:
+            snapshot = self.snapshot_repository.find_one(
+                EqualsSpecification("id", aggregate_root_id)
+            )
+        except ObjectNotFoundException:
+            return None
+        self._cache(aggregate_root_id, snapshot)
+        aggregate = self._load(aggregate_class, snapshot.data)
+        aggregate.stream_version = snapshot.version
+        return aggregate
+
+
+class ObjectSnapshotStore(BasicSnapshotStore):
+    def _dump(self, aggregate: EventSourcedAggregateRoot) -> Any:
+        return deepcopy(aggregate)
+
+    def _load(
+        self, aggregate_class: Type[EventSourcedAggregateRoot], data: Any
+    ) -> EventSourcedAggregateRoot:
+        return deepcopy(data)
+
+
+class JsonSnapshotStore(BasicSnapshotStore):
+    """Store snapshots as JSON, encoded and decoded like the events of JsonEventStore
+    (see `get_event_codec`), so nested dataclasses, datetimes etc. round-trip."""
+
+    def __init__(
+        self,
+        snapshot_repository: SnapshotRepository,
+        policy: Optional[SnapshotPolicy] = None,
+        json_encoder: Optional[Type[JSONEncoder]] = None,
+        json_codec: Optional[JsonCodec] = None,
+        cache_size: int = 1000,
+    ):
+        super(JsonSnapshotStore, self).__init__(snapshot_repository, policy, cache_size)
+        self.json_encoder = json_encoder
+        self.json_codec = json_codec or get_json_codec(json_encoder or EnhancedEncoder)
+
+    def _dump(self, aggregate: EventSourcedAggregateRoot) -> Any:
+        return self.json_codec.dumps(
+            get_event_codec(aggregate.__class__).encode(aggregate)
+        )
+
+    def _load(
+        self, aggregate_class: Type[EventSourcedAggregateRoot], data: Any
+    ) -> EventSourcedAggregateRoot:
+        return get_event_codec(aggregate_class).decode(self.json_codec.loads(data))
+
+
+class PickleSnapshotStore(BasicSnapshotStore):
+    def _dump(self, aggregate: EventSourcedAggregateRoot) -> Any:
+        import pickle
+
+        return pickle.dumps(aggregate)
+
+    def _load(
+        self, aggregate_class: Type[EventSourcedAggregateRoot], data: Any
+    ) -> EventSourcedAggregateRoot:
+        import pickle
+
+        return pickle.loads(data)
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 
 from fractal.core.process.process_context import ProcessContext
+from fractal.core.utils.event_loop import run_coroutine
 
 
 class Action(ABC):
@@ -33,7 +34,8 @@ class AsyncAction(Action, ABC):
         """Sync wrapper that runs async execution.
 
         This allows AsyncAction to be used in regular Process workflows
-        that expect sync execution.
+        that expect sync execution, also from within a running event loop
+        (see run_coroutine).
 
         Args:
             ctx: ProcessContext to execute action with
@@ -41,6 +43,4 @@ class AsyncAction(Action, ABC):
         Returns:
             Updated ProcessContext after action execution
         """
-        import asyncio
-
-        return asyncio.run(self.execute_async(ctx))
+        return run_coroutine(self.execute_async(ctx))
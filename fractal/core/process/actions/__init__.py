@@ -54,6 +54,10 @@ def _set_nested(ctx, field: str, value):
         ctx[field] = value
         return
 
+    if isinstance(ctx, ProcessContext):
+        # Objects shared with the parent context are not changed by a branch
+        ctx.detach(parts[0])
+
     # Navigate to the parent object
     parent = ctx
     path_so_far = []
@@ -1,6 +1,19 @@
-from typing import Callable, Iterable, List, Optional, Union
-
-from fractal.core.process.action import Action
+"""Control flow actions.
+
+They are dual-mode: execute() runs the nested actions in a Process, while in an
+AsyncProcess (or a ParallelAction) execute_async() awaits the nested async actions
+on the running loop and runs the nested sync actions in an executor, so they don't
+block the loop.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, List, Optional, Union
+
+from fractal.core.process.action import Action, AsyncAction
 from fractal.core.process.process import Process
 from fractal.core.process.process_context import ProcessContext
 
@@ -31,7 +44,51 @@ def _get_nested_value(ctx, field: str):
     return value
 
 
-class IfElseAction(Action):
+def _awaits(process) -> bool:
+    """Whether the process has async actions, also nested in control flow actions."""
+    return any(_action_awaits(action) for action in getattr(process, "actions", ()))
+
+
+def _action_awaits(action: Action) -> bool:
+    if nested := getattr(action, "_nested_processes", None):
+        return any(_awaits(process) for process in nested())
+    return isinstance(action, AsyncAction)
+
+
+def _run_in_executor(executor: Optional[Executor], function, ctx: ProcessContext):
+    return asyncio.get_running_loop().run_in_executor(
+        executor, contextvars.copy_context().run, function, ctx
+    )
+
+
+async def _run_async(
+    process, ctx: ProcessContext, executor: Optional[Executor] = None
+) -> ProcessContext:
+    """Run the process from the running loop, without blocking it.
+
+    Async actions are awaited on the loop, sync actions run in `executor` (the
+    default executor of the loop when None), a process without async actions runs
+    there as a whole.
+    """
+    if not _awaits(process):
+        return await _run_in_executor(executor, process.run, ctx)
+    for action in process.actions:
+        if _action_awaits(action):
+            ctx.update(await action.execute_async(ctx))
+        else:
+            ctx.update(await _run_in_executor(executor, action.execute, ctx))
+    return ctx
+
+
+def _resolve_specification(specification, ctx: ProcessContext):
+    # Support both string (new) and Specification object (old, deprecated)
+    if isinstance(specification, str):
+        return _get_nested_value(ctx, specification)
+    # Backward compatibility: direct Specification object
+    return specification
+
+
+class IfElseAction(AsyncAction):
     """Execute actions conditionally based on a specification.
 
     The specification parameter supports both:
@@ -88,23 +145,25 @@ class IfElseAction(Action):
         self.process_true = Process(actions_true)
         self.process_false = Process(actions_false) if actions_false else None
 
+    def _nested_processes(self) -> List[Process]:
+        return [p for p in (self.process_true, self.process_false) if p]
+
+    def _process(self, ctx: ProcessContext) -> Optional[Process]:
+        spec = _resolve_specification(self.specification, ctx)
+        return self.process_true if spec.is_satisfied_by(ctx) else self.process_false
+
     def execute(self, ctx: ProcessContext) -> ProcessContext:
-        # Support both string (new) and Specification object (old, deprecated)
-        if isinstance(self.specification, str):
-            spec = _get_nested_value(ctx, self.specification)
-        else:
-            # Backward compatibility: direct Specification object
-            spec = self.specification
-
-        if spec.is_satisfied_by(ctx):
-            if self.process_true:
-                ctx.update(self.process_true.run(ctx))
-        elif self.process_false:
-            ctx.update(self.process_false.run(ctx))
+        if process := self._process(ctx):
+            ctx.update(process.run(ctx))
+        return ctx
+
+    async def execute_async(self, ctx: ProcessContext) -> ProcessContext:
+        if process := self._process(ctx):
+            ctx.update(await _run_async(process, ctx))
         return ctx
 
 
-class WhileAction(Action):
+class WhileAction(AsyncAction):
     """Execute actions repeatedly while a specification is satisfied.
 
     The specification parameter supports both:
@@ -155,24 +214,54 @@ class WhileAction(Action):
         self.specification = specification
         self.process = Process(actions)
 
-    def execute(self, ctx: ProcessContext) -> ProcessContext:
-        # Support both string (new) and Specification object (old, deprecated)
-        if isinstance(self.specification, str):
-            spec = _get_nested_value(ctx, self.specification)
-        else:
-            # Backward compatibility: direct Specification object
-            spec = self.specification
+    def _nested_processes(self) -> List[Process]:
+        return [self.process]
 
+    def execute(self, ctx: ProcessContext) -> ProcessContext:
+        spec = _resolve_specification(self.specification, ctx)
         while spec.is_satisfied_by(ctx):
             ctx.update(self.process.run(ctx))
         return ctx
 
+    async def execute_async(self, ctx: ProcessContext) -> ProcessContext:
+        spec = _resolve_specification(self.specification, ctx)
+        while spec.is_satisfied_by(ctx):
+            ctx.update(await _run_async(self.process, ctx))
+        return ctx
+
+
+class _RateLimiter:
+    """Spaces the starts of iterations to at most `rate` per second."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate
+        self.next_start = 0.0
+        self.lock = threading.Lock()
+
+    def delay(self) -> float:
+        """Reserve the next start, returns the seconds to wait for it."""
+        with self.lock:
+            now = time.monotonic()
+            start = max(now, self.next_start)
+            self.next_start = start + self.interval
+        return start - now
+
 
-class ForEachAction(Action):
+class ForEachAction(AsyncAction):
     """Execute actions for each item in an iterable.
 
     Supports both static iterables and dynamic lookup from context.
 
+    By default the items are processed one after the other, in the context itself.
+    With `max_concurrency`, up to that many items are processed at once, each in
+    its own branch of the context (see ProcessContext.branch) that is merged back
+    in the order of the items. In a Process the items run in threads (of `executor`
+    when given), in an AsyncProcess as tasks on the running loop, of which the sync
+    actions run in `executor` (the default executor of the loop when None). `rate_limit`
+    limits the number of items started per second. With `result_var`, the value
+    of that variable after each item is collected in `results_ctx_var`, in the
+    order of the items.
+
     Examples:
         # Static iterable
         ForEachAction([1, 2, 3], [PrintValueAction(ctx_var="item")])
@@ -185,6 +274,16 @@ class ForEachAction(Action):
             lambda ctx: ctx.fractal.context.user_repository.find_all(),
             [NotifyUserAction()]
         )
+
+        # 10 items at a time, at most 50 per second, responses in item order
+        ForEachAction(
+            "users",
+            [QueryAction(lambda ctx: client.fetch(ctx["item"]), "response")],
+            max_concurrency=10,
+            rate_limit=50,
+            result_var="response",
+            results_ctx_var="responses",
+        )
     """
 
     def __init__(
@@ -192,6 +291,11 @@ class ForEachAction(Action):
         iterable: Union[Iterable, str, Callable[[ProcessContext], Iterable]],
         actions: List[Action],
         ctx_var: str = "item",
+        max_concurrency: Optional[int] = None,
+        rate_limit: Optional[float] = None,
+        result_var: Optional[str] = None,
+        results_ctx_var: str = "results",
+        executor: Optional[Executor] = None,
     ):
         """Initialize ForEachAction.
 
@@ -202,32 +306,163 @@ class ForEachAction(Action):
                 - Callable that takes context and returns iterable
             actions: Actions to execute for each item
             ctx_var: Context variable name to store current item (default: "item")
+            max_concurrency: Maximum number of items processed at once (optional,
+                sequential when not given)
+            rate_limit: Maximum number of items started per second (optional)
+            result_var: Context variable holding the result of an item (optional)
+            results_ctx_var: Context variable to store the results in
+                (default: "results")
+            executor: Executor for the concurrent items in a Process (optional,
+                a thread pool of max_concurrency threads when not given)
         """
         self.iterable = iterable
         self.process = Process(actions)
         self.ctx_var = ctx_var
+        self.max_concurrency = max_concurrency
+        self.rate_limit = rate_limit
+        self.result_var = result_var
+        self.results_ctx_var = results_ctx_var
+        self.executor = executor
 
-    def execute(self, ctx: ProcessContext) -> ProcessContext:
+    def _nested_processes(self) -> List[Process]:
+        return [self.process]
+
+    def _items(self, ctx: ProcessContext) -> Iterable:
         # Resolve iterable based on type
         if isinstance(self.iterable, str):
             # Lookup from context field
-            items = ctx[self.iterable]
+            return ctx[self.iterable]
         elif callable(self.iterable):
             # Call function to get iterable
-            items = self.iterable(ctx)
-        else:
-            # Use as-is (static iterable)
-            items = self.iterable
+            return self.iterable(ctx)
+        # Use as-is (static iterable)
+        return self.iterable
+
+    def _rate_limiter(self) -> Optional[_RateLimiter]:
+        return _RateLimiter(self.rate_limit) if self.rate_limit else None
+
+    def _branch(self, ctx: ProcessContext, item) -> ProcessContext:
+        branch = ctx.branch()
+        branch[self.ctx_var] = item
+        return branch
+
+    def _merge(self, ctx: ProcessContext, branches: Iterable[ProcessContext]):
+        """Merge the branches in the order of the items, up to the first error."""
+        results = []
+        for branch in branches:
+            ctx.update(branch)
+            results.append(branch.get(self.result_var))
+        if self.result_var:
+            ctx[self.results_ctx_var] = results
+
+    def execute(self, ctx: ProcessContext) -> ProcessContext:
+        if self.max_concurrency:
+            self._merge(ctx, self._run_in_threads(ctx))
+            return ctx
 
         # Execute actions for each item
-        for item in items:
+        results = []
+        limiter = self._rate_limiter()
+        for item in self._items(ctx):
+            if limiter:
+                time.sleep(limiter.delay())
             ctx[self.ctx_var] = item
             ctx.update(self.process.run(ctx))
+            results.append(ctx.get(self.result_var))
+        if self.result_var:
+            ctx[self.results_ctx_var] = results
 
         return ctx
 
+    def _run_in_threads(self, ctx: ProcessContext) -> Iterator[ProcessContext]:
+        limiter = self._rate_limiter()
+        slots = threading.BoundedSemaphore(self.max_concurrency)
+        failed = threading.Event()
+        executor = self.executor or ThreadPoolExecutor(max_workers=self.max_concurrency)
+
+        def done(future):
+            slots.release()
+            if future.exception():
+                failed.set()
+
+        futures = []
+        try:
+            for item in self._items(ctx):
+                slots.acquire()
+                if failed.is_set():
+                    slots.release()
+                    break
+                if limiter:
+                    time.sleep(limiter.delay())
+                future = executor.submit(
+                    contextvars.copy_context().run,
+                    self.process.run,
+                    self._branch(ctx, item),
+                )
+                future.add_done_callback(done)
+                futures.append(future)
+            # Wait for all items, so none is still running when merging
+            wait(futures)
+        finally:
+            if not self.executor:
+                executor.shutdown()
+        for future in futures:
+            yield future.result()
+
+    async def execute_async(self, ctx: ProcessContext) -> ProcessContext:
+        if self.max_concurrency:
+            self._merge(ctx, await self._run_as_tasks(ctx))
+            return ctx
+
+        results = []
+        limiter = self._rate_limiter()
+        for item in self._items(ctx):
+            if limiter:
+                await asyncio.sleep(limiter.delay())
+            ctx[self.ctx_var] = item
+            ctx.update(await _run_async(self.process, ctx, self.executor))
+            results.append(ctx.get(self.result_var))
+        if self.result_var:
+            ctx[self.results_ctx_var] = results
+
+        return ctx
 
-class TryExceptAction(Action):
+    async def _run_as_tasks(self, ctx: ProcessContext) -> Iterator[ProcessContext]:
+        limiter = self._rate_limiter()
+        slots = asyncio.Semaphore(self.max_concurrency)
+        failed = False
+
+        async def run(item):
+            nonlocal failed
+            async with slots:
+                if failed:
+                    return None
+                if limiter:
+                    await asyncio.sleep(limiter.delay())
+                try:
+                    return await _run_async(
+                        self.process, self._branch(ctx, item), self.executor
+                    )
+                except Exception:
+                    failed = True
+                    raise
+
+        results = await asyncio.gather(
+            *[run(item) for item in self._items(ctx)], return_exceptions=True
+        )
+        return self._until_error(results)
+
+    @staticmethod
+    def _until_error(results: List) -> Iterator[ProcessContext]:
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+            if result is None:  # not started after an error
+                return
+            yield result
+
+
+class TryExceptAction(AsyncAction):
     """Execute actions with error handling."""
 
     def __init__(
@@ -246,13 +481,22 @@ class TryExceptAction(Action):
         self.except_process = Process(except_actions) if except_actions else None
         self.finally_process = Process(finally_actions) if finally_actions else None
 
+    def _nested_processes(self) -> List[Process]:
+        return [
+            p for p in (self.process, self.except_process, self.finally_process) if p
+        ]
+
+    @staticmethod
+    def _set_error(ctx: ProcessContext, e: Exception):
+        ctx["last_error"] = e
+        ctx["last_error_type"] = type(e).__name__
+        ctx["last_error_message"] = str(e)
+
     def execute(self, ctx: ProcessContext) -> ProcessContext:
         try:
             ctx.update(self.process.run(ctx))
         except Exception as e:
-            ctx["last_error"] = e
-            ctx["last_error_type"] = type(e).__name__
-            ctx["last_error_message"] = str(e)
+            self._set_error(ctx, e)
             if self.except_process:
                 ctx.update(self.except_process.run(ctx))
         finally:
@@ -260,8 +504,20 @@ class TryExceptAction(Action):
                 ctx.update(self.finally_process.run(ctx))
         return ctx
 
+    async def execute_async(self, ctx: ProcessContext) -> ProcessContext:
+        try:
+            ctx.update(await _run_async(self.process, ctx))
+        except Exception as e:
+            self._set_error(ctx, e)
+            if self.except_process:
+                ctx.update(await _run_async(self.except_process, ctx))
+        finally:
+            if self.finally_process:
+                ctx.update(await _run_async(self.finally_process, ctx))
+        return ctx
+
 
-class SubProcessAction(Action):
+class SubProcessAction(AsyncAction):
     """Execute a sub-process as an action.
 
     Allows composing processes by calling one process from within another.
@@ -297,6 +553,9 @@ class SubProcessAction(Action):
         """
         self.process = process
 
+    def _nested_processes(self) -> List[Process]:
+        return [self.process]
+
     def execute(self, ctx: ProcessContext) -> ProcessContext:
         """Execute the sub-process.
 
@@ -308,13 +567,23 @@ class SubProcessAction(Action):
         """
         return self.process.run(ctx)
 
+    async def execute_async(self, ctx: ProcessContext) -> ProcessContext:
+        """Execute the sub-process, awaiting its async actions."""
+        return await _run_async(self.process, ctx)
 
-class ParallelAction(Action):
+
+class ParallelAction(AsyncAction):
     """Execute multiple actions concurrently using asyncio.
 
-    Each action runs in its own context copy to avoid conflicts. Results are merged
-    back into the main context. Exceptions are collected in the 'parallel_errors' list
-    rather than raised immediately.
+    Each action runs in its own copy-on-write branch of the context (see
+    ProcessContext.branch) to avoid conflicts. The changes of the branches are merged
+    back into the main context in the order of the actions. Exceptions are collected
+    in the 'parallel_errors' list rather than raised immediately.
+
+    Async actions are awaited on the running event loop, sync actions run in the
+    `executor` (the default executor of the loop when None), at most
+    `max_concurrency` at a time when given. In an AsyncProcess the action is awaited
+    as well, execute() can also be called from within a running loop.
 
     Example:
         ParallelAction([
@@ -324,47 +593,59 @@ class ParallelAction(Action):
         ])
     """
 
-    def __init__(self, actions: List[Action]):
+    def __init__(
+        self,
+        actions: List[Action],
+        executor: Optional[Executor] = None,
+        max_concurrency: Optional[int] = None,
+    ):
         """
         Args:
             actions: List of actions to execute in parallel
+            executor: Executor for the sync actions (optional)
+            max_concurrency: Maximum number of sync actions running at once (optional)
         """
         self.actions = actions
+        self.executor = executor
+        self.max_concurrency = max_concurrency
 
-    def execute(self, ctx: ProcessContext) -> ProcessContext:
-        import asyncio
-
-        async def run_parallel():
-            # Execute each action in a separate context copy to avoid conflicts
-            tasks = []
-            for action in self.actions:
-                # Create a deep copy of the context for each action
-                local_ctx = ctx.copy()
-                tasks.append(self._run_action_async(action, local_ctx))
-
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            # Merge results back into main context
-            for result in results:
-                if isinstance(result, Exception):
-                    # Store exception but don't raise
-                    if "parallel_errors" not in ctx:
-                        ctx["parallel_errors"] = []
-                    ctx["parallel_errors"].append(result)
-                elif isinstance(result, ProcessContext):
-                    ctx.update(result)
+    async def execute_async(self, ctx: ProcessContext) -> ProcessContext:
+        semaphore = (
+            asyncio.Semaphore(self.max_concurrency) if self.max_concurrency else None
+        )
+        # Execute each action in a separate context branch to avoid conflicts
+        results = await asyncio.gather(
+            *[
+                self._run_action_async(action, ctx.branch(), semaphore)
+                for action in self.actions
+            ]
+        )
 
-            return ctx
+        # Merge results back into main context
+        for result in results:
+            if isinstance(result, Exception):
+                # Store exception but don't raise
+                if "parallel_errors" not in ctx:
+                    ctx["parallel_errors"] = []
+                ctx["parallel_errors"].append(result)
+            elif isinstance(result, ProcessContext):
+                ctx.update(result)
 
-        return asyncio.run(run_parallel())
+        return ctx
 
-    async def _run_action_async(self, action, ctx):
+    async def _run_action_async(
+        self,
+        action: Action,
+        ctx: ProcessContext,
+        semaphore: Optional[asyncio.Semaphore] = None,
+    ):
         """Execute action asynchronously, handling both sync and async actions."""
-        import asyncio
-
         try:
-            # Run in thread pool for sync actions
-            loop = asyncio.get_running_loop()
-            return await loop.run_in_executor(None, action.execute, ctx)
+            if _action_awaits(action):
+                return await action.execute_async(ctx)
+            if semaphore is None:
+                return await _run_in_executor(self.executor, action.execute, ctx)
+            async with semaphore:
+                return await _run_in_executor(self.executor, action.execute, ctx)
         except Exception as e:
             return e
@@ -2,6 +2,7 @@ from typing import List, Optional
 
 from fractal.core.process.action import Action, AsyncAction
 from fractal.core.process.process_context import ProcessContext
+from fractal.core.utils.event_loop import run_coroutine
 
 
 class Process:
@@ -63,7 +64,8 @@ class AsyncProcess:
     def run(self, ctx: Optional[ProcessContext] = None) -> ProcessContext:
         """Sync wrapper for async execution.
 
-        Allows AsyncProcess to be used in sync contexts.
+        Allows AsyncProcess to be used in sync contexts, also from within a
+        running event loop (see run_coroutine).
 
         Args:
             ctx: Initial ProcessContext (optional)
@@ -71,6 +73,4 @@ class AsyncProcess:
         Returns:
             Final ProcessContext after all actions executed
         """
-        import asyncio
-
-        return asyncio.run(self.run_async(ctx))
+        return run_coroutine(self.run_async(ctx))
@@ -1,5 +1,26 @@
 import copy as copy_module
-from typing import Dict, Optional
+from collections import ChainMap
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Dict, Mapping, Optional, Set
+from uuid import UUID
+
+# Values of these types cannot be changed in place, reading them doesn't dirty a key
+_IMMUTABLE_TYPES = (
+    type(None),
+    bool,
+    int,
+    float,
+    complex,
+    str,
+    bytes,
+    Decimal,
+    UUID,
+    date,
+    datetime,
+    time,
+    timedelta,
+)
 
 
 class AttributeDict(dict):
@@ -111,12 +132,30 @@ def _deep_merge(target: dict, source: dict) -> dict:
     return target
 
 
+def _copy_containers(value):
+    """Copy nested dicts, lists and sets, the other values in them are shared."""
+    if type(value) in (dict, AttributeDict):
+        return type(value)((k, _copy_containers(v)) for k, v in value.items())
+    if type(value) is list:
+        return [_copy_containers(v) for v in value]
+    if type(value) is set:
+        return set(value)
+    return value
+
+
 class ProcessContext:
     """Process execution context with safe state management.
 
     Provides a dict-like interface for passing state between actions in a Process.
     Supports deep copying for parallel execution and optional freezing for immutability.
     Supports dot notation in initialization for nested structures.
+
+    The context tracks its dirty keys: keys written since it was created or copied,
+    and keys of which a mutable value was read, as it may have been changed in place.
+    update() only merges the dirty keys of the other context, and nothing at all
+    when an action returns the context it was given.
+
+    branch() forks a copy-on-write context for parallel execution, see its docs.
     """
 
     def __init__(self, data: Optional[Dict] = None):
@@ -136,6 +175,40 @@ class ProcessContext:
         else:
             self._data = {}
         self._locked = False
+        # Ordered set of the dirty keys, all initial keys are new to other contexts
+        self._dirty: Dict[str, None] = dict.fromkeys(self._data)
+        # Data of the parent context, shared read-only when this is a branch
+        self._shared: Optional[Mapping] = None
+        # Keys of a branch with a value of its own, that may be changed in place
+        self._detached: Set[str] = set()
+
+    def _own(self, key):
+        """Copy the containers of a value shared with the parent into the overlay."""
+        overlay = self._data.maps[0]
+        if key not in overlay and key in self._shared:
+            overlay[key] = _copy_containers(self._shared[key])
+        return overlay.get(key)
+
+    def detach(self, key):
+        """Deep-copy a value shared with the parent into the overlay of this branch.
+
+        Call it before changing objects in the value in place, copies of its
+        containers still share these with the parent. No-op when this is no branch.
+        """
+        if self._shared is None or key in self._detached:
+            return
+        self._detached.add(key)
+        if key in self._shared:
+            overlay = self._data.maps[0]
+            overlay[key] = copy_module.deepcopy(overlay.get(key, self._shared[key]))
+
+    def _read(self, key, value):
+        """Mark the key dirty when its value could be changed in place."""
+        if not isinstance(value, _IMMUTABLE_TYPES):
+            self._dirty[key] = None
+            if self._shared is not None and key in self._data:
+                return self._own(key)
+        return value
 
     def __getattr__(self, item):
         """Allow attribute-style access for convenience: ctx.field_name
@@ -147,7 +220,7 @@ class ProcessContext:
             raise AttributeError(
                 f"'{type(self).__name__}' object has no attribute '{item}'"
             )
-        return self._data.get(item)
+        return self._read(item, self._data.get(item))
 
     def __getitem__(self, item):
         """Get item with dict-like access: ctx["key"]
@@ -155,7 +228,7 @@ class ProcessContext:
         Raises KeyError if key doesn't exist (standard dict behavior).
         Use .get() for optional access with defaults.
         """
-        return self._data[item]
+        return self._read(item, self._data[item])
 
     def __setitem__(self, key, value):
         """Set item: ctx["key"] = value
@@ -165,6 +238,9 @@ class ProcessContext:
         if self._locked:
             raise RuntimeError("Cannot modify frozen ProcessContext")
         self._data[key] = value
+        self._dirty[key] = None
+        if self._shared is not None:
+            self._detached.add(key)
 
     def __contains__(self, key):
         """Check if key exists: "key" in ctx"""
@@ -173,7 +249,7 @@ class ProcessContext:
     def __repr__(self):
         """String representation showing internal data."""
         frozen_marker = " (frozen)" if self._locked else ""
-        return f"ProcessContext({self._data!r}){frozen_marker}"
+        return f"ProcessContext({dict(self._data)!r}){frozen_marker}"
 
     def get(self, key, default=None):
         """Get value with optional default.
@@ -185,13 +261,14 @@ class ProcessContext:
         Returns:
             Value for key, or default if key not found
         """
-        return self._data.get(key, default)
+        return self._read(key, self._data.get(key, default))
 
     def update(self, ctx: "ProcessContext") -> "ProcessContext":
         """Merge another context into this one with deep merging.
 
         Recursively merges nested dicts from ctx into this context.
         Non-dict values from ctx overwrite values in this context.
+        Only the dirty keys of ctx are merged, merging a context into itself is a no-op.
 
         Args:
             ctx: Context to merge from
@@ -204,7 +281,15 @@ class ProcessContext:
         """
         if self._locked:
             raise RuntimeError("Cannot modify frozen ProcessContext")
-        _deep_merge(self._data, ctx._data)
+        if ctx is self:
+            return self
+        data = ctx._data
+        changes = {key: data[key] for key in ctx._dirty if key in data}
+        if self._shared is not None:
+            for key in changes:
+                self._own(key)
+        _deep_merge(self._data, changes)
+        self._dirty.update(dict.fromkeys(changes))
         return self
 
     def copy(self) -> "ProcessContext":
@@ -213,9 +298,30 @@ class ProcessContext:
         Useful for parallel execution where each branch needs isolated state.
 
         Returns:
-            New ProcessContext with deep-copied data
+            New ProcessContext with deep-copied data, without dirty keys
         """
-        return ProcessContext(copy_module.deepcopy(self._data))
+        copied = ProcessContext(copy_module.deepcopy(self._data))
+        copied._dirty.clear()
+        return copied
+
+    def branch(self) -> "ProcessContext":
+        """Fork a copy-on-write context, in O(1) whatever the size of this context.
+
+        The branch shares the data of this context read-only, writes go to an overlay
+        of the branch. Dicts, lists and sets are copied into the overlay when the
+        branch reads them, other objects (like `fractal.context`) stay shared until
+        detach() deep-copies them, as setting a dotted path (`order.status`) does.
+        Merge the branch back with update(), which merges its overlay only, so of
+        branches changing the same key the last one merged wins. This context must
+        not be changed while the branch is in use.
+
+        Returns:
+            New ProcessContext on top of this one
+        """
+        branch = ProcessContext()
+        branch._shared = self._data
+        branch._data = ChainMap(branch._data, self._data)
+        return branch
 
     def freeze(self) -> "ProcessContext":
         """Make this context immutable.
@@ -243,8 +349,14 @@ class ProcessContext:
 
     def values(self):
         """Get all values in context."""
+        self._read_all()
         return self._data.values()
 
     def items(self):
         """Get all key-value pairs in context."""
+        self._read_all()
         return self._data.items()
+
+    def _read_all(self):
+        for key in list(self._data):
+            self._read(key, self._data[key])
@@ -186,9 +186,26 @@ class ApplicationContext(object):
             setattr(self, name, _service())
 
     def load_event_publisher(self):
-        from fractal.core.event_sourcing.event_publisher import EventPublisher
+        from fractal.core.event_sourcing.event_publisher import (
+            EventPublisher,
+            QueuedEventPublisher,
+        )
 
-        self.event_publisher = EventPublisher(self.load_event_projectors())
+        if isinstance(self.event_publisher, QueuedEventPublisher):
+            self.event_publisher.close()
+
+        if getattr(self.settings, "EVENT_PUBLISHER_QUEUED", False):
+            self.event_publisher = QueuedEventPublisher(
+                self.load_event_projectors(),
+                maxsize=getattr(self.settings, "EVENT_PUBLISHER_QUEUE_SIZE", 1000),
+                backpressure=getattr(
+                    self.settings,
+                    "EVENT_PUBLISHER_BACKPRESSURE",
+                    QueuedEventPublisher.BLOCK,
+                ),
+            )
+        else:
+            self.event_publisher = EventPublisher(self.load_event_projectors())
 
     def load_event_projectors(self):
         from fractal.core.event_sourcing.event import (
@@ -0,0 +1,51 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Coroutine, Optional, TypeVar
+
+T = TypeVar("T")
+
+_local = threading.local()
+_background_loop: Optional[asyncio.AbstractEventLoop] = None
+_lock = threading.Lock()
+
+
+def _thread_loop() -> asyncio.AbstractEventLoop:
+    """The event loop of this thread, kept for the next call."""
+    loop = getattr(_local, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = _local.loop = asyncio.new_event_loop()
+    return loop
+
+
+def get_background_loop() -> asyncio.AbstractEventLoop:
+    """The shared event loop, running forever in a daemon thread."""
+    global _background_loop
+    if _background_loop is None:
+        with _lock:
+            if _background_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="fractal-event-loop", daemon=True
+                ).start()
+                _background_loop = loop
+    return _background_loop
+
+
+def run_coroutine(coroutine: Coroutine[Any, Any, T]) -> T:
+    """Run the coroutine to completion from sync code, unlike `asyncio.run`
+    also when called from within a running event loop.
+
+    Without a running loop, the coroutine runs on a long-lived loop of the calling
+    thread, instead of a new loop per call. Within a running loop, which cannot be
+    blocked on itself, it runs on the shared background loop (or on a loop of its own
+    when called from the background loop), the caller blocks until it is done.
+    """
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        return _thread_loop().run_until_complete(coroutine)
+    if running is _background_loop:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coroutine).result()
+    return asyncio.run_coroutine_threadsafe(coroutine, get_background_loop()).result()
@@ -0,0 +1,119 @@
+import json
+from abc import ABC, abstractmethod
+from json import JSONEncoder
+from typing import Any, Callable, Hashable, Optional, Type, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+class JsonCodec(ABC):
+    """Dump and load JSON, as `str`, or as `bytes` with `as_bytes`.
+
+    Types JSON doesn't know are passed to `json_encoder().default`, like `json.dumps`
+    does with `cls=json_encoder`.
+    """
+
+    def __init__(
+        self, json_encoder: Optional[Type[JSONEncoder]] = None, as_bytes: bool = False
+    ):
+        self.json_encoder = json_encoder
+        self.as_bytes = as_bytes
+
+    @property
+    def cache_key(self) -> Hashable:
+        return self.__class__, self.json_encoder, self.as_bytes
+
+    def _default(self) -> Optional[Callable[[Any], Any]]:
+        return self.json_encoder().default if self.json_encoder else None
+
+    @abstractmethod
+    def dumps(self, obj: Any) -> Union[str, bytes]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def loads(self, data: Union[str, bytes]) -> Any:
+        raise NotImplementedError
+
+
+class StdlibJsonCodec(JsonCodec):
+    def __init__(
+        self, json_encoder: Optional[Type[JSONEncoder]] = None, as_bytes: bool = False
+    ):
+        super(StdlibJsonCodec, self).__init__(json_encoder, as_bytes)
+        self._encoder = (json_encoder or JSONEncoder)()
+
+    def dumps(self, obj: Any) -> Union[str, bytes]:
+        data = self._encoder.encode(obj)
+        return data.encode() if self.as_bytes else data
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    """With a `json_encoder`, datetimes and dataclasses are passed to it like
+    `json.dumps` does, instead of being serialized by orjson."""
+
+    def __init__(
+        self, json_encoder: Optional[Type[JSONEncoder]] = None, as_bytes: bool = False
+    ):
+        if orjson is None:
+            raise ImportError("OrjsonCodec requires orjson to be installed")
+        super(OrjsonCodec, self).__init__(json_encoder, as_bytes)
+        self._hook = self._default()
+        self._option = orjson.OPT_NON_STR_KEYS
+        if json_encoder:
+            self._option |= (
+                orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+            )
+
+    def dumps(self, obj: Any) -> Union[str, bytes]:
+        data = orjson.dumps(obj, default=self._hook, option=self._option)
+        return data if self.as_bytes else data.decode()
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return orjson.loads(data)
+
+
+class MsgspecJsonCodec(JsonCodec):
+    """msgspec serializes datetimes, dataclasses and decimals itself, `json_encoder`
+    only gets the other types. UTC datetimes end in "Z", which
+    `datetime.fromisoformat` only parses since Python 3.11."""
+
+    def __init__(
+        self, json_encoder: Optional[Type[JSONEncoder]] = None, as_bytes: bool = False
+    ):
+        if msgspec is None:
+            raise ImportError("MsgspecJsonCodec requires msgspec to be installed")
+        super(MsgspecJsonCodec, self).__init__(json_encoder, as_bytes)
+        self._encoder = msgspec.json.Encoder(enc_hook=self._default())
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, obj: Any) -> Union[str, bytes]:
+        data = self._encoder.encode(obj)
+        return data if self.as_bytes else data.decode()
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return self._decoder.decode(data)
+
+
+def get_json_codec(
+    json_encoder: Optional[Type[JSONEncoder]] = None, as_bytes: bool = False
+) -> JsonCodec:
+    """The fastest codec available: orjson, msgspec, or else the stdlib.
+
+    msgspec is only used without a `json_encoder`, as it can't pass every type to it.
+    """
+    if orjson is not None:
+        return OrjsonCodec(json_encoder, as_bytes)
+    if msgspec is not None and json_encoder is None:
+        return MsgspecJsonCodec(json_encoder, as_bytes)
+    return StdlibJsonCodec(json_encoder, as_bytes)
@@ -0,0 +1,73 @@
+import pytest
+
+
+@pytest.fixture
+def publisher():
+    from fractal.contrib.gcp.pubsub.fake import InMemoryPublisherClient
+
+    return InMemoryPublisherClient(topics=["projects/test/topics/fake-events"])
+
+
+def test_pubsub_projector_caches_topics(publisher, sending_event):
+    from fractal.contrib.gcp.pubsub.projectors import PubSubEventBusProjector
+
+    projector = PubSubEventBusProjector("test", topic="fake", publisher=publisher)
+    for _ in range(3):
+        projector.project("1", sending_event)
+
+    assert publisher.list_topics_calls == 1
+    assert len(publisher.messages["projects/test/topics/fake-events"]) == 3
+
+
+def test_pubsub_projector_refreshes_topics_after_ttl(publisher, sending_event):
+    from fractal.contrib.gcp.pubsub.projectors import PubSubEventBusProjector
+
+    projector = PubSubEventBusProjector(
+        "test", topic="fake", publisher=publisher, topic_cache_ttl=0
+    )
+    projector.project("1", sending_event)
+    projector.project("2", sending_event)
+
+    assert publisher.list_topics_calls == 2
+
+
+def test_pubsub_projector_non_blocking(publisher, sending_event):
+    from fractal.contrib.gcp.pubsub.projectors import PubSubEventBusProjector
+
+    projector = PubSubEventBusProjector(
+        "test", topic="fake", publisher=publisher, wait_for_publish=False
+    )
+    projector.project("1", sending_event)
+
+    assert projector.flush(timeout=1)
+    assert len(publisher.messages["projects/test/topics/fake-events"]) == 1
+    assert projector.failed == 0
+
+
+def test_pubsub_projector_non_blocking_failure(publisher, sending_event):
+    from fractal.contrib.gcp.pubsub.projectors import PubSubEventBusProjector
+
+    publisher.fail = True
+    projector = PubSubEventBusProjector(
+        "test", topic="fake", publisher=publisher, wait_for_publish=False
+    )
+    projector.project("1", sending_event)
+
+    assert projector.flush(timeout=1)
+    assert projector.failed == 1
+
+
+def test_pubsub_projector_envelope_codec(publisher, sending_event):
+    from fractal.contrib.gcp.pubsub.projectors import PubSubEventBusProjector
+    from fractal.core.event_sourcing.envelopes import BinaryEnvelopeCodec
+
+    codec = BinaryEnvelopeCodec()
+    projector = PubSubEventBusProjector(
+        "test", topic="fake", publisher=publisher, envelope_codec=codec
+    )
+    projector.project("1", sending_event)
+
+    (body,) = publisher.messages["projects/test/topics/fake-events"]
+    message = codec.decode(body)
+    assert message.event == sending_event.__class__.__name__
+    assert message.data["id"] == sending_event.id
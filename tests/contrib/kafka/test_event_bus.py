@@ -0,0 +1,184 @@
+import threading
+from collections import namedtuple
+
+import pytest
+
+pytest.importorskip("kafka")
+
+Record = namedtuple("Record", "topic partition offset headers value")
+TopicPartition = namedtuple("TopicPartition", "topic partition")
+
+
+class FakeConsumer:
+    def __init__(self, listener, batches, commit_error=None):
+        self.listener = listener
+        self.batches = list(batches)
+        self.commit_error = commit_error
+        self.seeks = []
+        self.commits = 0
+        self.closed = False
+
+    def poll(self, timeout_ms):
+        if not self.batches:
+            self.listener.stop()
+            return {}
+        return self.batches.pop(0)
+
+    def seek(self, partition, offset):
+        self.seeks.append((partition, offset))
+
+    def commit(self):
+        self.commits += 1
+        if self.commit_error:
+            raise self.commit_error
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def listener():
+    from fractal.contrib.kafka.event_bus import KafkaEventBusListener
+
+    return KafkaEventBusListener(
+        None,
+        "localhost",
+        9092,
+        "",
+        "",
+        "test",
+        "Order",
+        [],
+        group_id="test",
+        retry_backoff_ms=1,
+        max_retry_backoff_ms=1,
+    )
+
+
+def run(listener, monkeypatch, batches, **kwargs):
+    from fractal.contrib.kafka import event_bus
+
+    consumer = FakeConsumer(listener, batches, **kwargs)
+    monkeypatch.setattr(event_bus, "KafkaConsumer", lambda *args, **kw: consumer)
+    listener.run()
+    return consumer
+
+
+def records(partition, *offsets):
+    return [Record(partition.topic, partition.partition, o, [], b"") for o in offsets]
+
+
+def test_partitions_handled_in_order_by_own_worker(listener, monkeypatch):
+    first, second = TopicPartition("t", 0), TopicPartition("t", 1)
+    handled = []
+
+    def handle(record):
+        handled.append((record.partition, record.offset, threading.current_thread()))
+
+    listener.handle = handle
+    consumer = run(
+        listener,
+        monkeypatch,
+        [{first: records(first, 0, 1, 2), second: records(second, 0, 1)}],
+    )
+
+    assert [o for p, o, _ in handled if p == 0] == [0, 1, 2]
+    assert [o for p, o, _ in handled if p == 1] == [0, 1]
+    assert len({t for p, _, t in handled if p == 0}) == 1
+    assert {t for p, _, t in handled if p == 0} != {t for p, _, t in handled if p == 1}
+    assert consumer.commits == 1
+    assert consumer.seeks == []
+    assert consumer.closed
+
+
+def test_failed_record_retried(listener, monkeypatch):
+    partition = TopicPartition("t", 0)
+    attempts = []
+
+    def handle(record):
+        attempts.append(record.offset)
+        if len(attempts) < 3:
+            raise RuntimeError("failed")
+
+    listener.handle = handle
+    consumer = run(listener, monkeypatch, [{partition: records(partition, 0, 1)}])
+
+    assert attempts == [0, 0, 0, 1]
+    assert consumer.seeks == []
+    assert consumer.commits == 1
+
+
+def test_failing_record_dead_lettered_and_skipped(listener, monkeypatch):
+    partition = TopicPartition("t", 0)
+    handled, dead_letters = [], []
+
+    def handle(record):
+        if record.offset == 0:
+            raise RuntimeError("failed")
+        handled.append(record.offset)
+
+    listener.handle = handle
+    listener.dead_letter_hook = lambda record, e: dead_letters.append(
+        (record.offset, str(e))
+    )
+    consumer = run(listener, monkeypatch, [{partition: records(partition, 0, 1)}])
+
+    assert dead_letters == [(0, "failed")]
+    assert handled == [1]
+    assert consumer.seeks == []
+    assert consumer.commits == 1
+
+
+def test_failing_record_without_dead_letter_hook_rewound(listener, monkeypatch):
+    partition = TopicPartition("t", 0)
+    attempts, handled = [], []
+
+    def handle(record):
+        if record.offset == 0:
+            attempts.append(record.offset)
+            if len(attempts) < 6:
+                raise RuntimeError("failed")
+        handled.append(record.offset)
+
+    listener.handle = handle
+    consumer = run(
+        listener,
+        monkeypatch,
+        [{partition: records(partition, 0, 1)}, {partition: records(partition, 0, 1)}],
+    )
+
+    assert len(attempts) == 6
+    assert handled == [0, 1]
+    assert consumer.seeks == [(partition, 0)]
+    assert consumer.commits == 2
+
+
+def test_stop_during_retry_rewinds_partition(listener, monkeypatch):
+    partition = TopicPartition("t", 0)
+
+    def handle(record):
+        listener.stop()
+        raise RuntimeError("failed")
+
+    listener.handle = handle
+    consumer = run(listener, monkeypatch, [{partition: records(partition, 5, 6)}])
+
+    assert consumer.seeks == [(partition, 5)]
+
+
+def test_commit_failure_keeps_listening(listener, monkeypatch):
+    from kafka.errors import CommitFailedError
+
+    partition = TopicPartition("t", 0)
+    handled = []
+
+    listener.handle = lambda record: handled.append(record.offset)
+    consumer = run(
+        listener,
+        monkeypatch,
+        [{partition: records(partition, 0)}, {partition: records(partition, 1)}],
+        commit_error=CommitFailedError("rebalanced"),
+    )
+
+    assert handled == [0, 1]
+    assert consumer.commits == 2
@@ -0,0 +1,108 @@
+import pytest
+
+pytest.importorskip("kafka")
+
+
+class FakeProducer:
+    def __init__(self, **config):
+        self.config = config
+        self.sent = []
+        self.flushes = 0
+        self.closed = False
+
+    def send(self, topic, key, value, headers):
+        self.sent.append((topic, key, value, dict(headers)))
+
+    def flush(self, timeout=None):
+        self.flushes += 1
+
+    def close(self, timeout=None):
+        self.closed = True
+
+
+@pytest.fixture
+def producers(monkeypatch):
+    from fractal.contrib.kafka import projectors
+
+    producers = []
+
+    def producer(**config):
+        producers.append(FakeProducer(**config))
+        return producers[-1]
+
+    monkeypatch.setattr(projectors, "KafkaProducer", producer)
+    return producers
+
+
+@pytest.fixture
+def projector(sending_event):
+    from fractal.contrib.kafka.projectors import KafkaEventBusProjector
+
+    return KafkaEventBusProjector(
+        "localhost", 9092, "", "", "test", "Order", [sending_event.__class__]
+    )
+
+
+def test_producer_created_lazily_once(producers, projector, sending_event):
+    assert producers == []
+
+    projector.project("1", sending_event)
+    projector.project("2", sending_event)
+
+    (producer,) = producers
+    assert producer.config["bootstrap_servers"] == "localhost:9092"
+    assert producer.config["linger_ms"] == 5
+    assert len(producer.sent) == 2
+
+
+def test_producer_shared_between_threads(producers, projector):
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        used = set(executor.map(lambda _: id(projector.producer), range(32)))
+
+    assert len(producers) == 1
+    assert used == {id(producers[0])}
+
+
+def test_send_keyed_by_aggregate(producers, projector, sending_event):
+    from fractal.core.event_sourcing.envelopes import LegacyJsonEnvelopeCodec
+
+    projector.project("1", sending_event)
+
+    ((topic, key, value, headers),) = producers[0].sent
+    assert topic == "test.Order"
+    assert key == str(sending_event.aggregate_root_id).encode()
+    assert headers == {"content-type": b"application/json"}
+    assert LegacyJsonEnvelopeCodec().decode(value).data["id"] == sending_event.id
+
+
+def test_unmapped_event_not_sent(producers, projector, not_mapped_sending_event):
+    projector.project("1", not_mapped_sending_event)
+
+    assert producers == []
+
+
+def test_project_many_flushes_once(producers, projector, sending_event):
+    from fractal.core.event_sourcing.event_stream import EventStream
+
+    projector.project_many(EventStream(events=[sending_event, sending_event]))
+
+    assert len(producers[0].sent) == 2
+    assert producers[0].flushes == 1
+
+
+def test_flush_and_close_without_producer(producers, projector):
+    projector.flush()
+    projector.close()
+
+    assert producers == []
+
+
+def test_close_recreates_producer(producers, projector, sending_event):
+    projector.project("1", sending_event)
+    projector.close()
+    projector.project("2", sending_event)
+
+    assert producers[0].closed
+    assert len(producers) == 2
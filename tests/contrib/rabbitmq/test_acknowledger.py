@@ -0,0 +1,134 @@
+import pytest
+
+
+class FakeConnection:
+    def __init__(self):
+        self.callbacks = []
+        self.timers = []
+
+    def add_callback_threadsafe(self, callback):
+        self.callbacks.append(callback)
+
+    def call_later(self, delay, callback):
+        self.timers.append((delay, callback))
+
+    def process_callbacks(self):
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def fire_timers(self):
+        timers, self.timers = self.timers, []
+        for _, callback in timers:
+            callback()
+
+
+class FakeChannel:
+    def __init__(self):
+        self.acks = []
+        self.nacks = []
+
+    def basic_ack(self, delivery_tag, multiple=False):
+        self.acks.append((delivery_tag, multiple))
+
+    def basic_nack(self, delivery_tag):
+        self.nacks.append(delivery_tag)
+
+
+@pytest.fixture
+def connection():
+    return FakeConnection()
+
+
+@pytest.fixture
+def channel():
+    return FakeChannel()
+
+
+def acknowledger(connection, channel, **kwargs):
+    from fractal.contrib.rabbitmq.acknowledger import (
+        DeliveryAcknowledger,
+        ListenerMetrics,
+    )
+
+    return DeliveryAcknowledger(connection, channel, ListenerMetrics("q"), **kwargs)
+
+
+def deliver(acknowledger, *results):
+    for delivery_tag, success in results:
+        acknowledger.delivered()
+        acknowledger.done(delivery_tag, success)
+
+
+def test_flush_on_count(connection, channel):
+    acks = acknowledger(connection, channel, batch_size=3)
+
+    deliver(acks, (2, True), (1, True))
+    connection.process_callbacks()
+
+    assert channel.acks == []
+
+    deliver(acks, (3, True), (4, True))
+    connection.process_callbacks()
+
+    assert channel.acks == [(4, True)]
+    assert len(connection.callbacks) == 0
+
+
+def test_results_coalesced_into_one_callback(connection, channel):
+    acks = acknowledger(connection, channel)
+
+    deliver(acks, (1, True), (2, True), (3, True))
+
+    assert len(connection.callbacks) == 1
+
+
+def test_flush_on_timeout(connection, channel):
+    acks = acknowledger(connection, channel, batch_size=10, max_delay=0.5)
+
+    deliver(acks, (1, True), (2, True))
+    connection.process_callbacks()
+    deliver(acks, (3, True))
+    connection.process_callbacks()
+
+    assert channel.acks == []
+    assert [delay for delay, _ in connection.timers] == [0.5]
+
+    connection.fire_timers()
+
+    assert channel.acks == [(3, True)]
+
+    connection.fire_timers()
+
+    assert channel.acks == [(3, True)]
+
+
+def test_ack_waits_for_lower_delivery_tags(connection, channel):
+    acks = acknowledger(connection, channel, batch_size=1)
+
+    deliver(acks, (2, True), (3, True))
+    connection.process_callbacks()
+
+    assert channel.acks == []
+
+    deliver(acks, (1, True))
+    connection.process_callbacks()
+
+    assert channel.acks == [(3, True)]
+
+
+def test_nack(connection, channel):
+    metrics = []
+    acks = acknowledger(connection, channel, batch_size=2, metrics_hook=metrics.append)
+
+    deliver(acks, (1, True), (2, False), (3, True))
+    connection.process_callbacks()
+
+    assert channel.nacks == [2]
+    assert channel.acks == [(3, True)]
+    assert (acks.metrics.in_flight, acks.metrics.processed, acks.metrics.failed) == (
+        0,
+        2,
+        1,
+    )
+    assert metrics == [acks.metrics]
@@ -0,0 +1,225 @@
+import threading
+import time
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+import pytest
+
+from fractal.core.event_sourcing.event import ReceivingEvent
+
+pytest.importorskip("pika")
+
+
+@dataclass
+class OrderPlaced(ReceivingEvent):
+    id: str
+
+    def to_command(self):
+        return ("place", self.id)
+
+
+@dataclass
+class OrderShipped(ReceivingEvent):
+    id: str
+
+    def to_command(self):
+        return ("ship", self.id)
+
+
+class FakeChannel:
+    def __init__(self, connection):
+        self.connection = connection
+        self.consumers = {}
+        self.acks = []
+        self.nacks = []
+
+    def queue_declare(self, queue, durable):
+        return SimpleNamespace(method=SimpleNamespace(queue=queue))
+
+    def queue_bind(self, exchange, queue):
+        pass
+
+    def basic_qos(self, prefetch_count):
+        self.prefetch_count = prefetch_count
+
+    def basic_consume(self, queue, callback):
+        self.consumers[queue] = callback
+        self.connection.queues[queue] = self
+
+    def basic_ack(self, delivery_tag, multiple=False):
+        self.acks.append((delivery_tag, multiple))
+
+    def basic_nack(self, delivery_tag):
+        self.nacks.append(delivery_tag)
+
+
+class FakeConnection:
+    """Delivers the queued bodies, then stops the listener once all are acked."""
+
+    def __init__(self, deliveries, listener=None):
+        self.deliveries = deliveries
+        self.expected = {queue: len(bodies) for queue, bodies in deliveries.items()}
+        self.listener = listener
+        self.channels = []
+        self.queues = {}
+        self.callbacks = []
+        self.timers = []
+        self.lock = threading.Lock()
+        self.closed = False
+
+    def channel(self):
+        self.channels.append(FakeChannel(self))
+        return self.channels[-1]
+
+    def add_callback_threadsafe(self, callback):
+        with self.lock:
+            self.callbacks.append(callback)
+
+    def call_later(self, delay, callback):
+        self.timers.append(callback)
+
+    def process_data_events(self, time_limit):
+        for queue, bodies in self.deliveries.items():
+            channel = self.queues[queue]
+            for tag, body in enumerate(bodies, start=1):
+                properties = SimpleNamespace(content_type=None)
+                channel.consumers[queue](
+                    channel, SimpleNamespace(delivery_tag=tag), properties, body
+                )
+        self.deliveries = {}
+        with self.lock:
+            callbacks, self.callbacks = self.callbacks, []
+        timers, self.timers = self.timers, []
+        for callback in callbacks + timers:
+            callback()
+        if all(
+            self.queues[queue].acks[-1:] == [(count, True)]
+            for queue, count in self.expected.items()
+        ):
+            self.listener.stop()
+        time.sleep(0.001)
+
+    def close(self):
+        self.closed = True
+
+
+def body(event_class, id):
+    from datetime import datetime, timezone
+
+    from fractal.core.event_sourcing.envelopes import LegacyJsonEnvelopeCodec
+    from fractal.core.event_sourcing.message import Message
+
+    return LegacyJsonEnvelopeCodec().encode(
+        Message(
+            id=id,
+            occurred_on=datetime.now(timezone.utc),
+            event=event_class.__name__,
+            data={"id": id},
+            object_id=id,
+            aggregate_root_id=id,
+        )
+    )
+
+
+class RecordingCommandBus:
+    def __init__(self):
+        self.commands = []
+        self.threads = set()
+
+    def handle(self, command):
+        self.commands.append(command)
+        self.threads.add(threading.current_thread().name)
+
+
+def test_multiplexed_listener_defaults_to_worker_per_queue():
+    from fractal.contrib.rabbitmq.event_bus import RabbitMqMultiplexedEventBusListener
+
+    queues = {"orders_placed": OrderPlaced, "orders_shipped": OrderShipped}
+
+    default = RabbitMqMultiplexedEventBusListener(None, "", 0, "", "", queues)
+    explicit = RabbitMqMultiplexedEventBusListener(
+        None, "", 0, "", "", queues, max_workers=8
+    )
+
+    assert default.max_workers == 2
+    assert explicit.max_workers == 8
+
+
+def test_event_bus_multiplexes_with_worker_per_queue(monkeypatch):
+    from fractal.contrib.rabbitmq import event_bus
+
+    connection = FakeConnection({})
+    listeners = []
+    monkeypatch.setattr(
+        event_bus,
+        "setup_rabbitmq_connection",
+        lambda *args: (connection, connection.channel()),
+    )
+    monkeypatch.setattr(
+        event_bus.RabbitMqEventBus,
+        "_run",
+        staticmethod(lambda bus_listener, use_thread: listeners.append(bus_listener)),
+    )
+
+    event_bus.RabbitMqEventBus(
+        None, "", 0, "", "", "orders", [OrderPlaced, OrderShipped], multiplex=True
+    )
+
+    (listener,) = listeners
+    assert isinstance(listener, event_bus.RabbitMqMultiplexedEventBusListener)
+    assert listener.max_workers == 2
+    assert [queue_listener.queue for queue_listener in listener.listeners] == [
+        "orders_OrderPlaced",
+        "orders_OrderShipped",
+    ]
+
+
+def test_multiplexed_listener_consumes_queues_over_one_connection(monkeypatch):
+    from fractal.contrib.rabbitmq import event_bus
+
+    command_bus = RecordingCommandBus()
+    listener = event_bus.RabbitMqMultiplexedEventBusListener(
+        command_bus,
+        "",
+        0,
+        "",
+        "",
+        {"orders_placed": OrderPlaced, "orders_shipped": OrderShipped},
+    )
+    connection = FakeConnection(
+        {
+            "orders_placed": [body(OrderPlaced, "1"), body(OrderPlaced, "2")],
+            "orders_shipped": [body(OrderShipped, "1")],
+        },
+        listener,
+    )
+    connections = []
+
+    def setup_rabbitmq_connection(*args):
+        connections.append(connection)
+        return connection, connection.channel()
+
+    monkeypatch.setattr(
+        event_bus, "setup_rabbitmq_connection", setup_rabbitmq_connection
+    )
+
+    listener.run()
+
+    assert len(connections) == 1
+    assert connection.closed
+    assert sorted(command_bus.commands) == [
+        ("place", "1"),
+        ("place", "2"),
+        ("ship", "1"),
+    ]
+    assert all(name.startswith("rabbitmq") for name in command_bus.threads)
+    placed, shipped = (
+        connection.queues["orders_placed"],
+        connection.queues["orders_shipped"],
+    )
+    assert placed is not shipped
+    assert placed.acks == [(2, True)]
+    assert shipped.acks == [(1, True)]
+    assert [
+        queue_listener.metrics.processed for queue_listener in listener.listeners
+    ] == [2, 1]
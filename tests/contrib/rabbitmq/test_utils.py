@@ -0,0 +1,165 @@
+import pytest
+
+pytest.importorskip("pika")
+
+
+class FakeChannel:
+    def __init__(self):
+        self.is_open = True
+        self.transactional = False
+        self.rollbacks = 0
+
+    def tx_select(self):
+        self.transactional = True
+
+    def tx_rollback(self):
+        self.rollbacks += 1
+
+
+class FakeConnection:
+    def __init__(self):
+        self.is_open = True
+        self.channel = FakeChannel()
+
+    def close(self):
+        self.is_open = False
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    from fractal.contrib.rabbitmq import utils
+
+    connections = []
+
+    def setup_rabbitmq_connection(host, port, username, password):
+        connection = FakeConnection()
+        connections.append(connection)
+        return connection, connection.channel
+
+    monkeypatch.setattr(utils, "setup_rabbitmq_connection", setup_rabbitmq_connection)
+    return connections
+
+
+def pool(**kwargs):
+    from fractal.contrib.rabbitmq.utils import RabbitMqChannelPool
+
+    return RabbitMqChannelPool("localhost", 5672, "", "", **kwargs)
+
+
+def test_channel_pool_connects_lazily_and_reuses_channels(connections):
+    channels = pool(size=2)
+
+    assert connections == []
+
+    with channels.channel() as first:
+        with channels.channel() as second:
+            assert first is not second
+    with channels.channel() as again:
+        assert again is first  # the most recently returned one
+
+    assert len(connections) == 2
+
+
+def test_channel_pool_limits_channels(connections):
+    import threading
+
+    channels = pool(size=1)
+    entered = threading.Event()
+
+    def use():
+        with channels.channel():
+            entered.set()
+
+    with channels.channel():
+        thread = threading.Thread(target=use)
+        thread.start()
+        assert not entered.wait(0.1)
+    thread.join(1)
+
+    assert entered.is_set()
+    assert len(connections) == 1
+
+
+def test_channel_pool_replaces_closed_channel(connections):
+    channels = pool(size=1)
+    with channels.channel() as channel:
+        channel.is_open = False
+
+    with channels.channel() as channel:
+        assert channel is connections[1].channel
+
+    assert not connections[0].is_open
+
+
+def test_channel_pool_discards_broken_connection(connections):
+    from pika.exceptions import AMQPConnectionError
+
+    channels = pool(size=1)
+    with pytest.raises(AMQPConnectionError):
+        with channels.channel():
+            raise AMQPConnectionError()
+
+    with channels.channel() as channel:
+        assert channel is connections[1].channel
+
+    assert not connections[0].is_open
+
+
+def test_channel_pool_connection_error_discards_idle_connections(connections):
+    from pika.exceptions import AMQPConnectionError
+
+    channels = pool(size=2)
+    with channels.channel():
+        with channels.channel():
+            pass
+    with pytest.raises(AMQPConnectionError):
+        with channels.channel():
+            raise AMQPConnectionError()
+
+    with channels.channel() as channel:
+        assert channel is connections[2].channel
+
+    assert not connections[0].is_open
+    assert not connections[1].is_open
+
+
+def test_channel_pool_channel_error_keeps_idle_connections(connections):
+    from pika.exceptions import AMQPChannelError
+
+    channels = pool(size=2)
+    with channels.channel():
+        with channels.channel():
+            pass
+    with pytest.raises(AMQPChannelError):
+        with channels.channel():
+            raise AMQPChannelError()
+
+    with channels.channel() as channel:
+        assert channel is connections[1].channel
+
+    assert not connections[0].is_open
+    assert connections[1].is_open
+
+
+def test_channel_pool_rolls_back_transaction_on_error(connections):
+    channels = pool(size=1, transactional=True)
+    with pytest.raises(RuntimeError):
+        with channels.channel() as channel:
+            raise RuntimeError()
+
+    assert channel.transactional
+    assert channel.rollbacks == 1
+    with channels.channel() as again:
+        assert again is channel
+
+
+def test_channel_pool_close(connections):
+    channels = pool(size=2)
+    with channels.channel():
+        pass
+    channels.close()
+
+    assert not connections[0].is_open
+    with pytest.raises(RuntimeError):
+        with channels.channel():
+            pass
@@ -0,0 +1,214 @@
+import enum
+import json
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+import pytest
+
+from fractal.core.event_sourcing.event import BasicSendingEvent
+
+
+class Status(str, enum.Enum):
+    PLACED = "placed"
+    SHIPPED = "shipped"
+
+
+@dataclass
+class OrderLine:
+    product_id: UUID
+    price: Decimal
+    quantity: int = 1
+
+
+@dataclass
+class Category:
+    name: str
+    children: List["Category"] = field(default_factory=list)
+
+
+@dataclass
+class OrderPlacedEvent(BasicSendingEvent):
+    id: str
+    placed_on: datetime
+    delivery_date: date
+    lines: List[OrderLine]
+    lines_by_id: Dict[str, OrderLine]
+    gift_line: Optional[OrderLine]
+    status: Status
+    dimensions: Tuple[int, int]
+    category: Category
+    tags: set = field(default_factory=set)
+    note: Optional[str] = None
+    total: Decimal = field(init=False, default=Decimal("0"))
+
+    @property
+    def object_id(self):
+        return self.id
+
+    @property
+    def aggregate_root_id(self):
+        return self.id
+
+    @property
+    def aggregate_root_type(self):
+        return "Order"
+
+
+@dataclass
+class Address:
+    city: str
+
+
+@dataclass
+class ProfileUpdatedEvent:
+    id: str
+    tags: List[str] = None
+    meta: Dict[str, int] = None
+    created: datetime = None
+    address: Address = None
+    status: Status = None
+    visits: List[datetime] = field(default_factory=list)
+
+
+@pytest.fixture
+def order_placed_event():
+    line = OrderLine(product_id=uuid4(), price=Decimal("9.95"), quantity=2)
+    return OrderPlacedEvent(
+        id="1",
+        placed_on=datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        delivery_date=date(2024, 1, 5),
+        lines=[line],
+        lines_by_id={"a": line},
+        gift_line=None,
+        status=Status.PLACED,
+        dimensions=(10, 20),
+        category=Category("books", [Category("fiction")]),
+        tags={"new"},
+    )
+
+
+def test_encode_equals_asdict(order_placed_event):
+    from fractal.core.event_sourcing.codecs import get_event_codec
+
+    encoded = get_event_codec(OrderPlacedEvent).encode(order_placed_event)
+
+    assert encoded == asdict(order_placed_event)
+    assert encoded["lines"] is not order_placed_event.lines
+
+
+def test_decode_round_trip(order_placed_event):
+    from fractal.core.event_sourcing.codecs import get_event_codec
+
+    codec = get_event_codec(OrderPlacedEvent)
+
+    assert codec.decode(codec.encode(order_placed_event)) == order_placed_event
+
+
+def test_decode_from_enhanced_json(order_placed_event):
+    from fractal.core.event_sourcing.codecs import get_event_codec
+    from fractal.core.utils.json_encoder import EnhancedEncoder
+
+    codec = get_event_codec(OrderPlacedEvent)
+    data = json.loads(json.dumps(codec.encode(order_placed_event), cls=EnhancedEncoder))
+
+    decoded = codec.decode(data)
+
+    assert decoded == order_placed_event
+    assert isinstance(decoded.lines[0].product_id, UUID)
+    assert isinstance(decoded.category.children[0], Category)
+    assert decoded.dimensions == (10, 20)
+
+
+def test_decode_uses_defaults(order_placed_event):
+    from fractal.core.event_sourcing.codecs import get_event_codec
+
+    codec = get_event_codec(OrderPlacedEvent)
+    data = codec.encode(order_placed_event)
+    del data["note"]
+    del data["tags"]
+
+    decoded = codec.decode(data)
+
+    assert decoded.note is None
+    assert decoded.tags == set()
+
+
+def test_none_values_without_optional():
+    from fractal.core.event_sourcing.codecs import get_event_codec
+
+    codec = get_event_codec(ProfileUpdatedEvent)
+    event = ProfileUpdatedEvent("1", visits=[None])
+
+    encoded = codec.encode(event)
+
+    assert encoded == asdict(event)
+    assert codec.decode(encoded) == event
+    assert codec.decode(json.loads(json.dumps(encoded))) == event
+
+
+def test_values_of_none_defaulted_fields():
+    from fractal.core.event_sourcing.codecs import get_event_codec
+    from fractal.core.utils.json_encoder import EnhancedEncoder
+
+    codec = get_event_codec(ProfileUpdatedEvent)
+    event = ProfileUpdatedEvent(
+        "1",
+        tags=["a"],
+        meta={"a": 1},
+        created=datetime(2024, 1, 2, tzinfo=timezone.utc),
+        address=Address("Ghent"),
+        status=Status.PLACED,
+    )
+    data = json.loads(json.dumps(codec.encode(event), cls=EnhancedEncoder))
+
+    assert codec.encode(event) == asdict(event)
+    assert codec.decode(data) == event
+
+
+def test_subclass_field_round_trip(sending_event):
+    from fractal.core.command_bus.command import Command
+    from fractal.core.event_sourcing.codecs import get_event_codec
+
+    @dataclass
+    class TransferCommand(Command):
+        amount: int
+
+    codec = get_event_codec(sending_event.__class__)
+    event = sending_event.__class__(TransferCommand(5), "1")
+
+    encoded = codec.encode(event)
+
+    assert encoded == asdict(event) == {"command": {"amount": 5}, "id": "1"}
+    assert codec.decode(encoded).command == {"amount": 5}
+    assert codec.decode(codec.encode(sending_event)) == sending_event
+
+
+def test_codec_is_cached():
+    from fractal.core.event_sourcing.codecs import get_event_codec
+
+    assert get_event_codec(OrderLine) is get_event_codec(OrderLine)
+
+
+def test_codec_requires_dataclass():
+    from fractal.core.event_sourcing.codecs import get_event_codec
+
+    with pytest.raises(TypeError):
+        get_event_codec(Status)
+
+
+def test_json_event_store_restores_types(
+    inmemory_event_store_repository, order_placed_event
+):
+    from fractal.core.event_sourcing.event_store import JsonEventStore
+    from fractal.core.event_sourcing.event_stream import EventStream
+    from fractal.core.utils.json_encoder import EnhancedEncoder
+
+    event_store = JsonEventStore(
+        inmemory_event_store_repository, [OrderPlacedEvent], EnhancedEncoder
+    )
+    event_store.commit(EventStream(events=[order_placed_event]), "Order", None)
+
+    assert event_store.get_event_stream().events == [order_placed_event]
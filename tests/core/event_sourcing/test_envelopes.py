@@ -0,0 +1,92 @@
+import pytest
+
+
+@pytest.fixture
+def message():
+    from datetime import datetime, timezone
+
+    from fractal.core.event_sourcing.message import Message
+
+    return Message(
+        id="1",
+        occurred_on=datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        event="ProductRenamedEvent",
+        data={"id": "p1", "name": "näme", "tags": ["a", "b"]},
+        object_id="p1",
+        aggregate_root_id="p1",
+        version=3,
+    )
+
+
+@pytest.mark.parametrize(
+    "codec_class",
+    ["LegacyJsonEnvelopeCodec", "JsonEnvelopeCodec", "BinaryEnvelopeCodec"],
+)
+def test_envelope_round_trip(message, codec_class):
+    from dataclasses import replace
+
+    from fractal.core.event_sourcing import envelopes
+
+    codec = getattr(envelopes, codec_class)()
+
+    body = codec.encode(message)
+
+    assert isinstance(body, bytes)
+    if codec_class == "LegacyJsonEnvelopeCodec":
+        message = replace(message, version=0)
+    assert envelopes.get_envelope_codec(codec.content_type).decode(body) == message
+
+
+def test_legacy_envelope_is_double_encoded(message):
+    import json
+
+    from fractal.core.event_sourcing.envelopes import LegacyJsonEnvelopeCodec
+
+    envelope = json.loads(LegacyJsonEnvelopeCodec().encode(message))
+
+    assert json.loads(envelope["data"]) == message.data
+
+
+def test_legacy_envelope_without_version(message):
+    import json
+    from dataclasses import asdict
+
+    from fractal.core.event_sourcing.envelopes import LegacyJsonEnvelopeCodec
+    from fractal.core.utils.json_encoder import EnhancedEncoder
+
+    envelope = asdict(message)
+    del envelope["version"]
+    envelope["data"] = json.dumps(message.data, cls=EnhancedEncoder)
+    body = json.dumps(envelope, cls=EnhancedEncoder).encode()
+
+    assert "version" not in json.loads(LegacyJsonEnvelopeCodec().encode(message))
+    assert LegacyJsonEnvelopeCodec().decode(body).version == 0
+    assert LegacyJsonEnvelopeCodec().decode(body).data == message.data
+
+
+def test_get_envelope_codec():
+    from fractal.core.event_sourcing.envelopes import (
+        JsonEnvelopeCodec,
+        LegacyJsonEnvelopeCodec,
+        get_envelope_codec,
+    )
+
+    assert isinstance(get_envelope_codec(None), LegacyJsonEnvelopeCodec)
+    assert isinstance(
+        get_envelope_codec("application/json; charset=utf-8"), LegacyJsonEnvelopeCodec
+    )
+    assert isinstance(
+        get_envelope_codec("application/vnd.fractal.envelope+json"), JsonEnvelopeCodec
+    )
+    with pytest.raises(ValueError):
+        get_envelope_codec("text/plain")
+
+
+def test_binary_envelope_unknown_version(message):
+    from fractal.core.event_sourcing.envelopes import BinaryEnvelopeCodec
+
+    body = bytearray(BinaryEnvelopeCodec().encode(message))
+    body[0] = 99
+
+    with pytest.raises(ValueError):
+        BinaryEnvelopeCodec().decode(bytes(body))
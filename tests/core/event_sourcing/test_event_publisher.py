@@ -1,3 +1,9 @@
+import threading
+import time
+
+import pytest
+
+
 def test_publish_event(event_publisher, sending_event, capsys):
     event_publisher.publish_event(sending_event)
 
@@ -8,3 +14,208 @@ def test_publish_events(event_publisher, sending_event, capsys):
     event_publisher.publish_events([sending_event])
 
     assert sending_event.__class__.__name__ in capsys.readouterr().out
+
+
+class SlowProjector:
+    def __init__(self, delay=0.0, release=None):
+        self.delay = delay
+        self.release = release or threading.Event()
+        if not release:
+            self.release.set()
+        self.events = []
+
+    def project(self, id, event):
+        self.release.wait()
+        time.sleep(self.delay)
+        self.events.append(event)
+
+
+def make_event(sending_event, id):
+    return sending_event.__class__(sending_event.command, id)
+
+
+def test_queued_publish_does_not_block(sending_event):
+    from fractal.core.event_sourcing.event_publisher import QueuedEventPublisher
+
+    projector = SlowProjector(delay=0.05)
+    publisher = QueuedEventPublisher([projector])
+
+    start = time.time()
+    publisher.publish_events([sending_event] * 4)
+    assert time.time() - start < 0.05
+
+    assert publisher.flush(timeout=5)
+    assert len(projector.events) == 4
+    publisher.close()
+
+
+def test_queued_publish_keeps_aggregate_order(sending_event):
+    from fractal.core.event_sourcing.event_publisher import QueuedEventPublisher
+
+    projector = SlowProjector()
+    publisher = QueuedEventPublisher([projector], workers_per_projector=4)
+    events = [make_event(sending_event, str(i % 3)) for i in range(30)]
+    for event in events:
+        publisher.publish_event(event)
+    publisher.close()
+
+    for id in ("0", "1", "2"):
+        assert [e for e in projector.events if e.id == id] == [
+            e for e in events if e.id == id
+        ]
+
+
+def test_queued_publish_drop(sending_event):
+    from fractal.core.event_sourcing.event_publisher import QueuedEventPublisher
+
+    release = threading.Event()
+    projector = SlowProjector(release=release)
+    publisher = QueuedEventPublisher(
+        [projector], maxsize=2, backpressure=QueuedEventPublisher.DROP
+    )
+    publisher.publish_events([sending_event] * 10)
+    release.set()
+    publisher.close()
+
+    # one event in progress and two queued
+    assert len(projector.events) >= 2
+    assert len(projector.events) + publisher.dropped == 10
+
+
+def test_queued_publish_spill(sending_event):
+    from fractal.core.event_sourcing.event_publisher import QueuedEventPublisher
+
+    release = threading.Event()
+    projector = SlowProjector(release=release)
+    spilled = []
+    publisher = QueuedEventPublisher(
+        [projector],
+        maxsize=2,
+        backpressure=QueuedEventPublisher.SPILL,
+        overflow=lambda projector, id, event: spilled.append((projector, event)),
+    )
+    publisher.publish_events([sending_event] * 10)
+    release.set()
+    publisher.close()
+
+    # one event in progress and two queued
+    assert len(projector.events) >= 2
+    assert len(projector.events) + len(spilled) == 10
+    assert publisher.spilled == len(spilled)
+    assert all(p is projector for p, _ in spilled)
+
+
+def test_queued_publish_spill_without_overflow():
+    from fractal.core.event_sourcing.event_publisher import QueuedEventPublisher
+
+    with pytest.raises(ValueError):
+        QueuedEventPublisher([], backpressure=QueuedEventPublisher.SPILL)
+
+
+def test_queued_publish_block(sending_event):
+    from fractal.core.event_sourcing.event_publisher import QueuedEventPublisher
+
+    projector = SlowProjector(delay=0.01)
+    publisher = QueuedEventPublisher([projector], maxsize=1)
+    publisher.publish_events([sending_event] * 5)
+    publisher.close()
+
+    assert len(projector.events) == 5
+    assert publisher.dropped == 0
+
+
+def test_queued_publish_projector_error(sending_event, caplog):
+    from fractal.core.event_sourcing.event_publisher import QueuedEventPublisher
+
+    class FailingProjector:
+        def project(self, id, event):
+            raise ValueError("projector failed")
+
+    projector = SlowProjector()
+    publisher = QueuedEventPublisher([FailingProjector(), projector])
+    publisher.publish_events([sending_event] * 2)
+    publisher.flush()
+
+    assert len(projector.events) == 2
+    assert "projector failed" in caplog.text
+    publisher.close()
+
+
+def test_queued_publish_after_close(sending_event):
+    from fractal.core.event_sourcing.event_publisher import QueuedEventPublisher
+
+    publisher = QueuedEventPublisher([SlowProjector()])
+    publisher.close()
+
+    with pytest.raises(RuntimeError):
+        publisher.publish_event(sending_event)
+
+
+def test_queued_publish_unknown_backpressure():
+    from fractal.core.event_sourcing.event_publisher import QueuedEventPublisher
+
+    with pytest.raises(ValueError):
+        QueuedEventPublisher([], backpressure="unknown")
+
+
+@pytest.mark.asyncio
+async def test_publish_events_async(sending_event, capsys):
+    import asyncio
+
+    from fractal.core.event_sourcing.event_projector import AsyncEventProjector
+    from fractal.core.event_sourcing.event_publisher import EventPublisher
+    from fractal.core.event_sourcing.projectors.print_projector import (
+        PrintEventProjector,
+    )
+
+    class SleepingProjector(AsyncEventProjector):
+        def __init__(self):
+            self.events = []
+
+        async def project_async(self, id, event):
+            await asyncio.sleep(0.05)
+            self.events.append(event)
+
+    projectors = [SleepingProjector(), SleepingProjector()]
+    publisher = EventPublisher([*projectors, PrintEventProjector()])
+
+    start = time.time()
+    await publisher.publish_events_async([sending_event, sending_event])
+    assert time.time() - start < 0.2  # projectors ran concurrently per event
+
+    assert all(p.events == [sending_event, sending_event] for p in projectors)
+    assert capsys.readouterr().out.count(sending_event.__class__.__name__) == 2
+
+
+@pytest.mark.asyncio
+async def test_publish_event_async_does_not_block_loop(sending_event):
+    import asyncio
+
+    from fractal.core.event_sourcing.event_publisher import EventPublisher
+
+    projector = SlowProjector(delay=0.1)
+    ticks = []
+
+    async def tick():
+        for _ in range(5):
+            ticks.append(time.time())
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(
+        EventPublisher([projector]).publish_event_async(sending_event), tick()
+    )
+
+    assert projector.events == [sending_event]
+    assert len(ticks) == 5 and ticks[-1] - ticks[0] < 0.1
+
+
+@pytest.mark.asyncio
+async def test_queued_publish_event_async(sending_event):
+    from fractal.core.event_sourcing.event_publisher import QueuedEventPublisher
+
+    projector = SlowProjector()
+    publisher = QueuedEventPublisher([projector])
+    await publisher.publish_event_async(sending_event)
+    publisher.close()
+
+    assert projector.events == [sending_event]
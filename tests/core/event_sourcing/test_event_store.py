@@ -52,3 +52,309 @@ def test_event_store_get_event_stream_error(event_store, not_mapped_event_stream
 
     with pytest.raises(EventNotMappedError):
         event_store.get_event_stream()
+
+
+@pytest.mark.parametrize("event_store", event_stores)
+def test_event_store_commit_writes_one_batch(event_store, sending_event):
+    from fractal.core.event_sourcing.event_stream import EventStream
+
+    calls = []
+    add_many = event_store.event_store_repository.add_many
+
+    def counting_add_many(messages):
+        calls.append(messages)
+        return add_many(messages)
+
+    event_store.event_store_repository.add_many = counting_add_many
+
+    event_store.commit(EventStream(events=[sending_event] * 3), "test", 1)
+
+    assert len(calls) == 1
+    assert len(calls[0]) == 3
+    assert len(event_store.event_store_repository.entities) == 3
+
+
+def test_inmemory_event_store_repository_add_many(sending_event):
+    from fractal.core.event_sourcing.event_store import (
+        InMemoryEventStoreRepository,
+        ObjectEventStore,
+    )
+    from fractal.core.event_sourcing.event_stream import EventStream
+
+    event_store = ObjectEventStore(InMemoryEventStoreRepository())
+    event_store.commit(EventStream(events=[sending_event] * 3), "test", 1)
+
+    assert len(event_store.event_store_repository.entities) == 3
+    assert len(event_store.get_event_stream().events) == 3
+
+
+@pytest.fixture
+def inmemory_indexed_event_store_repository():
+    from fractal.core.event_sourcing.event_store import InMemoryEventStoreRepository
+
+    return InMemoryEventStoreRepository()
+
+
+event_store_repositories = [
+    pytest.lazy_fixture("inmemory_event_store_repository"),
+    pytest.lazy_fixture("inmemory_indexed_event_store_repository"),
+]
+
+
+@pytest.mark.parametrize("event_store_repository", event_store_repositories)
+def test_event_store_commit_versions_per_aggregate(
+    event_store_repository, sending_event
+):
+    from fractal.core.event_sourcing.event_store import ObjectEventStore
+    from fractal.core.event_sourcing.event_stream import EventStream
+
+    other_event = sending_event.__class__(sending_event.command, "2")
+    event_store = ObjectEventStore(event_store_repository)
+    event_store.commit(EventStream(events=[sending_event, other_event]), "test", 1)
+    event_store.commit(EventStream(events=[sending_event, sending_event]), "test", 2)
+
+    assert event_store_repository.get_version("1") == 3
+    assert event_store_repository.get_version("2") == 1
+    assert [m.version for m in event_store_repository.find_stream("1")] == [1, 2, 3]
+
+
+@pytest.mark.parametrize("event_store_repository", event_store_repositories)
+def test_event_store_commit_version_conflict(event_store_repository, sending_event):
+    from fractal.core.event_sourcing.event_store import (
+        ConcurrencyError,
+        ObjectEventStore,
+    )
+    from fractal.core.event_sourcing.event_stream import EventStream
+
+    event_store = ObjectEventStore(event_store_repository)
+    event_store.commit(EventStream(events=[sending_event]), "test", 1)
+
+    with pytest.raises(ConcurrencyError):
+        event_store.commit(EventStream(events=[sending_event]), "test", 1)
+
+    assert event_store_repository.get_version("1") == 1
+    event_store.commit(EventStream(events=[sending_event]), "test", None)
+    assert event_store_repository.get_version("1") == 2
+
+
+@pytest.mark.parametrize("event_store_repository", event_store_repositories)
+def test_event_store_get_event_stream_for(event_store_repository, sending_event):
+    from fractal.core.event_sourcing.event_store import JsonEventStore
+    from fractal.core.event_sourcing.event_stream import EventStream
+
+    other_event = sending_event.__class__(sending_event.command, "2")
+    event_store = JsonEventStore(event_store_repository, [sending_event.__class__])
+    event_store.commit(
+        EventStream(events=[sending_event, other_event, sending_event]), "test", 1
+    )
+
+    assert len(event_store.get_event_stream_for("1").events) == 2
+    assert len(event_store.get_event_stream_for("1", from_version=2).events) == 1
+    assert event_store.get_event_stream_for("2").events[0].id == "2"
+    assert event_store.get_event_stream_for("3").events == []
+
+
+@pytest.mark.parametrize("event_store", event_stores)
+def test_event_store_iter_events(event_store, sending_event):
+    from fractal.core.event_sourcing.event_stream import EventStream
+
+    events = [sending_event.__class__(sending_event.command, str(i)) for i in range(5)]
+    event_store.commit(EventStream(events=events), "test", None)
+
+    pages = []
+    find = event_store.event_store_repository.find
+
+    def paging_find(specification=None, *, offset=0, limit=0, order_by=""):
+        pages.append((offset, limit))
+        return find(specification, offset=offset, limit=limit, order_by=order_by)
+
+    event_store.event_store_repository.find = paging_find
+
+    iterator = event_store.iter_events(batch_size=2)
+    assert pages == []
+    assert [e.id for e in iterator] == ["0", "1", "2", "3", "4"]
+    # Keyset paging, pages continue after the previous one instead of an offset
+    assert pages[0] == (0, 2)
+    assert all(offset == 0 for offset, _ in pages)
+
+
+@pytest.mark.parametrize(
+    "event_store",
+    [
+        pytest.lazy_fixture("dict_event_store"),
+        pytest.lazy_fixture("json_event_store"),
+    ],
+)
+def test_event_store_iter_events_error(event_store, not_mapped_event_stream):
+    from fractal.core.event_sourcing.event_store import EventNotMappedError
+
+    event_store.commit(not_mapped_event_stream, "test", 1)
+
+    with pytest.raises(EventNotMappedError):
+        list(event_store.iter_events())
+
+
+def test_json_event_store_as_bytes(inmemory_event_store_repository, sending_event):
+    from fractal.core.event_sourcing.event_store import JsonEventStore
+    from fractal.core.event_sourcing.event_stream import EventStream
+
+    event_store = JsonEventStore(
+        inmemory_event_store_repository, [sending_event.__class__], as_bytes=True
+    )
+    event_store.commit(EventStream(events=[sending_event]), "", None)
+
+    (message,) = inmemory_event_store_repository.find()
+    assert isinstance(message.data, bytes)
+    assert event_store.get_event_stream().events == [sending_event]
+
+
+def _messages(count):
+    from datetime import datetime, timedelta
+
+    from fractal.core.event_sourcing.message import Message
+
+    start = datetime(2024, 1, 1)
+    return [
+        Message(
+            id=str(i),
+            occurred_on=start + timedelta(minutes=i % 7),
+            event=f"Event{i % 3}",
+            data={},
+            object_id=str(i % 5),
+            aggregate_root_id=str(i % 4),
+            version=i,
+        )
+        for i in range(count)
+    ]
+
+
+def test_inmemory_event_store_repository_indexes(
+    inmemory_event_store_repository, inmemory_indexed_event_store_repository
+):
+    from datetime import datetime
+
+    from fractal_specifications.generic.operators import (
+        EqualsSpecification,
+        GreaterThanEqualSpecification,
+        GreaterThanSpecification,
+        InSpecification,
+        LessThanEqualSpecification,
+        LessThanSpecification,
+    )
+
+    for repository in (
+        inmemory_event_store_repository,
+        inmemory_indexed_event_store_repository,
+    ):
+        repository.add_many(_messages(50))
+        repository.remove_one(EqualsSpecification("id", "10"))
+
+    moment = datetime(2024, 1, 1, 0, 3)
+    specifications = [
+        None,
+        EqualsSpecification("aggregate_root_id", "1"),
+        EqualsSpecification("object_id", "3"),
+        EqualsSpecification("event", "Event2"),
+        EqualsSpecification("event", "Unknown"),
+        InSpecification("aggregate_root_id", ["1", "2"]),
+        GreaterThanSpecification("occurred_on", moment),
+        GreaterThanEqualSpecification("occurred_on", moment),
+        LessThanSpecification("occurred_on", moment),
+        LessThanEqualSpecification("occurred_on", moment),
+        EqualsSpecification("event", "Event1")
+        & GreaterThanEqualSpecification("occurred_on", moment)
+        & EqualsSpecification("object_id", "2"),
+        EqualsSpecification("object_id", "2") | EqualsSpecification("event", "Event0"),
+    ]
+    for specification in specifications:
+        for kwargs in ({}, {"offset": 3, "limit": 5}, {"order_by": "-version"}):
+            expected = list(
+                inmemory_event_store_repository.find(specification, **kwargs)
+            )
+            assert (
+                list(
+                    inmemory_indexed_event_store_repository.find(
+                        specification, **kwargs
+                    )
+                )
+                == expected
+            ), (specification, kwargs)
+        if specification:
+            assert inmemory_indexed_event_store_repository.count(
+                specification
+            ) == inmemory_event_store_repository.count(specification)
+
+
+def test_inmemory_event_store_repository_indexes_replaced_messages(
+    inmemory_indexed_event_store_repository,
+):
+    from dataclasses import replace
+
+    from fractal_specifications.generic.operators import EqualsSpecification
+
+    repository = inmemory_indexed_event_store_repository
+    message = _messages(1)[0]
+    repository.add(message)
+    repository.update(replace(message, event="Replaced"))
+
+    assert list(repository.find(EqualsSpecification("event", message.event))) == []
+    assert repository.find_one(EqualsSpecification("event", "Replaced")).id == "0"
+    assert len(repository.streams[message.aggregate_root_id]) == 1
+    assert repository.compare_and_swap(
+        replace(message, object_id="other"),
+        expected=EqualsSpecification("event", "Replaced"),
+    )
+    assert repository.count(EqualsSpecification("object_id", "other")) == 1
+    assert repository.count(EqualsSpecification("object_id", message.object_id)) == 0
+
+
+@pytest.mark.parametrize("event_store_repository", event_store_repositories)
+def test_event_store_repository_update_keeps_stream_order(
+    event_store_repository, sending_event
+):
+    from dataclasses import replace
+
+    from fractal.core.event_sourcing.event_store import ObjectEventStore
+    from fractal.core.event_sourcing.event_stream import EventStream
+
+    event_store = ObjectEventStore(event_store_repository)
+    messages = event_store.commit(EventStream(events=[sending_event] * 3), "test", 1)
+
+    event_store_repository.update(replace(messages[0], data={"updated": True}))
+
+    assert [m.version for m in event_store_repository.find_stream("1")] == [1, 2, 3]
+    assert event_store_repository.get_version("1") == 3
+    event_store.commit(EventStream(events=[sending_event]), "test", 4)
+    assert event_store_repository.get_version("1") == 4
+
+
+@pytest.mark.parametrize("event_store_repository", event_store_repositories)
+def test_event_store_repository_iter_messages_with_equal_timestamps(
+    event_store_repository,
+):
+    from datetime import datetime
+
+    from fractal_specifications.generic.operators import EqualsSpecification
+
+    from fractal.core.event_sourcing.message import Message
+
+    occurred_on = [datetime(2024, 1, 1, minute=m) for m in (0, 1, 1, 1, 1, 1, 2, 3)]
+    messages = [
+        Message(str(i), moment, "Event", {}, str(i % 2), "1", i + 1)
+        for i, moment in enumerate(occurred_on)
+    ]
+    # Stored out of order, so pages can't follow the insertion order
+    event_store_repository.add_many(messages[::-1])
+
+    for batch_size in (1, 2, 3, 5, 8, 10):
+        assert list(event_store_repository.iter_messages(batch_size=batch_size)) == (
+            messages
+        )
+    assert (
+        list(
+            event_store_repository.iter_messages(
+                EqualsSpecification("object_id", "1"), batch_size=2
+            )
+        )
+        == messages[1::2]
+    )
@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor
+
+
+def test_aggregates_record_their_own_events(aggregate_root_object, sending_event):
+    other = aggregate_root_object.__class__("2")
+
+    aggregate_root_object.record(sending_event)
+
+    assert aggregate_root_object.release() == [sending_event]
+    assert other.release() == []
+
+
+def test_release_hands_over_the_events(aggregate_root_object, sending_event):
+    aggregate_root_object.record(sending_event).record(sending_event)
+
+    events = aggregate_root_object.release()
+    aggregate_root_object.record(sending_event)
+
+    assert len(events) == 2
+    assert events[0] is sending_event
+    assert aggregate_root_object.release() == [sending_event]
+    assert aggregate_root_object.release() == []
+
+
+def test_release_of_aggregates_in_flight(aggregate_root_object, sending_event):
+    aggregate_class = aggregate_root_object.__class__
+    event_class = sending_event.__class__
+
+    def run(index):
+        aggregate = aggregate_class(str(index))
+        for _ in range(100):
+            aggregate.record(event_class(sending_event.command, str(index)))
+        return index, aggregate.release()
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(run, range(200)))
+
+    for index, events in results:
+        assert len(events) == 100
+        assert {event.id for event in events} == {str(index)}
+
+
+def test_replay_dispatches_per_event_class(account_classes):
+    Account, Deposited, Withdrawn = account_classes
+
+    account = Account.__new__(Account).replay(
+        [Deposited("1", 10), Withdrawn("1", 3), Deposited("1", 5)]
+    )
+
+    assert account == Account("1", 12)
+    assert Account._apply_dispatch == {
+        Deposited: Account.deposited,
+        Withdrawn: Account.withdrawn,
+    }
+
+
+def test_replay_with_overridden_apply_methods(account_classes):
+    import pytest
+
+    from fractal.core.event_sourcing.models import applies
+
+    Account, Deposited, Withdrawn = account_classes
+
+    class FeeAccount(Account):
+        @applies(Withdrawn)
+        def withdrawn(self, event: Withdrawn):
+            self.balance -= event.amount + 1
+
+    class FrozenAccount(Account):
+        def withdrawn(self, event: Withdrawn):
+            pass
+
+    class DepositOnlyAccount(Account):
+        withdrawn = None
+
+    events = [Deposited("1", 10), Withdrawn("1", 3)]
+
+    assert FeeAccount("1").replay(events).balance == 6
+    assert FrozenAccount("1").replay(events).balance == 10
+    with pytest.raises(NotImplementedError):
+        DepositOnlyAccount("1").replay(events)
+
+
+def test_overridden_apply_method_keeps_events(account_classes):
+    from fractal.core.event_sourcing.models import applies
+
+    Account, Deposited, Withdrawn = account_classes
+
+    class DoubleAccount(Account):
+        def deposited(self, event: Deposited):
+            self.balance += 2 * event.amount
+
+    class TripleAccount(DoubleAccount):
+        @applies(Deposited)
+        def tripled(self, event: Deposited):
+            self.balance += 3 * event.amount
+
+    assert DoubleAccount._apply_dispatch[Deposited] is DoubleAccount.deposited
+    assert DoubleAccount("1").replay([Deposited("1", 5)]).balance == 10
+    assert TripleAccount("1").replay([Deposited("1", 5)]).balance == 15
@@ -1,3 +1,6 @@
+import pytest
+
+
 def test_print_event_projector(print_event_projector, sending_event, capsys):
     import uuid
 
@@ -7,3 +10,113 @@ def test_print_event_projector(print_event_projector, sending_event, capsys):
     printed = capsys.readouterr().out
     assert sending_event.__class__.__name__ in printed
     assert id in printed
+
+
+@pytest.mark.asyncio
+async def test_async_print_event_projector(sending_event, capsys):
+    from fractal.core.event_sourcing.projectors.print_projector import (
+        AsyncPrintEventProjector,
+    )
+
+    await AsyncPrintEventProjector().project_async("1", sending_event)
+
+    assert sending_event.__class__.__name__ in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+async def test_async_event_store_projector(
+    inmemory_event_store_repository, sending_event
+):
+    from fractal.core.event_sourcing.event_store import ObjectEventStore
+    from fractal.core.event_sourcing.projectors.event_store_projector import (
+        AsyncEventStoreProjector,
+    )
+
+    event_store = ObjectEventStore(inmemory_event_store_repository)
+    await AsyncEventStoreProjector(event_store).project_async("1", sending_event)
+
+    assert event_store.get_event_stream().events == [sending_event]
+
+
+@pytest.mark.asyncio
+async def test_async_event_store_projector_executor(
+    inmemory_event_store_repository, sending_event
+):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from fractal.core.event_sourcing.event_store import ObjectEventStore
+    from fractal.core.event_sourcing.projectors.event_store_projector import (
+        AsyncEventStoreProjector,
+    )
+    from fractal.core.event_sourcing.serialization import serialization_cache, serialize
+
+    class CachedEventStore(ObjectEventStore):
+        def commit(self, event_stream, aggregate, version):
+            cached.append(serialize(sending_event, "test", lambda e: object()))
+            super(CachedEventStore, self).commit(event_stream, aggregate, version)
+
+    cached = []
+    event_store = CachedEventStore(inmemory_event_store_repository)
+    with ThreadPoolExecutor(thread_name_prefix="projector") as executor:
+        projector = AsyncEventStoreProjector(event_store, executor=executor)
+        with serialization_cache():
+            expected = serialize(sending_event, "test", lambda e: object())
+            await projector.project_async("1", sending_event)
+        threads = {t.name for t in executor._threads}
+
+    assert cached == [expected]
+    assert threads and all(name.startswith("projector") for name in threads)
+    assert event_store.get_event_stream().events == [sending_event]
+
+
+@pytest.fixture
+def async_command_bus_projector(command_bus, async_command_handler, sending_event):
+    from fractal.core.event_sourcing.event import EventCommandMapper
+    from fractal.core.event_sourcing.projectors.command_bus_projector import (
+        AsyncCommandBusProjector,
+    )
+
+    class Mapper(EventCommandMapper):
+        def mappers(self):
+            return {sending_event.__class__: [lambda event: event.command]}
+
+    command_bus.add_handler(async_command_handler)
+    return AsyncCommandBusProjector(lambda: command_bus, [Mapper])
+
+
+@pytest.mark.asyncio
+async def test_async_command_bus_projector(
+    async_command_bus_projector, command_bus, sending_event
+):
+    from unittest.mock import AsyncMock
+
+    command_bus.handle_async = AsyncMock()
+
+    await async_command_bus_projector.project_async("1", sending_event)
+
+    command_bus.handle_async.assert_awaited_once_with(sending_event.command)
+
+
+def test_async_command_bus_projector_sync(
+    async_command_bus_projector, command_bus, sending_event
+):
+    from unittest.mock import AsyncMock
+
+    command_bus.handle_async = AsyncMock()
+
+    async_command_bus_projector.project("1", sending_event)
+
+    command_bus.handle_async.assert_awaited_once_with(sending_event.command)
+
+
+@pytest.mark.asyncio
+async def test_async_command_bus_projector_sync_within_running_loop(
+    async_command_bus_projector, command_bus, sending_event
+):
+    from unittest.mock import AsyncMock
+
+    command_bus.handle_async = AsyncMock()
+
+    async_command_bus_projector.project("1", sending_event)
+
+    command_bus.handle_async.assert_awaited_once_with(sending_event.command)
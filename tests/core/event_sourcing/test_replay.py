@@ -0,0 +1,151 @@
+import pytest
+
+from fractal.core.event_sourcing.event_projector import EventProjector
+
+
+class RecordingProjector(EventProjector):
+    def __init__(self, fail_on: str = ""):
+        self.ids = []
+        self.fail_on = fail_on
+
+    def project(self, id: str, event):
+        if event.id == self.fail_on:
+            raise RuntimeError("crash")
+        self.ids.append(event.id)
+
+
+class OtherRecordingProjector(RecordingProjector):
+    pass
+
+
+@pytest.fixture
+def filled_event_store(json_event_store, sending_event):
+    from fractal.core.event_sourcing.event_stream import EventStream
+
+    json_event_store.commit(
+        EventStream(
+            events=[
+                sending_event.__class__(sending_event.command, str(i)) for i in range(5)
+            ]
+        ),
+        "test",
+        None,
+    )
+    return json_event_store
+
+
+@pytest.fixture
+def checkpoint_repository():
+    from fractal.core.event_sourcing.replay import InMemoryCheckpointRepository
+
+    return InMemoryCheckpointRepository()
+
+
+def test_replay(filled_event_store, checkpoint_repository):
+    from fractal.core.event_sourcing.replay import EventReplayer
+
+    projector = RecordingProjector()
+    result = EventReplayer(
+        filled_event_store, [projector], checkpoint_repository, batch_size=2
+    ).replay()
+
+    assert projector.ids == ["0", "1", "2", "3", "4"]
+    assert result.events == 5
+    assert result.events_per_second > 0
+    assert checkpoint_repository.entities["RecordingProjector"].events == 5
+
+
+def test_replay_resumes_after_crash(filled_event_store, checkpoint_repository):
+    from fractal.core.event_sourcing.replay import EventReplayer
+
+    crashing = RecordingProjector(fail_on="3")
+    with pytest.raises(RuntimeError):
+        EventReplayer(
+            filled_event_store, [crashing], checkpoint_repository, checkpoint_every=1
+        ).replay()
+    assert crashing.ids == ["0", "1", "2"]
+
+    projector = RecordingProjector()
+    result = EventReplayer(
+        filled_event_store, [projector], checkpoint_repository
+    ).replay()
+
+    assert projector.ids == ["3", "4"]
+    assert result.events == 2
+
+
+def test_replay_only_new_events(filled_event_store, checkpoint_repository):
+    from fractal.core.event_sourcing.event_stream import EventStream
+    from fractal.core.event_sourcing.replay import EventReplayer
+
+    projector = RecordingProjector()
+    replayer = EventReplayer(filled_event_store, [projector], checkpoint_repository)
+    replayer.replay()
+    assert replayer.replay().events == 0
+
+    event = filled_event_store.get_event_stream().events[0]
+    filled_event_store.commit(
+        EventStream(events=[event.__class__(event.command, "5")]), "test", None
+    )
+    replayer.replay()
+
+    assert projector.ids == ["0", "1", "2", "3", "4", "5"]
+
+
+def test_replay_new_projector_gets_full_history(
+    filled_event_store, checkpoint_repository
+):
+    from fractal.core.event_sourcing.replay import EventReplayer
+
+    EventReplayer(
+        filled_event_store, [RecordingProjector()], checkpoint_repository
+    ).replay()
+
+    existing, new = RecordingProjector(), OtherRecordingProjector()
+    EventReplayer(filled_event_store, [existing, new], checkpoint_repository).replay()
+
+    assert existing.ids == []
+    assert new.ids == ["0", "1", "2", "3", "4"]
+
+
+def test_replay_reset(filled_event_store, checkpoint_repository):
+    from fractal.core.event_sourcing.replay import EventReplayer
+
+    projector = RecordingProjector()
+    replayer = EventReplayer(filled_event_store, [projector], checkpoint_repository)
+    replayer.replay()
+    replayer.reset()
+    replayer.replay()
+
+    assert len(projector.ids) == 10
+
+
+def test_replay_duplicate_projector_names(filled_event_store, checkpoint_repository):
+    from fractal.core.event_sourcing.replay import EventReplayer
+
+    with pytest.raises(ValueError):
+        EventReplayer(
+            filled_event_store,
+            [RecordingProjector(), RecordingProjector()],
+            checkpoint_repository,
+        )
+
+
+def test_replay_named_projectors(filled_event_store, checkpoint_repository):
+    from fractal.core.event_sourcing.replay import EventReplayer
+
+    first, second = RecordingProjector(fail_on="2"), RecordingProjector()
+    with pytest.raises(RuntimeError):
+        EventReplayer(
+            filled_event_store,
+            {"first": first, "second": second},
+            checkpoint_repository,
+            checkpoint_every=1,
+        ).replay()
+    second.name = "second"
+    EventReplayer(filled_event_store, [second], checkpoint_repository).replay()
+
+    assert first.ids == ["0", "1"]
+    assert second.ids == ["0", "1", "2", "3", "4"]
+    assert checkpoint_repository.entities["first"].events == 2
+    assert checkpoint_repository.entities["second"].events == 5
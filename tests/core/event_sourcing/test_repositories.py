@@ -47,3 +47,87 @@ def test_update_error(event_sourced_repository, regular_object):
 
 def test_is_healthy(event_sourced_repository):
     assert event_sourced_repository.is_healthy()
+
+
+def test_add_tracks_stream_version(
+    event_sourced_repository, aggregate_root_object, sending_event
+):
+    event_sourced_repository.add(aggregate_root_object.record(sending_event))
+    assert aggregate_root_object.stream_version == 1
+
+    event_sourced_repository.add(aggregate_root_object.record(sending_event))
+    assert aggregate_root_object.stream_version == 2
+
+
+def test_add_stale_aggregate_error(
+    event_sourced_repository, aggregate_root_object, sending_event
+):
+    from fractal.core.event_sourcing.event_store import ConcurrencyError
+
+    event_sourced_repository.add(aggregate_root_object.record(sending_event))
+    other = aggregate_root_object.__class__("1")
+    other.stream_version = 1
+    event_sourced_repository.add(other.record(sending_event))
+
+    with pytest.raises(ConcurrencyError):
+        event_sourced_repository.add(aggregate_root_object.record(sending_event))
+
+
+def test_add_rebuilt_aggregates(
+    event_sourced_repository, aggregate_root_object, sending_event
+):
+    event_sourced_repository.add(aggregate_root_object.record(sending_event))
+    for _ in range(2):
+        event_sourced_repository.update(
+            aggregate_root_object.__class__("1").record(sending_event)
+        )
+
+    assert (
+        len(event_sourced_repository.event_store.event_store_repository.entities) == 3
+    )
+
+
+def test_add_existing_aggregate_as_new_error(
+    event_sourced_repository, aggregate_root_object, sending_event
+):
+    from fractal.core.event_sourcing.event_store import ConcurrencyError
+
+    event_sourced_repository.check_new_aggregates = True
+    event_sourced_repository.add(aggregate_root_object.record(sending_event))
+
+    with pytest.raises(ConcurrencyError):
+        event_sourced_repository.add(
+            aggregate_root_object.__class__("1").record(sending_event)
+        )
+
+
+def test_find_by_ids(account_classes):
+    from fractal_specifications.generic.operators import (
+        EqualsSpecification,
+        InSpecification,
+    )
+
+    from fractal.core.event_sourcing.event_store import (
+        InMemoryEventStoreRepository,
+        ObjectEventStore,
+    )
+    from fractal.core.event_sourcing.repositories import EventSourcedRepository
+
+    Account, Deposited, Withdrawn = account_classes
+
+    class AccountRepository(EventSourcedRepository[Account]):
+        entity = Account
+
+    repository = AccountRepository(ObjectEventStore(InMemoryEventStoreRepository()))
+    for id in ("1", "2"):
+        repository.add(
+            Account(id).record(Deposited(id, 10)).record(Withdrawn(id, int(id)))
+        )
+
+    assert repository.find_one(EqualsSpecification("id", "2")) == Account("2", 8)
+    assert list(repository.find(InSpecification("id", ["1", "3", "2"]))) == [
+        Account("1", 9),
+        Account("2", 8),
+    ]
+    with pytest.raises(NotImplementedError):
+        repository.find_one(EqualsSpecification("balance", 9))
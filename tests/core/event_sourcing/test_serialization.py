@@ -0,0 +1,100 @@
+import pytest
+
+
+class AsDictProjector:
+    def __init__(self):
+        self.dicts = []
+
+    def project(self, id, event):
+        from fractal.core.event_sourcing.serialization import event_asdict
+
+        self.dicts.append(event_asdict(event))
+
+
+def test_event_asdict_without_cache(sending_event):
+    from fractal.core.event_sourcing.serialization import event_asdict
+
+    assert event_asdict(sending_event) == event_asdict(sending_event)
+    assert event_asdict(sending_event) is not event_asdict(sending_event)
+
+
+def test_publish_serializes_event_once(sending_event):
+    from unittest.mock import patch
+
+    from fractal.core.event_sourcing import serialization
+    from fractal.core.event_sourcing.event_publisher import EventPublisher
+
+    projectors = [AsDictProjector(), AsDictProjector()]
+    with patch.object(serialization, "_asdict", wraps=serialization._asdict) as spy:
+        EventPublisher(projectors).publish_event(sending_event)
+
+    assert spy.call_count == 1
+    assert projectors[0].dicts[0] is projectors[1].dicts[0]
+
+
+@pytest.mark.asyncio
+async def test_publish_async_serializes_event_once(sending_event):
+    from fractal.core.event_sourcing.event_publisher import EventPublisher
+
+    projectors = [AsDictProjector(), AsDictProjector()]
+    await EventPublisher(projectors).publish_event_async(sending_event)
+
+    assert projectors[0].dicts[0] is projectors[1].dicts[0]
+
+
+def test_queued_publish_serializes_event_once(sending_event):
+    from unittest.mock import patch
+
+    from fractal.core.event_sourcing import serialization
+    from fractal.core.event_sourcing.event_publisher import QueuedEventPublisher
+
+    projectors = [AsDictProjector(), AsDictProjector()]
+    publisher = QueuedEventPublisher(projectors)
+    with patch.object(serialization, "_asdict", wraps=serialization._asdict) as spy:
+        publisher.publish_events([sending_event, sending_event])
+        assert publisher.flush(timeout=1)
+    publisher.close()
+
+    assert spy.call_count == 1
+    assert projectors[0].dicts[0] is projectors[1].dicts[1]
+
+
+def test_serialization_cache_per_key(sending_event):
+    from fractal.core.event_sourcing.serialization import serialization_cache, serialize
+
+    with serialization_cache():
+        assert serialize(sending_event, "a", lambda e: 1) == 1
+        assert serialize(sending_event, "a", lambda e: 2) == 1
+        assert serialize(sending_event, "b", lambda e: 3) == 3
+    assert serialize(sending_event, "a", lambda e: 4) == 4
+
+
+@pytest.mark.parametrize(
+    "codec_class",
+    ["LegacyJsonEnvelopeCodec", "JsonEnvelopeCodec", "BinaryEnvelopeCodec"],
+)
+def test_envelope_encode_event(sending_event, codec_class):
+    from datetime import datetime, timezone
+
+    from fractal.core.event_sourcing import envelopes
+    from fractal.core.event_sourcing.message import Message
+    from fractal.core.event_sourcing.serialization import (
+        event_asdict,
+        serialization_cache,
+    )
+
+    codec = getattr(envelopes, codec_class)()
+    message = Message(
+        id="1",
+        occurred_on=datetime.now(timezone.utc),
+        event=sending_event.__class__.__name__,
+        data=event_asdict(sending_event),
+        object_id=sending_event.object_id,
+        aggregate_root_id=sending_event.aggregate_root_id,
+    )
+
+    with serialization_cache():
+        body = codec.encode_event(message, sending_event)
+        assert codec.encode_event(message, sending_event) == body
+
+    assert codec.decode(body).data == codec.decode(codec.encode(message)).data
@@ -0,0 +1,237 @@
+from dataclasses import dataclass
+from datetime import timedelta
+
+import pytest
+from fractal_specifications.generic.operators import EqualsSpecification
+
+from fractal.core.event_sourcing.event import BasicSendingEvent
+from fractal.core.event_sourcing.models import EventSourcedAggregateRoot
+
+
+@dataclass
+class CountedEvent(BasicSendingEvent):
+    id: str
+    amount: int
+
+    @property
+    def object_id(self):
+        return self.id
+
+    @property
+    def aggregate_root_id(self):
+        return self.id
+
+    @property
+    def aggregate_root_type(self):
+        return Counter
+
+
+@dataclass
+class Counter(EventSourcedAggregateRoot):
+    id: str
+    total: int = 0
+
+    def count(self, amount: int):
+        self.total += amount
+        return self.record(CountedEvent(self.id, amount))
+
+    def apply(self, event: CountedEvent):
+        self.id = event.id
+        self.total += event.amount
+
+
+@pytest.fixture
+def counter_event_store():
+    from fractal.core.event_sourcing.event_store import (
+        InMemoryEventStoreRepository,
+        JsonEventStore,
+    )
+
+    return JsonEventStore(InMemoryEventStoreRepository(), [CountedEvent])
+
+
+def counter_repository(event_store, snapshot_store=None):
+    from fractal.core.event_sourcing.repositories import EventSourcedRepository
+
+    class CounterRepository(EventSourcedRepository[Counter]):
+        entity = Counter
+
+    return CounterRepository(event_store, snapshot_store=snapshot_store)
+
+
+def snapshot_stores():
+    from fractal.core.event_sourcing.snapshots import (
+        EveryNEventsSnapshotPolicy,
+        InMemorySnapshotRepository,
+        JsonSnapshotStore,
+        ObjectSnapshotStore,
+        PickleSnapshotStore,
+    )
+
+    return [
+        store(InMemorySnapshotRepository(), EveryNEventsSnapshotPolicy(3))
+        for store in (ObjectSnapshotStore, JsonSnapshotStore, PickleSnapshotStore)
+    ]
+
+
+def test_load_without_snapshots(counter_event_store):
+    repository = counter_repository(counter_event_store)
+    repository.add(Counter("1").count(1).count(2))
+
+    counter = repository.find_one(EqualsSpecification("id", "1"))
+
+    assert counter.total == 3
+    assert counter.stream_version == 2
+
+
+def test_load_not_found(counter_event_store):
+    from fractal_repositories.exceptions import ObjectNotFoundException
+
+    with pytest.raises(ObjectNotFoundException):
+        counter_repository(counter_event_store).find_one(EqualsSpecification("id", "1"))
+
+
+@pytest.mark.parametrize("snapshot_store", snapshot_stores())
+def test_snapshot_every_n_events(counter_event_store, snapshot_store):
+    repository = counter_repository(counter_event_store, snapshot_store)
+    counter = Counter("1")
+    repository.add(counter.count(1).count(1))
+    assert snapshot_store.snapshot_repository.count() == 0
+
+    repository.add(counter.count(1))
+    assert snapshot_store.snapshot_repository.entities["1"].version == 3
+
+    repository.add(counter.count(1).count(1))
+    assert snapshot_store.snapshot_repository.entities["1"].version == 3
+
+
+@pytest.mark.parametrize("snapshot_store", snapshot_stores())
+def test_load_from_snapshot_and_tail(counter_event_store, snapshot_store):
+    repository = counter_repository(counter_event_store, snapshot_store)
+    counter = Counter("1")
+    repository.add(counter.count(1).count(2).count(3))
+    repository.add(counter.count(4))
+
+    loaded = repository.find_one(EqualsSpecification("id", "1"))
+
+    assert loaded.total == 10
+    assert loaded.stream_version == 4
+    assert loaded is not counter
+
+
+def test_load_uses_only_tail_after_snapshot(counter_event_store):
+    from fractal.core.event_sourcing.snapshots import (
+        InMemorySnapshotRepository,
+        ObjectSnapshotStore,
+    )
+
+    snapshot_store = ObjectSnapshotStore(InMemorySnapshotRepository())
+    repository = counter_repository(counter_event_store, snapshot_store)
+    counter = Counter("1")
+    repository.add(counter.count(1).count(2))
+    counter.total = 100  # only visible through the snapshot
+    snapshot_store.save("1", counter)
+    repository.add(counter.count(5))
+
+    assert repository.find_one(EqualsSpecification("id", "1")).total == 105
+
+
+def test_time_interval_policy():
+    from datetime import datetime, timezone
+
+    from fractal.core.event_sourcing.snapshots import (
+        Snapshot,
+        TimeIntervalSnapshotPolicy,
+    )
+
+    policy = TimeIntervalSnapshotPolicy(timedelta(minutes=5))
+    recent = Snapshot("1", "Counter", 2, datetime.now(timezone.utc), None)
+    old = Snapshot("1", "Counter", 2, recent.occurred_on - timedelta(hours=1), None)
+
+    assert policy.should_snapshot(1, None)
+    assert not policy.should_snapshot(3, recent)
+    assert not policy.should_snapshot(2, old)
+    assert policy.should_snapshot(3, old)
+
+
+def test_json_snapshot_store_round_trips_nested_values():
+    from dataclasses import field
+    from datetime import datetime, timezone
+    from typing import List
+
+    from fractal.core.event_sourcing.snapshots import (
+        InMemorySnapshotRepository,
+        JsonSnapshotStore,
+    )
+
+    @dataclass
+    class Line:
+        product: str
+        added_on: datetime
+
+    @dataclass
+    class Order(EventSourcedAggregateRoot):
+        id: str
+        lines: List[Line] = field(default_factory=list)
+
+    order = Order("1", [Line("book", datetime(2024, 1, 2, 3, 4, tzinfo=timezone.utc))])
+    order.stream_version = 3
+    snapshot_store = JsonSnapshotStore(InMemorySnapshotRepository())
+    snapshot_store.save("1", order)
+
+    loaded = snapshot_store.load(Order, "1")
+
+    assert loaded == order
+    assert loaded.stream_version == 3
+
+
+def test_snapshot_policy_uses_stored_snapshot_after_restart(counter_event_store):
+    from fractal.core.event_sourcing.snapshots import (
+        EveryNEventsSnapshotPolicy,
+        InMemorySnapshotRepository,
+        JsonSnapshotStore,
+    )
+
+    snapshot_repository = InMemorySnapshotRepository()
+    repository = counter_repository(
+        counter_event_store,
+        JsonSnapshotStore(snapshot_repository, EveryNEventsSnapshotPolicy(3)),
+    )
+    counter = Counter("1")
+    repository.add(counter.count(1).count(1).count(1))
+
+    # A new store, as after a restart, with an empty cache
+    repository = counter_repository(
+        counter_event_store,
+        JsonSnapshotStore(snapshot_repository, EveryNEventsSnapshotPolicy(3)),
+    )
+    repository.add(counter.count(1))
+
+    assert snapshot_repository.entities["1"].version == 3
+
+
+def test_snapshot_store_cache_evicts_least_recently_used():
+    from fractal.core.event_sourcing.snapshots import (
+        EveryNEventsSnapshotPolicy,
+        InMemorySnapshotRepository,
+        ObjectSnapshotStore,
+    )
+
+    snapshot_repository = InMemorySnapshotRepository()
+    snapshot_store = ObjectSnapshotStore(
+        snapshot_repository, EveryNEventsSnapshotPolicy(2), cache_size=2
+    )
+    counters = [Counter(str(i)) for i in range(3)]
+    for counter in counters:
+        counter.stream_version = 2
+        snapshot_store.save_if_needed(counter.id, counter)
+    snapshot_store.save_if_needed("1", counters[1])
+    snapshot_store.save_if_needed("2", counters[2])
+
+    assert list(snapshot_store._latest) == ["1", "2"]
+    assert len(snapshot_repository.entities) == 3
+
+    # An evicted aggregate gets its latest snapshot from the repository again
+    counters[0].stream_version = 3
+    assert snapshot_store.save_if_needed("0", counters[0]) is None
+    assert list(snapshot_store._latest) == ["2", "0"]
@@ -171,3 +171,178 @@ def test_foreach_nested_loops():
 
     # Should produce all combinations
     assert results == [("A", 1), ("A", 2), ("B", 1), ("B", 2)]
+
+
+def test_foreach_concurrent_collects_results_in_order():
+    """Test that concurrent items run in threads and results keep the item order."""
+    import threading
+    import time
+
+    from fractal.core.process.actions import QueryAction
+
+    def query(ctx):
+        time.sleep(0.01 * (5 - ctx["item"] % 5))  # later items finish first
+        return (ctx["item"] * 2, threading.current_thread().name)
+
+    action = ForEachAction(
+        range(10),
+        [QueryAction(query, "doubled")],
+        max_concurrency=5,
+        result_var="doubled",
+        results_ctx_var="all_doubled",
+    )
+
+    start_time = time.time()
+    ctx = action.execute(ProcessContext({"initial": "data"}))
+    elapsed_time = time.time() - start_time
+
+    assert [result for result, _ in ctx["all_doubled"]] == list(range(0, 20, 2))
+    assert len({thread for _, thread in ctx["all_doubled"]}) > 1
+    assert ctx["item"] == 9
+    assert ctx["initial"] == "data"
+    assert elapsed_time < 0.25, f"Expected concurrent execution, took {elapsed_time}s"
+
+
+def test_foreach_sequential_collects_results():
+    """Test that results are collected without concurrency as well."""
+    from fractal.core.process.actions import QueryAction
+
+    action = ForEachAction(
+        [1, 2, 3],
+        [QueryAction(lambda ctx: ctx["item"] + 1, "next")],
+        result_var="next",
+    )
+
+    assert action.execute(ProcessContext())["results"] == [2, 3, 4]
+
+
+def test_foreach_concurrent_items_are_isolated():
+    """Test that each concurrent item has its own overlay of the context."""
+    import time
+
+    from fractal.core.process.actions import QueryAction
+
+    def query(ctx):
+        ctx["items"].append(ctx["item"])
+        time.sleep(0.01)
+        return ctx["item"]
+
+    action = ForEachAction(
+        range(8),
+        [QueryAction(query, "seen")],
+        max_concurrency=4,
+        result_var="seen",
+    )
+
+    ctx = action.execute(ProcessContext({"items": []}))
+
+    assert ctx["results"] == list(range(8))
+    assert ctx["items"] == [7]  # changes are merged in order, the last one wins
+
+
+def test_foreach_rate_limit():
+    """Test that rate_limit spaces the start of the items."""
+    import time
+
+    action = ForEachAction(
+        range(5),
+        [SetContextVariableAction(done=True)],
+        max_concurrency=5,
+        rate_limit=50,
+    )
+
+    start_time = time.time()
+    action.execute(ProcessContext())
+
+    assert time.time() - start_time >= 0.08
+
+
+def test_foreach_concurrent_error_stops_and_raises():
+    """Test that an error is raised after merging the items before it."""
+    from fractal.core.process.actions import QueryAction
+
+    def query(ctx):
+        if ctx["item"] == 3:
+            raise ValueError("item 3")
+        return ctx["item"]
+
+    action = ForEachAction(range(100), [QueryAction(query, "value")], max_concurrency=2)
+    ctx = ProcessContext()
+
+    with pytest.raises(ValueError, match="item 3"):
+        action.execute(ctx)
+
+    assert ctx["value"] == 2
+
+
+@pytest.mark.asyncio
+async def test_foreach_concurrent_async():
+    """Test that concurrent items run as tasks in an AsyncProcess."""
+    import asyncio
+    import time
+
+    from fractal.core.process.action import AsyncAction
+    from fractal.core.process.process import AsyncProcess
+
+    class DoubleAction(AsyncAction):
+        async def execute_async(self, ctx):
+            await asyncio.sleep(0.01 * (5 - ctx["item"]))
+            ctx["doubled"] = ctx["item"] * 2
+            return ctx
+
+    process = AsyncProcess(
+        [
+            ForEachAction(
+                range(5), [DoubleAction()], max_concurrency=5, result_var="doubled"
+            )
+        ]
+    )
+
+    start_time = time.time()
+    ctx = await process.run_async()
+
+    assert ctx["results"] == [0, 2, 4, 6, 8]
+    assert time.time() - start_time < 0.09
+
+
+@pytest.mark.asyncio
+async def test_foreach_concurrent_sync_actions_async():
+    """Test that sync actions of concurrent items run in threads, off the loop."""
+    import asyncio
+    import threading
+    import time
+
+    from fractal.core.process.actions import QueryAction
+    from fractal.core.process.process import AsyncProcess
+
+    def fetch(ctx):
+        time.sleep(0.2)
+        return threading.current_thread()
+
+    process = AsyncProcess(
+        [
+            ForEachAction(
+                range(4),
+                [QueryAction(fetch, "thread")],
+                max_concurrency=4,
+                result_var="thread",
+            )
+        ]
+    )
+
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker = asyncio.ensure_future(tick())
+    start_time = time.time()
+    ctx = await process.run_async()
+    ticker.cancel()
+
+    assert time.time() - start_time < 0.35
+    assert threading.current_thread() not in ctx["results"]
+    assert ticks > 5
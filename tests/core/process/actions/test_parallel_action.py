@@ -2,6 +2,8 @@
 
 import time
 
+import pytest
+
 from fractal.core.process.actions import QueryAction, SetContextVariableAction
 from fractal.core.process.actions.control_flow import ParallelAction
 from fractal.core.process.process_context import ProcessContext
@@ -174,3 +176,122 @@ def test_parallel_action_with_nested_scope_access():
     assert result["tripled"] == 15
     assert result["quadrupled"] == 20
     assert result["count"] == 5  # Original value preserved
+
+
+def test_parallel_action_does_not_copy_the_context():
+    """Test that branches share uncopyable objects like the application context."""
+    import threading
+
+    lock = threading.Lock()
+    action = ParallelAction(
+        [
+            QueryAction(lambda s: s.fractal.context, "context1"),
+            QueryAction(lambda s: s.fractal.context, "context2"),
+        ]
+    )
+
+    result = action.execute(ProcessContext({"fractal.context": lock}))
+
+    assert result["context1"] is lock
+    assert result["context2"] is lock
+    assert "parallel_errors" not in result
+
+
+def test_parallel_action_does_not_change_shared_entities():
+    """Test that branches setting attributes of an entity don't change the original."""
+    from dataclasses import dataclass
+
+    from fractal.core.process.actions import SetValueAction
+
+    @dataclass
+    class Order:
+        status: str
+        note: str = ""
+
+    order = Order("new")
+    action = ParallelAction(
+        [
+            SetValueAction(target="order.status", value="paid"),
+            SetValueAction(target="order.note", value="gift"),
+        ]
+    )
+
+    result = action.execute(ProcessContext({"order": order}))
+
+    assert order == Order("new")
+    assert result["order"] == Order("new", "gift")
+    assert "parallel_errors" not in result
+
+
+@pytest.mark.asyncio
+async def test_parallel_action_awaits_async_actions():
+    """Test that async actions are awaited on the running loop, sync ones in threads."""
+    import asyncio
+    import threading
+
+    from fractal.core.process.action import AsyncAction
+    from fractal.core.process.process import AsyncProcess
+
+    class LoopAction(AsyncAction):
+        def __init__(self, ctx_var):
+            self.ctx_var = ctx_var
+
+        async def execute_async(self, ctx):
+            await asyncio.sleep(0.1)
+            ctx[self.ctx_var] = asyncio.get_running_loop()
+            return ctx
+
+    action = ParallelAction(
+        [
+            LoopAction("loop1"),
+            LoopAction("loop2"),
+            QueryAction(lambda s: threading.current_thread(), "thread"),
+        ]
+    )
+
+    start_time = time.time()
+    result = await AsyncProcess([action]).run_async()
+
+    assert result["loop1"] is result["loop2"] is asyncio.get_running_loop()
+    assert result["thread"] is not threading.current_thread()
+    assert time.time() - start_time < 0.19
+
+
+@pytest.mark.asyncio
+async def test_parallel_action_execute_within_running_loop():
+    """Test that the sync execute() works from within a running loop."""
+    action = ParallelAction([SetContextVariableAction(key="value")])
+
+    result = action.execute(ProcessContext())
+
+    assert result["key"] == "value"
+
+
+def test_parallel_action_max_concurrency():
+    """Test that at most max_concurrency sync actions run at once in the executor."""
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def query(scope):
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.pop()
+        return threading.current_thread().name
+
+    with ThreadPoolExecutor(max_workers=8, thread_name_prefix="branch") as executor:
+        action = ParallelAction(
+            [QueryAction(query, f"result{i}") for i in range(6)],
+            executor=executor,
+            max_concurrency=2,
+        )
+        result = action.execute(ProcessContext())
+
+    assert max(peak) == 2
+    assert all(result[f"result{i}"].startswith("branch") for i in range(6))
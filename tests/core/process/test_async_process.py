@@ -261,3 +261,128 @@ def test_async_actions_in_regular_process():
     result = process.run()
     assert result["value"] == "sync"
     assert result["async_result"] == "async"
+
+
+@pytest.mark.asyncio
+async def test_async_process_sync_run_within_running_loop():
+    """Test that the sync run() works from within a running loop."""
+    process = AsyncProcess([CustomAsyncAction("async", delay=0.01)])
+
+    scope = process.run()
+    assert scope["async_result"] == "async"
+
+
+class LoopAction(AsyncAction):
+    """Records the running loop of each execution."""
+
+    async def execute_async(self, scope: ProcessContext) -> ProcessContext:
+        await asyncio.sleep(0.05)
+        scope["loops"] = scope.get("loops", []) + [asyncio.get_running_loop()]
+        return scope
+
+
+@pytest.mark.asyncio
+async def test_async_process_awaits_actions_in_control_flow():
+    """Test that async actions nested in control flow run on the same loop."""
+    from fractal_specifications.generic.operators import LessThanSpecification
+
+    from fractal.core.process.actions import IncreaseValueAction, RaiseExceptionAction
+    from fractal.core.process.actions.control_flow import (
+        ForEachAction,
+        IfElseAction,
+        SubProcessAction,
+        TryExceptAction,
+        WhileAction,
+    )
+    from fractal.core.process.process import Process
+
+    process = AsyncProcess(
+        [
+            SetContextVariableAction(count=0),
+            IfElseAction(
+                [LoopAction()], specification=LessThanSpecification("count", 1)
+            ),
+            WhileAction(
+                [LoopAction(), IncreaseValueAction(ctx_var="count", value=1)],
+                specification=LessThanSpecification("count", 2),
+            ),
+            ForEachAction([1, 2], [LoopAction()]),
+            TryExceptAction(
+                [RaiseExceptionAction(message="failed")],
+                except_actions=[LoopAction()],
+                finally_actions=[LoopAction()],
+            ),
+            SubProcessAction(Process([LoopAction()])),
+        ]
+    )
+
+    scope = await process.run_async()
+
+    assert scope["loops"] == [asyncio.get_running_loop()] * 8
+    assert scope["last_error_message"] == "failed"
+
+
+@pytest.mark.asyncio
+async def test_async_process_control_flow_branches_run_concurrently():
+    """Test that async actions nested in parallel control flow run concurrently."""
+    import time
+
+    from fractal.core.process.actions.control_flow import (
+        ParallelAction,
+        SubProcessAction,
+    )
+    from fractal.core.process.process import Process
+
+    process = AsyncProcess(
+        [
+            ParallelAction(
+                [
+                    SubProcessAction(Process([CustomAsyncAction("a", delay=0.1)])),
+                    SubProcessAction(Process([CustomAsyncAction("b", delay=0.1)])),
+                ]
+            )
+        ]
+    )
+
+    start_time = time.time()
+    await process.run_async()
+
+    assert time.time() - start_time < 0.19
+
+
+@pytest.mark.asyncio
+async def test_async_process_control_flow_sync_actions_run_in_threads():
+    """Test that sync actions nested in control flow don't block the loop."""
+    import threading
+    import time
+
+    from fractal.core.process.actions import QueryAction
+    from fractal.core.process.actions.control_flow import (
+        ParallelAction,
+        SubProcessAction,
+    )
+    from fractal.core.process.process import Process
+
+    def slow(ctx):
+        time.sleep(0.2)
+        return threading.current_thread()
+
+    process = AsyncProcess(
+        [
+            ParallelAction(
+                [
+                    SubProcessAction(Process([QueryAction(slow, "a")])),
+                    SubProcessAction(Process([QueryAction(slow, "b")])),
+                    SubProcessAction(
+                        Process([CustomAsyncAction("c"), QueryAction(slow, "c")])
+                    ),
+                ]
+            )
+        ]
+    )
+
+    start_time = time.time()
+    scope = await process.run_async()
+
+    assert time.time() - start_time < 0.39
+    assert threading.current_thread() not in (scope["a"], scope["b"], scope["c"])
@@ -242,3 +242,119 @@ def test_context_setitem_modifies_internal_data():
     assert ctx["age"] == 30
     assert "name" in ctx
     assert "age" in ctx
+
+
+def test_context_update_with_itself_skips_merge():
+    """Test that merging a context into itself doesn't walk the data."""
+    from unittest import mock
+
+    from fractal.core.process import process_context
+
+    ctx = ProcessContext({"entities": {str(i): i for i in range(100)}})
+
+    with mock.patch.object(process_context, "_deep_merge") as deep_merge:
+        assert ctx.update(ctx) is ctx
+
+    deep_merge.assert_not_called()
+
+
+def test_context_update_merges_dirty_keys_only():
+    """Test that update() only merges keys the other context changed."""
+    original = ProcessContext({"counter": 0, "name": "John", "items": []})
+    branch = original.copy()
+
+    original["counter"] = 5
+    branch["name"] = "Jane"
+    branch["items"].append("item")
+    original.update(branch)
+
+    assert original["counter"] == 5  # not reverted to the value in the copy
+    assert original["name"] == "Jane"
+    assert original["items"] == ["item"]  # changed in place, read as dirty
+
+
+def test_context_update_propagates_dirty_keys():
+    """Test that merged keys are dirty in the merged context as well."""
+    root = ProcessContext({"a": 1})
+    parent = root.copy()
+    child = parent.copy()
+
+    child["b"] = 2
+    parent.update(child)
+    root.update(parent)
+
+    assert dict(root.items()) == {"a": 1, "b": 2}
+
+
+def test_branch_shares_data_copy_on_write():
+    """Test that a branch reads the parent and writes to its own overlay."""
+    import threading
+
+    lock = threading.Lock()  # cannot be deep copied
+    original = ProcessContext(
+        {"fractal.context": lock, "count": 1, "items": [1], "nested": {"a": {"b": 1}}}
+    )
+    branch = original.branch()
+
+    branch["count"] = 2
+    branch["items"].append(2)
+    branch["nested"]["a"]["b"] = 2
+
+    assert branch.fractal.context is lock
+    assert (branch["count"], branch["items"], branch["nested"]) == (
+        2,
+        [1, 2],
+        {"a": {"b": 2}},
+    )
+    assert (original["count"], original["items"], original["nested"]) == (
+        1,
+        [1],
+        {"a": {"b": 1}},
+    )
+
+    original.update(branch)
+
+    assert original["count"] == 2
+    assert original["items"] == [1, 2]
+    assert original["nested"] == {"a": {"b": 2}}
+    assert original.fractal.context is lock
+
+
+def test_branch_setting_entity_attribute_leaves_parent_unchanged():
+    """Test that a branch setting a dotted path changes a copy of the entity."""
+    from dataclasses import dataclass
+
+    from fractal.core.process.actions import SetValueAction
+
+    @dataclass
+    class Order:
+        status: str
+
+    order = Order("new")
+    original = ProcessContext({"order": order})
+    branch = original.branch()
+
+    SetValueAction(target="order.status", value="paid").execute(branch)
+
+    assert branch["order"].status == "paid"
+    assert original["order"] is order
+    assert order.status == "new"
+
+    original.update(branch)
+
+    assert original["order"].status == "paid"
+
+
+def test_branches_merge_in_order():
+    """Test that later branches win the keys they share, whatever order they ran in."""
+    original = ProcessContext({"value": 0, "settings": {"a": 1, "b": 1}})
+    first, second = original.branch(), original.branch()
+
+    second["value"] = 2
+    first["value"] = 1
+    first.update(ProcessContext({"settings": {"a": 3}}))
+
+    original.update(first).update(second)
+
+    assert original["value"] == 2
+    assert original["settings"] == {"a": 3, "b": 1}
@@ -0,0 +1,41 @@
+import asyncio
+import threading
+
+import pytest
+
+
+async def _loop_and_thread():
+    await asyncio.sleep(0)
+    return asyncio.get_running_loop(), threading.current_thread()
+
+
+def test_run_coroutine_reuses_the_loop_of_the_thread():
+    from fractal.core.utils.event_loop import run_coroutine
+
+    loop, thread = run_coroutine(_loop_and_thread())
+
+    assert run_coroutine(_loop_and_thread()) == (loop, thread)
+    assert thread is threading.current_thread()
+
+
+@pytest.mark.asyncio
+async def test_run_coroutine_within_a_running_loop():
+    from fractal.core.utils.event_loop import get_background_loop, run_coroutine
+
+    loop, thread = run_coroutine(_loop_and_thread())
+
+    assert loop is get_background_loop()
+    assert thread is not threading.current_thread()
+
+
+def test_run_coroutine_within_the_background_loop():
+    from fractal.core.utils.event_loop import get_background_loop, run_coroutine
+
+    async def nested():
+        return run_coroutine(_loop_and_thread())
+
+    loop, _ = asyncio.run_coroutine_threadsafe(nested(), get_background_loop()).result(
+        timeout=5
+    )
+
+    assert loop is not get_background_loop()
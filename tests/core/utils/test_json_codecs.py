@@ -0,0 +1,121 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal
+from json import JSONEncoder
+
+import pytest
+
+data = {"id": "1", "on": datetime(2021, 8, 19), "price": Decimal("1.95"), "n": [1, 2]}
+expected = {"id": "1", "on": "2021-08-19T00:00:00", "price": "1.95", "n": [1, 2]}
+
+
+def codecs():
+    from fractal.core.utils import json_codecs
+
+    yield json_codecs.StdlibJsonCodec
+    if json_codecs.orjson is not None:
+        yield json_codecs.OrjsonCodec
+    if json_codecs.msgspec is not None:
+        yield json_codecs.MsgspecJsonCodec
+
+
+@pytest.mark.parametrize("codec_class", list(codecs()))
+@pytest.mark.parametrize("as_bytes", [False, True])
+def test_json_codec(codec_class, as_bytes):
+    from fractal.core.utils.json_encoder import EnhancedEncoder
+
+    codec = codec_class(EnhancedEncoder, as_bytes=as_bytes)
+
+    dumped = codec.dumps(data)
+
+    assert isinstance(dumped, bytes if as_bytes else str)
+    assert codec.loads(dumped) == expected
+
+
+@pytest.mark.parametrize("codec_class", list(codecs()))
+def test_json_codec_non_str_keys(codec_class):
+    codec = codec_class()
+
+    assert codec.loads(codec.dumps({1: "a", "b": {2: "c"}})) == {
+        "1": "a",
+        "b": {"2": "c"},
+    }
+
+
+@dataclass
+class Point:
+    x: int
+    y: int
+
+
+class TimestampEncoder(JSONEncoder):
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.timestamp()
+        if isinstance(o, Point):
+            return [o.x, o.y]
+        return super(TimestampEncoder, self).default(o)
+
+
+def encoder_codecs():
+    from fractal.core.utils import json_codecs
+
+    yield json_codecs.StdlibJsonCodec
+    if json_codecs.orjson is not None:
+        yield json_codecs.OrjsonCodec
+
+
+@pytest.mark.parametrize("codec_class", list(encoder_codecs()))
+def test_json_codec_uses_encoder_for_datetimes_and_dataclasses(codec_class):
+    on = datetime(2021, 8, 19, tzinfo=timezone.utc)
+    codec = codec_class(TimestampEncoder)
+
+    assert codec.loads(codec.dumps({"on": on, "at": Point(1, 2)})) == {
+        "on": on.timestamp(),
+        "at": [1, 2],
+    }
+
+
+def test_get_json_codec_round_trips_utc_datetimes():
+    from fractal.core.utils.json_codecs import get_json_codec
+    from fractal.core.utils.json_encoder import EnhancedEncoder
+
+    on = datetime(2021, 8, 19, tzinfo=timezone.utc)
+    codec = get_json_codec(EnhancedEncoder)
+
+    assert datetime.fromisoformat(codec.loads(codec.dumps({"on": on}))["on"]) == on
+
+
+def test_get_json_codec_without_msgspec_for_encoder(monkeypatch):
+    from fractal.core.utils import json_codecs
+
+    monkeypatch.setattr(json_codecs, "orjson", None)
+
+    assert isinstance(
+        json_codecs.get_json_codec(JSONEncoder), json_codecs.StdlibJsonCodec
+    )
+
+
+def test_json_codec_without_encoder():
+    from fractal.core.utils.json_codecs import get_json_codec
+
+    with pytest.raises(TypeError):
+        get_json_codec().dumps(data)
+
+
+def test_get_json_codec_fallback(monkeypatch):
+    from fractal.core.utils import json_codecs
+
+    monkeypatch.setattr(json_codecs, "orjson", None)
+    monkeypatch.setattr(json_codecs, "msgspec", None)
+
+    assert isinstance(json_codecs.get_json_codec(), json_codecs.StdlibJsonCodec)
+
+
+def test_unavailable_codec(monkeypatch):
+    from fractal.core.utils import json_codecs
+
+    monkeypatch.setattr(json_codecs, "orjson", None)
+
+    with pytest.raises(ImportError):
+        json_codecs.OrjsonCodec()
@@ -156,3 +156,46 @@ def regular_object():
         name: str = "default_name"
 
     return Regular("1")
+
+
+@pytest.fixture
+def account_classes():
+    from fractal.core.event_sourcing.event import BasicSendingEvent
+    from fractal.core.event_sourcing.models import EventSourcedAggregateRoot, applies
+
+    @dataclass
+    class Deposited(BasicSendingEvent):
+        id: str
+        amount: int
+
+        @property
+        def object_id(self):
+            return self.id
+
+        @property
+        def aggregate_root_id(self):
+            return self.id
+
+        @property
+        def aggregate_root_type(self):
+            return Account
+
+    @dataclass
+    class Withdrawn(Deposited):
+        pass
+
+    @dataclass
+    class Account(EventSourcedAggregateRoot):
+        id: str
+        balance: int = 0
+
+        @applies(Deposited)
+        def deposited(self, event: Deposited):
+            self.id = event.id
+            self.balance += event.amount
+
+        @applies(Withdrawn)
+        def withdrawn(self, event: Withdrawn):
+            self.balance -= event.amount
+
+    return Account, Deposited, Withdrawn